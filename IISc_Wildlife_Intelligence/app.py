@@ -1,8 +1,21 @@
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
-import numpy as np
-import os
+import calendar
+
+from modules.dem import DEMSampler
+from modules.escape_routes import cost_version, incidents_key, load_escape_routes, simulated_cost_layers
+from modules.incident_store import build_store_from_csv, load_map_incidents, store_exists
+from modules.map_layers import incident_cluster_layer, incident_point_layer, raster_bitmap_layer
+from modules.point_pyramid import (
+    MAX_RAW_POINTS, aggregate_view, build_point_pyramid, level_for_zoom, points_in_bounds, viewport_bounds
+)
+from modules.prediction_model import DEMOGRAPHIC_PROFILES, SPECIES, required_features
+from modules.query_engine import IncidentIndex
+from modules.raster_grid import load_manifest as load_suitability_manifest, read_suitability_window
+from modules.risk_surface import load_manifest as load_risk_manifest, read_risk_window
+from modules.telemetry import Telemetry
+from modules.temporal import SEASON_NAMES, season_code
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -11,51 +24,42 @@ st.set_page_config(
     page_icon="🐾"
 )
 
+# Timings for this rerun only (load, filter, layer build, render); see the debug panel at the bottom
+telemetry = Telemetry("app")
+
 # --- 2. DATA LOADER ---
 @st.cache_data
 def load_data():
-    # Priority list of files
-    possible_files = [
-        "data/final_geocoded_data.csv",
-        "data/incidents_geocoded.csv",
-        "data/verified_geocoded.csv",
-        "incidents_geocoded.csv"
-    ]
-    
-    df = pd.DataFrame()
-    for file in possible_files:
-        if os.path.exists(file):
-            try:
-                try: df = pd.read_csv(file, encoding='utf-8')
-                except: df = pd.read_csv(file, encoding='ISO-8859-1')
-                break
-            except: continue
-    
-    if df.empty:
+    # First run: migrate the legacy CSV exports into the Parquet incident store
+    if not store_exists():
+        build_store_from_csv()
+    if not store_exists():
         return pd.DataFrame()
 
-    # Standardization
-    if 'Animal' in df.columns:
-        df['Animal'] = df['Animal'].astype(str).str.title().str.strip()
-    
-    # Ensure coordinates
-    df = df.dropna(subset=['lat', 'lon'])
-    
-    # Ensure Source URL exists
-    if 'Source url' not in df.columns:
-        df['Source url'] = "#"
-
-    # --- SIMULATE ENV DATA FOR MCDA MODEL ---
-    # NOTE: This is where we simulate satellite data for the "Model"
-    np.random.seed(42)
-    rows = len(df)
-    df['sim_water_dist'] = np.random.uniform(0, 1, rows)  # 0 = close to water
-    df['sim_veg_density'] = np.random.uniform(0, 1, rows) # 1 = dense forest
-    df['sim_rocky'] = np.random.uniform(0, 1, rows)       # 1 = rocky terrain
-    
-    return df
+    # Projection, clean-up and the simulated MCDA inputs live in the store module
+    # (run_benchmarks.py times the same function)
+    return load_map_incidents(dem=DEMSampler())
 
-df = load_data()
+@st.cache_data
+def load_point_pyramid():
+    # Built once per dataset: per-cell, per-species counts at every quadtree level
+    return build_point_pyramid(load_data())
+
+@st.cache_data
+def escape_routes(cost_key, incident_key, _lats, _lons):
+    # Keyed on (cost-surface version, incident set): toggling the checkbox or
+    # re-running with the same filters reuses routes instead of recomputing them
+    routes, _ = load_escape_routes(_lats, _lons)
+    return routes
+
+@st.cache_resource
+def load_incident_index():
+    # Shared, never copied per rerun (cache_data would unpickle a fresh frame every time)
+    return IncidentIndex(load_data())
+
+telemetry.mark("load")
+index = load_incident_index()
+df = index.df
 
 # --- 3. SIDEBAR: INTELLIGENCE HUB ---
 st.sidebar.title("🧠 Intelligence Hub")
@@ -63,6 +67,8 @@ st.sidebar.title("🧠 Intelligence Hub")
 # Feature 1: Hotspots
 st.sidebar.subheader("1. Visualization Mode")
 view_mode = st.sidebar.radio("Map Layer:", ["📍 Exact Locations", "🔥 Hotspot Density"], index=0)
+map_focus = st.sidebar.selectbox("Focus On", ["All India"] + index.values('State'))
+map_zoom = st.sidebar.slider("Map Zoom (level of detail)", 3, 12, 5)
 
 # Feature 2: Seasonal AI
 st.sidebar.subheader("2. Seasonal Forecasting (MCDA)")
@@ -70,17 +76,37 @@ target_season = st.sidebar.selectbox(
     "Predict Risk Zones For:",
     ["Current (None)", "Summer (Water Stress)", "Monsoon (Veg Growth)", "Winter (Shelter Seeking)"]
 )
+if target_season != "Current (None)":
+    surface_species = st.sidebar.selectbox("Habitat Surface Species", SPECIES)
+    surface_profile = st.sidebar.selectbox("Demographic Profile", DEMOGRAPHIC_PROFILES)
+show_risk = st.sidebar.checkbox("🧠 Model Risk Surface")
 
 # Feature 3: Escape Routes
 st.sidebar.subheader("3. Post-Encounter AI")
 show_escape = st.sidebar.checkbox("🔮 Predict Escape Vectors")
 
 # Filters
+telemetry.mark("filter")
 st.sidebar.markdown("---")
 if not df.empty:
-    all_animals = sorted(df['Animal'].unique().tolist())
+    all_animals = index.values('Animal')
     selected_animals = st.sidebar.multiselect("Filter Species", all_animals, default=all_animals)
-    filtered_df = df[df['Animal'].isin(selected_animals)]
+    selected_states = st.sidebar.multiselect("Filter State (all if empty)", index.values('State'))
+    selected_districts = st.sidebar.multiselect("Filter District (all if empty)", index.values('District'))
+    date_range = None
+    if index.date_bounds():
+        picked = st.sidebar.date_input("Incident Dates", value=index.date_bounds(),
+                                       min_value=index.date_bounds()[0], max_value=index.date_bounds()[1])
+        # Only a narrowed range filters (undated reports stay visible by default)
+        if isinstance(picked, (list, tuple)) and len(picked) == 2 and tuple(picked) != index.date_bounds():
+            date_range = tuple(picked)
+    # Bitmap-indexed lookup; identical filters on a rerun hit the index's result cache
+    filtered_df = index.query(
+        species=selected_animals,
+        states=selected_states or None,
+        districts=selected_districts or None,
+        date_range=date_range
+    )
 else:
     filtered_df = pd.DataFrame()
 
@@ -88,32 +114,79 @@ else:
 st.title("🐾 Wildlife Conflict Intelligence System")
 
 if not filtered_df.empty:
+    telemetry.mark("layers", rows=len(filtered_df))
     layers = []
+
+    # --- VIEWPORT (centre + zoom decide what reaches the browser) ---
+    focus_df = filtered_df
+    if map_focus != "All India":
+        focus_states = [map_focus] if not selected_states or map_focus in selected_states else []
+        focus_df = index.query(selected_animals, focus_states, selected_districts or None, date_range)
+    if focus_df.empty:
+        focus_df = filtered_df
+    center_lat, center_lon = focus_df['lat'].mean(), focus_df['lon'].mean()
+    # One zoom level out, so there is room to pan before the edge of the data
+    map_bounds = viewport_bounds(center_lat, center_lon, map_zoom - 1)
     
     # --- LAYER A: SEASONAL PREDICTION (The MCDA Model) ---
     if target_season != "Current (None)":
-        
-        pred_df = filtered_df.copy()
+
+        # Incidents that actually happened in this season (season bitmap lookup);
+        # falls back to every filtered incident when none of them are dated
+        season = season_code(target_season)
+        season_df = index.query(selected_animals, selected_states or None, selected_districts or None,
+                                date_range, seasons=[season])
+        if season_df.empty:
+            season_df = filtered_df
+            st.caption(f"ℹ️ No dated {SEASON_NAMES[season]} incidents match the filters - showing all of them.")
+        else:
+            record = index.season_view(season, selected_animals).head(3)
+            st.caption(f"📅 {len(season_df):,} of {len(filtered_df):,} incidents fall in {SEASON_NAMES[season]}. Record: " +
+                       " · ".join(f"{r.species} {r.incidents:,} ({r.share:.0%}, peak {calendar.month_abbr[r.peak_month]})"
+                                  for r in record.itertuples()))
+
+        # Only the columns the heatmap needs (index results are shared and read-only)
+        pred_df = season_df[['lat', 'lon']].copy()
         
         # MCDA LOGIC (Multi-Criteria Decision Analysis)
         if "Summer" in target_season:
             # Rule: High Risk near Water (1 - distance)
-            pred_df['weight'] = (1 - pred_df['sim_water_dist']) * 10 
+            pred_df['weight'] = (1 - season_df['sim_water_dist']) * 10 
             color_range = [[173, 216, 230], [0, 0, 255]] # Blue
             st.info("☀️ **Summer Forecast (MCDA Model):** Weighting shifts to **Hydrology (Water Proximity)**.")
             
         elif "Monsoon" in target_season:
             # Rule: High Risk in Dense Vegetation
-            pred_df['weight'] = pred_df['sim_veg_density'] * 10
+            pred_df['weight'] = season_df['sim_veg_density'] * 10
             color_range = [[144, 238, 144], [0, 100, 0]] # Green
             st.info("🌧️ **Monsoon Forecast (MCDA Model):** Weighting shifts to **Vegetation Density (NDVI)**.")
             
         elif "Winter" in target_season:
             # Rule: High Risk in Rocky/Shelter areas
-            pred_df['weight'] = pred_df['sim_rocky'] * 10
+            pred_df['weight'] = season_df['sim_rocky'] * 10
             color_range = [[255, 165, 0], [139, 69, 19]] # Orange
             st.info("❄️ **Winter Forecast (MCDA Model):** Weighting shifts to **Terrain Ruggedness (Shelter)**.")
 
+        # CONTINUOUS SUITABILITY SURFACE (precomputed pyramid, viewport slice only)
+        pad = 1.0
+        viewport = (
+            filtered_df['lat'].min() - pad, filtered_df['lon'].min() - pad,
+            filtered_df['lat'].max() + pad, filtered_df['lon'].max() + pad
+        )
+        surface = read_suitability_window(
+            surface_species, target_season.split(" ")[0], surface_profile, viewport
+        )
+        if surface is not None:
+            values, bounds = surface
+            layers.append(raster_bitmap_layer(values, bounds, color_range))
+            simulated = (load_suitability_manifest() or {}).get('simulated_layers') or {}
+            simulated = [name for name in required_features(surface_species) if name in simulated]
+            if simulated:
+                st.caption(f"⚠️ SIMULATED: the suitability surface uses simulated {', '.join(simulated)} layers, "
+                           "not real terrain/OSM data - illustrative only.")
+        else:
+            st.caption("ℹ️ Run 'build_suitability_rasters.py' to overlay the habitat suitability surface.")
+
         # HEATMAP FOR PREDICTION
         layers.append(pdk.Layer(
             "HeatmapLayer",
@@ -127,29 +200,39 @@ if not filtered_df.empty:
             color_range=color_range
         ))
 
+    # --- LAYER A2: MODEL RISK SURFACE (trained forest scored on every grid cell) ---
+    if show_risk:
+        risk = read_risk_window(map_bounds)
+        if risk is not None:
+            values, bounds = risk
+            layers.append(raster_bitmap_layer(values, bounds, [[255, 255, 178], [189, 0, 38]], opacity=0.5))
+            simulated = (load_risk_manifest() or {}).get('simulated_layers')
+            if simulated:
+                st.caption(f"⚠️ SIMULATED: the model was scored on simulated {', '.join(simulated)} layers, "
+                           "not real terrain/OSM data - illustrative only (yellow = low, red = high).")
+            else:
+                st.caption("🧠 Conflict probability from the trained model (yellow = low, red = high).")
+        else:
+            st.caption("ℹ️ Run 'build_risk_surface.py' to overlay the model's risk surface.")
+
     # --- LAYER B: VISUALIZATION MODES ---
     if view_mode == "📍 Exact Locations":
-        # Dynamic coloring
-        def get_color(animal):
-            s = str(animal).lower()
-            if 'tiger' in s: return [255, 140, 0, 200]
-            if 'leopard' in s: return [255, 215, 0, 200]
-            if 'bear' in s: return [200, 30, 0, 200]
-            return [128, 128, 128, 200]
-
-        filtered_df['color'] = filtered_df['Animal'].apply(get_color)
-        
-        layers.append(pdk.Layer(
-            "ScatterplotLayer",
-            data=filtered_df,
-            get_position='[lon, lat]',
-            get_color='color',
-            get_radius=8000,
-            pickable=True,
-            stroked=True,
-            line_width_min_pixels=1,
-            get_line_color=[0, 0, 0]
-        ))
+        # Level of detail: raw dots only when few are in view, otherwise
+        # quadtree cells (counts + species mix) sized for this zoom
+        points_in_view = points_in_bounds(filtered_df, map_bounds)
+        if len(points_in_view) <= MAX_RAW_POINTS:
+            layers.append(incident_point_layer(points_in_view))
+        else:
+            level = level_for_zoom(map_zoom)
+            if selected_states or selected_districts or date_range:
+                # Filters the shared pyramid doesn't key on: aggregate just the rows in view
+                pyramid = build_point_pyramid(points_in_view, levels=[level])
+            else:
+                pyramid = load_point_pyramid()
+            cells = aggregate_view(pyramid, level, map_bounds, selected_animals)
+            layers.append(incident_cluster_layer(cells))
+            st.caption(f"🧮 {len(points_in_view):,} incidents in view, grouped into {len(cells):,} cells. "
+                       f"Zoom in or focus on a state for individual reports.")
     
     elif view_mode == "🔥 Hotspot Density":
         # STANDARD DENSITY MAP (The Feature that wasn't working)
@@ -167,36 +250,59 @@ if not filtered_df.empty:
 
     # --- LAYER C: ESCAPE VECTORS ---
     if show_escape:
-        # Heuristic: Flee North-West towards simulated forest cover
-        vectors = []
-        for i, row in filtered_df.iterrows():
-            vectors.append({
-                "source": [row['lon'], row['lat']],
-                "target": [row['lon'] - 0.05, row['lat'] + 0.05]
-            })
-            
-        layers.append(pdk.Layer(
-            "ArcLayer",
-            data=vectors,
-            get_source_position="source",
-            get_target_position="target",
-            get_source_color=[255, 50, 50],
-            get_target_color=[50, 255, 50],
-            get_width=4,
-            get_tilt=15
-        ))
-        st.success("🔮 **Escape AI:** Vectors indicate probable flight path (Least Cost Path Analysis).")
+        # Least-cost paths to the nearest refuge cell over a friction raster built from
+        # land cover, slope and settlement distance (one multi-source Dijkstra per tile).
+        # Routes are computed per distinct location and only those in view are drawn.
+        origins = points_in_bounds(filtered_df, map_bounds)[['lat', 'lon']].drop_duplicates().head(MAX_RAW_POINTS)
+        lats, lons = origins['lat'].to_numpy(), origins['lon'].to_numpy()
+        try:
+            # Cost layers are built by build_feature_layers.py only; the app never writes them
+            routes = escape_routes(cost_version(), incidents_key(lats, lons), lats, lons)
+        except FileNotFoundError:
+            routes = None
+        if routes is None:
+            st.caption("ℹ️ Run 'build_feature_layers.py' to predict escape routes over the cost layers.")
+        else:
+            paths = [{"path": r['path']} for r in routes if r is not None]
+
+            layers.append(pdk.Layer(
+                "PathLayer",
+                data=paths,
+                get_path="path",
+                get_color=[255, 50, 50],
+                get_width=4,
+                width_min_pixels=2,
+                cap_rounded=True,
+                joint_rounded=True
+            ))
+            # Refuge end points in green, like the old arc targets
+            layers.append(pdk.Layer(
+                "ScatterplotLayer",
+                data=[{"position": p["path"][-1]} for p in paths],
+                get_position="position",
+                get_color=[50, 255, 50],
+                get_radius=1500,
+                radius_min_pixels=3
+            ))
+            simulated = simulated_cost_layers()
+            if simulated:
+                st.caption(f"⚠️ SIMULATED: {len(paths)} routes over simulated {', '.join(simulated)} layers, "
+                           "not real terrain/OSM data - illustrative only.")
+            else:
+                st.success(f"🔮 **Escape AI:** {len(paths)} routes show the probable flight path to the nearest "
+                           f"dense cover (Least Cost Path Analysis).")
 
     # --- RENDER MAP ---
+    telemetry.mark("render", rows=len(layers))
     tooltip = {
         "html": "<b>Animal:</b> {Animal}<br/><b>Location:</b> {District}<br/><b>Details:</b> {Incident details}",
         "style": {"backgroundColor": "black", "color": "white"}
     }
     
     view_state = pdk.ViewState(
-        latitude=filtered_df['lat'].mean(),
-        longitude=filtered_df['lon'].mean(),
-        zoom=5,
+        latitude=center_lat,
+        longitude=center_lon,
+        zoom=map_zoom,
         pitch=45 if show_escape else 0
     )
 
@@ -208,6 +314,7 @@ if not filtered_df.empty:
     ))
 
     # --- DRILL DOWN & SOURCE LINKS ---
+    telemetry.mark("drill-down", rows=min(len(filtered_df), 50))
     st.markdown("---")
     st.subheader(f"📋 Incident Verification ({len(filtered_df)} Records)")
     
@@ -230,4 +337,14 @@ if not filtered_df.empty:
                     st.button("No Source Link", disabled=True, key=f"btn_{i}")
 
 else:
-    st.warning("⚠️ No data loaded. Please run 'final_geocoder.py' first.")
\ No newline at end of file
+    st.warning("⚠️ No data loaded. Please run 'final_geocoder.py' first.")
+
+# --- 5. DEBUG: WHERE THIS RERUN SPENT ITS TIME (SO FAR) ---
+# Every phase up to here is closed first, so the table covers the whole page except this panel
+telemetry.end_mark()
+if st.sidebar.checkbox("🛠️ Show timings for this rerun so far"):
+    breakdown = pd.DataFrame(telemetry.breakdown())
+    breakdown['ms'] = (breakdown['seconds'] * 1000).round(1)
+    st.sidebar.dataframe(breakdown[['span', 'ms', 'rows', 'peak_rss_mb']], hide_index=True)
+    st.sidebar.caption(f"⏱️ {breakdown['ms'].sum():,.0f} ms this rerun so far, up to this panel (cached loads show as near zero)")
+telemetry.flush()
@@ -0,0 +1,70 @@
+import random
+import time
+
+import requests
+
+from modules.local_overpass_server import start_mirrors
+from modules.overpass_client import OverpassClient
+
+# --- CONFIGURATION ---
+NUM_POINTS = 30          # rows to "extract" (3 Overpass queries + 1 elevation each)
+MIRRORS = 3
+MIRROR_RATE = 5.0        # requests/second each local mirror accepts before answering 429
+MIRROR_LATENCY = 0.05    # seconds of simulated server work per request
+
+QUERY = """[out:json][timeout:25];
+node["place"="village"](around:5000,{lat},{lon});
+out center;"""
+
+# --- 1. LEGACY REQUEST LOGIC (as extract_features_real.py used to do it) ---
+def legacy_overpass_request(endpoints, query, max_retries=3):
+    for i in range(max_retries):
+        endpoint = random.choice(endpoints)
+        try:
+            response = requests.get(endpoint, params={'data': query}, timeout=20)
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code == 429:
+                time.sleep(5)
+        except Exception:
+            pass
+        time.sleep(2 * (i + 1))
+    return None
+
+points = [(random.uniform(10, 30), random.uniform(72, 90)) for _ in range(NUM_POINTS)]
+print(f"🧪 {MIRRORS} local mirrors at {MIRROR_RATE} req/s each, {NUM_POINTS} points")
+
+# --- 2. BASELINE: serial, fresh connection per call, random mirror, 1s sleep per row ---
+mirrors, (_, elevation_base) = start_mirrors(MIRRORS, MIRROR_RATE, 2, MIRROR_LATENCY)
+endpoints = [f"{base}/api/interpreter" for _, base in mirrors]
+elevation_url = f"{elevation_base}/api/v1/lookup"
+
+start = time.time()
+failures = 0
+for lat, lon in points:
+    requests.get(elevation_url, params={'locations': f"{lat},{lon}"}, timeout=10)
+    for _ in range(3):
+        failures += legacy_overpass_request(endpoints, QUERY.format(lat=lat, lon=lon)) is None
+    time.sleep(1)
+baseline = time.time() - start
+print(f"🐢 Serial baseline: {baseline:.2f}s ({NUM_POINTS * 3 / baseline:.1f} Overpass req/s, {failures} failed)")
+
+# --- 3. POOLED CLIENT: token bucket per mirror, bounded in-flight (fresh mirrors, fresh quota) ---
+mirrors, (_, elevation_base) = start_mirrors(MIRRORS, MIRROR_RATE, 2, MIRROR_LATENCY)
+endpoints = [f"{base}/api/interpreter" for _, base in mirrors]
+elevation_url = f"{elevation_base}/api/v1/lookup"
+client = OverpassClient(endpoints, elevation_url, rate=MIRROR_RATE, max_in_flight=8)
+
+def fetch(point):
+    lat, lon = point
+    return [client.query(QUERY.format(lat=lat, lon=lon)) for _ in range(3)]
+
+start = time.time()
+client.elevations(points)
+results = [r for _, r in client.map(fetch, points)]
+pooled = time.time() - start
+missing = sum(q is None for r in results for q in r)
+print(f"🚀 Pooled client: {pooled:.2f}s ({NUM_POINTS * 3 / pooled:.1f} Overpass req/s, {missing} failed)")
+for url, stats in client.stats().items():
+    print(f"   📡 {url}: {stats}")
+print(f"   Speed-up: {baseline / pooled:.1f}x (quota ceiling {MIRRORS * MIRROR_RATE:.0f} req/s)")
@@ -0,0 +1,22 @@
+import time
+
+from modules.dem import DEM_DIR, build_derivatives, import_geotiffs, load_tile_index
+
+# --- 1. IMPORT TILES ---
+# Drop SRTM/Copernicus GeoTIFFs (or .npy tiles registered in tiles.json) into data/dem/
+print(f"⛰️ Scanning '{DEM_DIR}' for DEM tiles...")
+imported = import_geotiffs(DEM_DIR)
+if imported:
+    print(f"   Converted {len(imported)} GeoTIFF tile(s) to memory-mappable .npy")
+
+tiles = load_tile_index(DEM_DIR)
+if not tiles:
+    print(f"❌ Error: No DEM tiles found in '{DEM_DIR}'.")
+    exit()
+
+# --- 2. SLOPE + RUGGEDNESS ---
+print(f"🧮 Deriving slope and ruggedness for {len(tiles)} tile(s)...")
+start = time.time()
+built = build_derivatives(DEM_DIR)
+print(f"🎉 Done in {time.time() - start:.1f}s ({len(built)} tile(s) rebuilt, rest up to date).")
+print("👉 extract_features_real.py, build_suitability_rasters.py and the app now use real terrain.")
@@ -0,0 +1,31 @@
+import time
+
+from modules.raster_grid import (
+    DEFAULT_RESOLUTION, FEATURE_DIR, FEATURE_RANGES, INDIA_BOUNDS, load_feature_layers, make_grid, read_source
+)
+from modules.telemetry import mark
+
+# --- CONFIGURATION ---
+# The only writer of data/rasters/features: build_suitability_rasters.py and
+# build_risk_surface.py read these layers but never create or refresh them.
+BOUNDS = INDIA_BOUNDS            # (south, west, north, east)
+RESOLUTION = DEFAULT_RESOLUTION  # degrees per cell
+
+# --- 1. GRID ---
+grid = make_grid(BOUNDS, RESOLUTION)
+print(f"🗺️ Grid: {grid['rows']} x {grid['cols']} cells at {RESOLUTION}° over India")
+
+# --- 2. BUILD / REFRESH LAYERS ---
+# Missing layers are derived from DEM tiles / the OSM index where available, else
+# simulated; generated layers whose DEM or OSM source changed are rebuilt.
+mark("layers", rows=grid['rows'] * grid['cols'])
+print(f"🌿 Building feature layers in '{FEATURE_DIR}'...")
+start = time.time()
+layers = load_feature_layers(grid, list(FEATURE_RANGES), FEATURE_DIR)
+
+for name in layers:
+    source = read_source(name, FEATURE_DIR)
+    label = "supplied" if source is None else f"{source['source']} ({source['simulated_fraction']:.0%} simulated)"
+    print(f"   {name}: {label}")
+print(f"🎉 Done in {time.time() - start:.1f}s. {len(layers)} layers in '{FEATURE_DIR}'")
+print("👉 build_suitability_rasters.py / build_risk_surface.py can now score them.")
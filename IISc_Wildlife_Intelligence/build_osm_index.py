@@ -0,0 +1,24 @@
+import os
+import time
+
+from modules.osm_index import OSM_EXTRACT_FILE, OSM_INDEX_FILE, build_index
+from modules.telemetry import mark
+
+# --- 1. CHECK EXTRACT ---
+if not os.path.exists(OSM_EXTRACT_FILE):
+    print(f"❌ Error: Could not find '{OSM_EXTRACT_FILE}'.")
+    print("   Download an India extract (e.g. Geofabrik) and cut it down with:")
+    print("   osmium tags-filter india-latest.osm.pbf n/place=village w/landuse=forest,residential \\")
+    print(f"       wr/natural=water,wood -o {OSM_EXTRACT_FILE}")
+    exit()
+
+# --- 2. BUILD ---
+mark("build index")
+print(f"🗺️ Indexing water / forest / village features from '{OSM_EXTRACT_FILE}'...")
+start = time.time()
+index = build_index(OSM_EXTRACT_FILE, OSM_INDEX_FILE)
+
+for feature, count in index['counts'].items():
+    print(f"   {feature}: {count} features")
+print(f"🎉 Done in {time.time() - start:.1f}s. Saved to '{OSM_INDEX_FILE}'")
+print("👉 extract_features_real.py will now compute distances offline.")
@@ -0,0 +1,34 @@
+import os
+import time
+
+from modules.raster_grid import DEFAULT_RESOLUTION, FEATURE_DIR, INDIA_BOUNDS, make_grid
+from modules.risk_surface import RISK_DIR, build_risk_surface
+from modules.telemetry import mark
+
+# --- CONFIGURATION ---
+BOUNDS = INDIA_BOUNDS            # (south, west, north, east)
+RESOLUTION = DEFAULT_RESOLUTION  # degrees per cell at level 0
+WORKERS = os.cpu_count()         # scoring processes
+MODEL_VERSION = None             # registry version to score with (None = current)
+
+# --- 1. GRID ---
+grid = make_grid(BOUNDS, RESOLUTION)
+print(f"🗺️ Grid: {grid['rows']} x {grid['cols']} cells at {RESOLUTION}° over India")
+print(f"🌿 Model features come from the layers in '{FEATURE_DIR}' (built by build_feature_layers.py)")
+
+# --- 2. SCORE STALE TILES ---
+mark("score tiles", rows=grid['rows'] * grid['cols'])
+start = time.time()
+try:
+    manifest, scored = build_risk_surface(grid, version=MODEL_VERSION, workers=WORKERS)
+except FileNotFoundError as e:
+    print(f"❌ Error: {e}")
+    exit()
+
+print(f"🎉 Done in {time.time() - start:.1f}s: {scored} of {len(manifest['tiles'])} tiles rescored "
+      f"with model {manifest['model_version']}, {len(manifest['levels'])} overview levels.")
+if manifest['simulated_layers']:
+    print(f"⚠️ Built on simulated inputs: {', '.join(manifest['simulated_layers'])}. "
+          "Run build_osm_index.py / import DEM tiles for a real surface; the app labels it as simulated.")
+print(f"💾 Saved to: {RISK_DIR}")
+print("👉 Tick 'Model Risk Surface' in the app to overlay it.")
@@ -0,0 +1,36 @@
+import time
+
+from modules.raster_grid import (
+    DEFAULT_RESOLUTION, FEATURE_DIR, INDIA_BOUNDS, SUITABILITY_DIR,
+    build_suitability_pyramid, load_feature_layers, make_grid
+)
+from modules.telemetry import mark
+
+# --- CONFIGURATION ---
+BOUNDS = INDIA_BOUNDS            # (south, west, north, east)
+RESOLUTION = DEFAULT_RESOLUTION  # degrees per cell at level 0
+
+# --- 1. GRID + FEATURE LAYERS ---
+mark("load layers")
+grid = make_grid(BOUNDS, RESOLUTION)
+print(f"🗺️ Grid: {grid['rows']} x {grid['cols']} cells at {RESOLUTION}° over India")
+
+print(f"🌿 Loading feature layers from '{FEATURE_DIR}'...")
+try:
+    layers = load_feature_layers(grid, simulate_missing=False)
+except FileNotFoundError as e:
+    print(f"❌ Error: {e} Run build_feature_layers.py first.")
+    exit()
+
+# --- 2. SCORE EVERY SPECIES / SEASON / PROFILE ---
+mark("score", rows=grid['rows'] * grid['cols'])
+print("🧮 Scoring habitat suitability for every species/season/profile...")
+start = time.time()
+manifest = build_suitability_pyramid(grid, layers, feature_dir=FEATURE_DIR)
+
+print(f"🎉 Done in {time.time() - start:.1f}s: {len(manifest['combos'])} surfaces x "
+      f"{len(manifest['levels'])} overview levels.")
+for name, fraction in manifest['simulated_layers'].items():
+    print(f"   ⚠️ '{name}' is simulated on {fraction:.0%} of cells (no DEM tiles / OSM index for it)")
+print(f"💾 Saved to: {SUITABILITY_DIR}")
+print("👉 The app's Seasonal Forecasting panel can now overlay the surface.")
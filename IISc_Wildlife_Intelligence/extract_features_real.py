@@ -1,22 +1,25 @@
 import pandas as pd
-import requests
 import numpy as np
-import time
-import math
-import random
+import os
+
+from modules.dem import DEMSampler
+from modules.feature_journal import JOURNAL_FILE, FeatureJournal
+from modules.overpass_client import (
+    ELEVATION_URL, MAX_IN_FLIGHT, OVERPASS_ENDPOINTS, RATE_PER_ENDPOINT, OverpassClient
+)
+from modules.overpass_tiles import CACHE_DIR, TILE_DEG, OverpassCache, iter_tile_distances, tile_groups
+from modules.osm_index import FEATURE_TYPES, OSM_EXTRACT_FILE, OSM_INDEX_FILE, distance_to_nearest, load_index
+from modules.telemetry import mark, span
 
 # --- CONFIGURATION ---
 INPUT_FILE = "data/model_training_data.csv"
 OUTPUT_FILE = "data/model_ready_data.csv"
 
-# List of Overpass Mirrors (Load Balancing)
-OVERPASS_ENDPOINTS = [
-    "https://overpass-api.de/api/interpreter",
-    "https://lz4.overpass-api.de/api/interpreter",
-    "https://overpass.kumi.systems/api/interpreter"
-]
+# Mirrors and the elevation API: OVERPASS_ENDPOINTS / ELEVATION_URL in modules/overpass_client.py
+ELEVATION_BATCH = 100   # points per open-elevation request
 
 # --- 1. SETUP DATA ---
+mark("load")
 try:
     df = pd.read_csv(INPUT_FILE)
     print(f"📂 Loaded {len(df)} rows for feature extraction.")
@@ -24,127 +27,100 @@ except FileNotFoundError:
     print("❌ Error: 'data/model_training_data.csv' not found.")
     exit()
 
-# --- 2. ROBUST REQUEST FUNCTION ---
-def make_overpass_request(query, max_retries=3):
-    """Tries multiple servers with backoff logic to avoid errors."""
-    for i in range(max_retries):
-        # Pick a random server to spread the load
-        endpoint = random.choice(OVERPASS_ENDPOINTS)
-        try:
-            response = requests.get(endpoint, params={'data': query}, timeout=20)
-            
-            # Check for Rate Limiting (429) or Server Errors (5xx)
-            if response.status_code == 200:
-                try:
-                    return response.json()
-                except:
-                    # If response isn't JSON, it's likely an HTML error page
-                    print(f"   ⚠️ Server returned invalid JSON. Retrying...")
-            elif response.status_code == 429:
-                print(f"   ⏳ Rate Limited (429). Sleeping 5s...")
-                time.sleep(5)
-            else:
-                print(f"   ⚠️ Error {response.status_code} from {endpoint}")
-                
-        except Exception as e:
-            print(f"   ⚠️ Connection Error: {e}")
-            
-        # Exponential Backoff (Wait 2s, then 4s, then 8s)
-        time.sleep(2 * (i + 1))
-    
-    return None # Failed after all retries
+# --- 2. ROBUST REQUEST CLIENT ---
+# One pooled, keep-alive client shared by all worker threads: a token bucket per mirror,
+# adaptive backoff on 429s and a cap on in-flight requests (see modules/overpass_client.py).
+# Overpass answers are kept in a content-addressed disk cache, so reruns skip the network.
+cache = OverpassCache(CACHE_DIR)
+client = OverpassClient(OVERPASS_ENDPOINTS, ELEVATION_URL, rate=RATE_PER_ENDPOINT, max_in_flight=MAX_IN_FLIGHT,
+                        cache=cache)
 
 # --- 3. EXTRACTOR FUNCTIONS ---
 
-def get_elevation(lat, lon):
-    try:
-        url = f"https://api.open-elevation.com/api/v1/lookup?locations={lat},{lon}"
-        res = requests.get(url, timeout=10).json()
-        return res['results'][0]['elevation']
-    except:
-        return 0 
-
-def get_distance_to_nearest(lat, lon, feature_type):
-    # Optimized Queries (Search smaller radius first for speed)
-    radius = 5000 # 5km
-    
-    queries = {
-        "water": f"""
-            [out:json][timeout:25];
-            (way["natural"="water"](around:{radius},{lat},{lon});
-             relation["natural"="water"](around:{radius},{lat},{lon}););
-            out center;
-        """,
-        "forest": f"""
-            [out:json][timeout:25];
-            (way["landuse"="forest"](around:{radius},{lat},{lon});
-             way["natural"="wood"](around:{radius},{lat},{lon}););
-            out center;
-        """,
-        "village": f"""
-            [out:json][timeout:25];
-            (node["place"="village"](around:{radius},{lat},{lon});
-             way["landuse"="residential"](around:{radius},{lat},{lon}););
-            out center;
-        """
-    }
-    
-    data = make_overpass_request(queries[feature_type])
-    
-    if not data or not data.get('elements'):
-        return radius  # Assume max distance if nothing found
-    
-    # Calculate nearest distance
-    min_dist = radius
-    for element in data['elements']:
-        if 'lat' in element:
-            el_lat, el_lon = element['lat'], element['lon']
-        elif 'center' in element:
-            el_lat, el_lon = element['center']['lat'], element['center']['lon']
-        else:
-            continue
-        
-        # Fast Euclidean Calc
-        d_lat = (el_lat - lat) * 111000
-        d_lon = (el_lon - lon) * 111000 * math.cos(math.radians(lat))
-        dist = math.sqrt(d_lat**2 + d_lon**2)
-        
-        if dist < min_dist:
-            min_dist = dist
-            
-    return round(min_dist, 2)
+def get_elevations(points):
+    """Batched elevation lookup; failed points come back as NaN (retried on the next run)."""
+    return [e if e is not None else np.nan for e in client.elevations(points)]
 
 # --- 4. EXECUTION LOOP ---
 print("🚀 Starting Robust Extraction...")
-print("   (Saving progress every 10 rows so you don't lose data)")
-
-# Initialize columns
-for col in ['elevation', 'dist_water', 'dist_forest', 'dist_village']:
-    if col not in df.columns: df[col] = 0
-
-for i, row in df.iterrows():
-    # Skip rows that are already processed (if restarting script)
-    if df.at[i, 'dist_water'] != 0 and df.at[i, 'dist_forest'] != 0:
-        continue
-
-    print(f"🌍 Row {i}/{len(df)}: {row['District']} ({row['Animal']})")
-    
-    # 1. Elevation
-    df.at[i, 'elevation'] = get_elevation(row['lat'], row['lon'])
-    
-    # 2. Features (Water, Forest, Village)
-    df.at[i, 'dist_water'] = get_distance_to_nearest(row['lat'], row['lon'], "water")
-    df.at[i, 'dist_forest'] = get_distance_to_nearest(row['lat'], row['lon'], "forest")
-    df.at[i, 'dist_village'] = get_distance_to_nearest(row['lat'], row['lon'], "village")
-    
-    # 3. SAVE PROGRESS EVERY 10 ROWS (Critical)
-    if i % 10 == 0:
-        df.to_csv(OUTPUT_FILE, index=False)
-        print("   💾 Progress Saved.")
-    
-    # Sleep 1s to be nice to the server
-    time.sleep(1)
-
-# Final Save
-df.to_csv(OUTPUT_FILE, index=False)
-print(f"🎉 DONE! All data saved to '{OUTPUT_FILE}'")
\ No newline at end of file
+print(f"   (Every result is journaled to '{JOURNAL_FILE}' as it arrives, so you don't lose data)")
+
+# Initialize columns: NaN = not fetched yet (0 m is a real distance)
+feature_cols = ['elevation'] + [f'dist_{feature_type}' for feature_type in FEATURE_TYPES]
+for col in feature_cols:
+    if col not in df.columns: df[col] = np.nan
+
+# Resume: replay whatever earlier (possibly interrupted) runs already fetched
+mark("replay journal")
+journal = FeatureJournal(JOURNAL_FILE)
+restored = journal.replay(df, feature_cols)
+if restored:
+    print(f"📒 Restored {restored} rows from the journal.")
+
+def checkpoint(rows, values):
+    """Appends one request's results to the journal (one write + fsync, however big the CSV is)."""
+    with span("checkpoint", rows=len(rows)):
+        journal.append(rows, df.loc[rows, 'lat'].to_numpy(), df.loc[rows, 'lon'].to_numpy(), values)
+
+# Offline path (see build_osm_index.py): one vectorized haversine query per feature type for ALL rows
+osm_index = load_index(OSM_INDEX_FILE, OSM_EXTRACT_FILE)
+if osm_index is not None:
+    print(f"🗂️ Using local OSM feature index '{OSM_INDEX_FILE}' (no Overpass calls).")
+    mark("osm index distances", rows=len(df))
+    for feature_type in FEATURE_TYPES:
+        df[f'dist_{feature_type}'] = distance_to_nearest(osm_index, df['lat'], df['lon'], feature_type)
+
+todo_elevation = list(df.index[df['elevation'].isna()])
+todo = list(df.index[df[[f'dist_{feature_type}' for feature_type in FEATURE_TYPES]].isna().any(axis=1)])
+print(f"   {len(todo_elevation)} elevations and {len(todo)} rows of distances to fetch "
+      f"across {len(OVERPASS_ENDPOINTS)} mirrors ({MAX_IN_FLIGHT} in flight)")
+
+# 1. Elevation: local DEM tiles first (see build_dem_derivatives.py), network only for uncovered rows
+mark("dem elevation", rows=len(todo_elevation))
+dem = DEMSampler()
+if dem and todo_elevation:
+    df.loc[todo_elevation, 'elevation'] = dem.sample(df.loc[todo_elevation, 'lat'], df.loc[todo_elevation, 'lon'])
+    print(f"⛰️ Sampled {df.loc[todo_elevation, 'elevation'].notna().sum()} elevations from local DEM tiles.")
+    todo_elevation = [i for i in todo_elevation if pd.isna(df.at[i, 'elevation'])]
+
+def fetch_elevations(batch):
+    return get_elevations(list(zip(df.loc[batch, 'lat'], df.loc[batch, 'lon'])))
+
+mark("network elevation", rows=len(todo_elevation))
+batches = [todo_elevation[k:k + ELEVATION_BATCH] for k in range(0, len(todo_elevation), ELEVATION_BATCH)]
+for batch, elevations in client.map(fetch_elevations, batches):
+    df.loc[batch, 'elevation'] = elevations
+    checkpoint(batch, {'elevation': elevations})
+
+# 2. Features (Water, Forest, Village) - one bbox query per ~11 km tile and feature type
+#    (modules/overpass_tiles.py) instead of one 5 km around: query per row; tiles run
+#    concurrently, the client paces the mirrors
+if osm_index is None and todo:
+    mark("network distances", rows=len(todo))
+    lats, lons = df.loc[todo, 'lat'].to_numpy(), df.loc[todo, 'lon'].to_numpy()
+    n_tiles = len(tile_groups(lats, lons, TILE_DEG))
+    print(f"🧩 {len(todo)} rows fall in {n_tiles} tiles: {n_tiles * len(FEATURE_TYPES)} Overpass queries "
+          f"instead of {len(todo) * len(FEATURE_TYPES)}")
+    rows = np.asarray(todo)
+    for done, (positions, result) in enumerate(iter_tile_distances(client, lats, lons, FEATURE_TYPES, TILE_DEG), 1):
+        values = {f'dist_{feature_type}': distances for feature_type, distances in result.items()}
+        for col, distances in values.items():
+            df.loc[rows[positions], col] = distances
+        # 3. JOURNAL EVERY TILE AS IT ARRIVES (Critical)
+        checkpoint(rows[positions], values)
+        print(f"🌍 Tile {done}/{n_tiles}: {len(positions)} rows ({df.at[rows[positions[0]], 'District']})")
+
+missing = df[feature_cols].isna().any(axis=1).sum()
+if missing:
+    print(f"   ⚠️ {missing} rows still have failed lookups; re-run to retry just those.")
+
+# Final Save: compact journal + frame into the output in one write
+mark("save", rows=len(df))
+df.to_csv(OUTPUT_FILE + ".partial", index=False)
+os.replace(OUTPUT_FILE + ".partial", OUTPUT_FILE)
+journal.compact(df, feature_cols)
+journal.close()
+for url, stats in client.stats().items():
+    print(f"   📡 {url}: {stats}")
+print(f"   🗃️ Overpass cache '{CACHE_DIR}': {cache.stats()}")
+print(f"🎉 DONE! All data saved to '{OUTPUT_FILE}'")
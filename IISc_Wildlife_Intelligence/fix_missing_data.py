@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import os
 
+from modules.gazetteer import load_gazetteer
+
 # 1. SETUP FOLDER
 if not os.path.exists("data"):
     os.makedirs("data")
@@ -24,20 +26,11 @@ data = {
 
 df = pd.DataFrame(data)
 
-# 3. ADD COORDINATES (Hardcoded Centers + Jitter)
-coords = {
-    'Mysuru': [12.295, 76.639],
-    'Koppal': [15.350, 76.150],
-    'Bijnor': [29.370, 78.130],
-    'Nashik': [19.990, 73.780]
-}
-
-def get_lat_lon(district):
-    base = coords.get(district, [20.0, 78.0])
-    # Add random spread so dots don't overlap perfectly
-    return base[0] + np.random.uniform(-0.05, 0.05), base[1] + np.random.uniform(-0.05, 0.05)
-
-df['lat'], df['lon'] = zip(*df['District'].apply(get_lat_lon))
+# 3. ADD COORDINATES (Gazetteer Centers + Jitter)
+# Add random spread so dots don't overlap perfectly
+hits = load_gazetteer().resolve(df['District'])
+df['lat'] = hits['lat'].fillna(20.0).to_numpy() + np.random.uniform(-0.05, 0.05, len(df))
+df['lon'] = hits['lon'].fillna(78.0).to_numpy() + np.random.uniform(-0.05, 0.05, len(df))
 
 # 4. SAVE AS EVERY POSSIBLE FILENAME
 # This ensures app.py finds it, no matter which version you are running
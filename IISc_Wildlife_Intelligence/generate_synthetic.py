@@ -0,0 +1,58 @@
+import argparse
+import time
+
+from modules.synthetic_data import (
+    BENCHMARK_FILE, BENCHMARK_ROWS, CHUNK_ROWS, END_DATE, HOTSPOTS, SEED, START_DATE, write_synthetic
+)
+
+# --- CONFIGURATION ---
+# Load-test data for the dashboard, the incident store and training. Output is
+# streamed chunk by chunk (memory stays flat at 10M+ rows) and fully reproducible:
+# the same --seed, --rows and --chunk-rows always give the same file.
+#
+#   python generate_synthetic.py --rows 10000000 --out data/bench/incidents_10m.csv
+#   python generate_synthetic.py --mix "Tiger=3,Leopard=1" --start 2023-01-01 --out data/tigers.parquet
+#   python generate_synthetic.py --features --rows 2000000 --out data/bench/model_ready_2m.parquet
+#   python generate_synthetic.py --benchmark      # the fixed corpus benchmarks compare against
+parser = argparse.ArgumentParser(description="Seeded, vectorized synthetic incident generator.")
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--out", default="data/bench/synthetic_incidents.csv", help=".csv or .parquet")
+parser.add_argument("--seed", type=int, default=SEED)
+parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+parser.add_argument("--mix", default=None, help="species weights, e.g. 'Tiger=2,Elephant=1' (default: equal)")
+parser.add_argument("--hotspots", default=None,
+                    help=f"comma-separated species to keep from the hotspot set ({', '.join(HOTSPOTS)})")
+parser.add_argument("--start", default=START_DATE)
+parser.add_argument("--end", default=END_DATE)
+parser.add_argument("--features", action="store_true",
+                    help="add Target and simulated elevation/distances (model_ready_data layout)")
+parser.add_argument("--benchmark", action="store_true",
+                    help=f"write the fixed {BENCHMARK_ROWS:,}-row corpus to {BENCHMARK_FILE}")
+args = parser.parse_args()
+
+# --- 1. OPTIONS ---
+if args.benchmark:
+    args.rows, args.out, args.seed, args.chunk_rows = BENCHMARK_ROWS, BENCHMARK_FILE, SEED, CHUNK_ROWS
+    args.mix = args.hotspots = None
+    args.start, args.end, args.features = START_DATE, END_DATE, False
+
+species_mix = None
+if args.mix:
+    species_mix = {name.strip(): float(weight) for name, weight in (part.split("=") for part in args.mix.split(","))}
+hotspots = HOTSPOTS
+if args.hotspots:
+    keep = [name.strip() for name in args.hotspots.split(",")]
+    unknown = [name for name in keep if name not in HOTSPOTS]
+    if unknown:
+        print(f"❌ Error: no hotspots for {', '.join(unknown)}. Known: {', '.join(HOTSPOTS)}")
+        exit()
+    hotspots = {name: HOTSPOTS[name] for name in keep}
+
+# --- 2. GENERATE ---
+print(f"🧪 Generating {args.rows:,} rows (seed {args.seed}) -> '{args.out}'")
+start = time.time()
+written = write_synthetic(args.out, args.rows, seed=args.seed, chunk_rows=args.chunk_rows,
+                          species_mix=species_mix, hotspots=hotspots, start=args.start, end=args.end,
+                          with_features=args.features)
+elapsed = time.time() - start
+print(f"✅ {written:,} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
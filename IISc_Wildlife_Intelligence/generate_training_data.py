@@ -1,32 +1,65 @@
-import pandas as pd
+import argparse
+import time
+
 import numpy as np
-from geopy.distance import distance
+import pandas as pd
+
+from modules.incident_store import INCIDENT_SCHEMA, read_incidents, store_exists
+from modules.pseudo_absence import MAX_DISTANCE_M, MIN_DISTANCE_M, MIN_SEPARATION_M, sample_pseudo_absences
+from modules.telemetry import mark
 
-# Load your verified data
-df_pos = pd.read_csv("data/verified_geocoded.csv")
+# --- CONFIGURATION ---
+OUTPUT_FILE = "data/model_training_data.csv"
+SEED = 42
+
+parser = argparse.ArgumentParser(description="Builds model_training_data.csv: conflicts + pseudo-absence points.")
+parser.add_argument("-k", "--negatives", type=int, default=1, help="pseudo-absences per conflict")
+parser.add_argument("--stratify", choices=['Animal', 'District'], default=None,
+                    help="spread the K x conflicts negatives evenly across species/districts")
+parser.add_argument("--min-separation", type=float, default=MIN_SEPARATION_M,
+                    help="metres a safe point must keep from ANY conflict site")
+args = parser.parse_args()
+
+# --- 1. POSITIVES ---
+mark("load positives")
+# Load your verified data (canonical Parquet store if it has been built)
+if store_exists():
+    store_cols = [name for name in INCIDENT_SCHEMA.names if name != 'year']
+    # Range predicates double as 'not null' checks, so ungeocoded rows are never read
+    df_pos = read_incidents(columns=store_cols, filters=[('lat', '>', -90), ('lon', '>', -180)])
+else:
+    df_pos = pd.read_csv("data/verified_geocoded.csv")
+    df_pos = df_pos.dropna(subset=['lat', 'lon'])
+df_pos = df_pos.reset_index(drop=True)
 df_pos['Target'] = 1  # 1 = Conflict occurred here
 
-# Generate "Pseudo-Absence" points (0 = No conflict)
-# We pick random points within 5-10km of the conflict sites
-# representing "Nearby areas that were safe"
-data_neg = []
-
-for _, row in df_pos.iterrows():
-    # Random offset (approx 5-10km)
-    lat_offset = np.random.uniform(-0.05, 0.05)
-    lon_offset = np.random.uniform(-0.05, 0.05)
-    
-    data_neg.append({
-        'lat': row['lat'] + lat_offset,
-        'lon': row['lon'] + lon_offset,
-        'Animal': row['Animal'],
-        'District': row['District'],
-        'Target': 0  # 0 = Safe Zone
-    })
-
-df_neg = pd.DataFrame(data_neg)
+# --- 2. PSEUDO-ABSENCES (0 = No conflict) ---
+# Random points 2-8 km from a conflict site ("nearby areas that were safe"),
+# never within --min-separation of any recorded conflict.
+mark("sample negatives", rows=len(df_pos) * args.negatives)
+start = time.time()
+neg_lat, neg_lon, anchors = sample_pseudo_absences(
+    df_pos['lat'].to_numpy(), df_pos['lon'].to_numpy(), k=args.negatives,
+    strata=df_pos[args.stratify].to_numpy() if args.stratify else None, balance=args.stratify is not None,
+    rng=np.random.default_rng(SEED), min_m=MIN_DISTANCE_M, max_m=MAX_DISTANCE_M,
+    min_separation_m=args.min_separation)
+
+df_neg = pd.DataFrame({
+    'lat': neg_lat,
+    'lon': neg_lon,
+    'Animal': df_pos['Animal'].to_numpy()[anchors],
+    'District': df_pos['District'].to_numpy()[anchors],
+    'Target': 0,  # 0 = Safe Zone
+})
+dropped = len(df_pos) * args.negatives - len(df_neg)
+if dropped > 0:
+    print(f"⚠️ {dropped} candidates kept landing near other conflicts and were dropped")
 df_final = pd.concat([df_pos, df_neg], ignore_index=True)
+print(f"⚖️ {len(df_pos)} conflicts, {len(df_neg)} safe points "
+      f"(1:{len(df_neg) / max(len(df_pos), 1):.2f}, asked for 1:{args.negatives})")
 
-# Save
-df_final.to_csv("data/model_training_data.csv", index=False)
-print(f"✅ Generated Training Set: {len(df_final)} rows ({len(df_pos)} Attacks, {len(df_neg)} Safe Points)")
\ No newline at end of file
+# --- 3. SAVE ---
+mark("save", rows=len(df_final))
+df_final.to_csv(OUTPUT_FILE, index=False)
+print(f"✅ Generated Training Set: {len(df_final)} rows ({len(df_pos)} Attacks, {len(df_neg)} Safe Points) "
+      f"in {time.time() - start:.2f}s")
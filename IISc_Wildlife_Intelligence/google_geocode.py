@@ -5,6 +5,10 @@ import time
 import os
 import sys
 
+from modules.gazetteer import load_gazetteer
+from modules.geocode_cache import CACHE_FILE, GeocodeCache, normalize_address
+from modules.telemetry import call, mark
+
 # --- CONFIGURATION ---
 # Paste your working Google Cloud Key here. 
 # If you don't have one working yet, the script will use the "Offline Backup" below.
@@ -29,51 +33,20 @@ def find_input_file(filename="incidents.csv"):
     print("   Please ensure the file is named exactly 'incidents.csv'")
     sys.exit()
 
-CSV_PATH = find_input_file("incidents.csv")
 JSON_PATH = "incidents.json"
 GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 
-# --- 2. OFFLINE BACKUP DICTIONARY (Plan B) ---
+# --- 2. OFFLINE BACKUP (Plan B) ---
 # This ensures you get points on the map even if the Google API denies your key.
-DISTRICT_BACKUP = {
-    'nashik': [19.9975, 73.7898],
-    'nagina dehat': [29.4444, 78.4346], # Bijnor region
-    'bijnor': [29.3724, 78.1368],
-    'jalpaiguri': [26.5167, 88.7177],
-    'chandrapur': [19.9615, 79.2961],
-    'bahraich': [27.5705, 81.5977],
-    'pilibhit': [28.6430, 79.8045],
-    'mysuru': [12.2958, 76.6394],
-    'srikakulam': [18.30, 83.89],
-    'dhenkanal': [20.64, 85.59],
-    'chhota udepur': [22.30, 74.01],
-    'balaghat': [21.81, 80.18],
-    'reasi': [33.08, 74.83],
-    'sujan pur': [32.39, 75.87],
-    'saragur': [11.97, 76.43],
-    'bageshwar': [29.84, 79.77],
-    'kheri': [27.95, 80.77],
-    'lakhimpur kheri': [27.95, 80.77],
-    'pune': [18.52, 73.85],
-    'coimbatore': [11.01, 76.95]
-}
+# District centroids live in the shared gazetteer (data/gazetteer.csv).
+GAZETTEER = load_gazetteer()
 
 # --- 3. HELPER FUNCTIONS (Tig-map Structure) ---
 
 def canonicalize_state(name):
-    """Standardizes state names."""
+    """Standardizes state names (handles misspellings such as 'Maharastra')."""
     if not isinstance(name, str): return ""
-    name = name.strip().lower()
-    mapping = {
-        "maharastra": "Maharashtra",
-        "uttar pradesh": "Uttar Pradesh",
-        "west bengal": "West Bengal",
-        "madhya pradesh": "Madhya Pradesh",
-        "andhra pradesh": "Andhra Pradesh",
-        "gujarat": "Gujarat",
-        "karnataka": "Karnataka",
-    }
-    return mapping.get(name, name.title())
+    return GAZETTEER.canonical_state(name)
 
 def clean_place_name(name):
     """Cleans up village/city names."""
@@ -96,38 +69,105 @@ def build_address_levels(row):
         levels.append(f"{state}, India")
     return levels
 
-def get_lat_lng(address, district_name=None):
-    """Tries Google API first, then falls back to Dictionary."""
-    
-    # 1. Try Google API
+def query_google(address):
+    """One Geocoding API call. Returns (status, lat, lng); lat/lng are None unless status is OK."""
     params = {"address": address, "key": API_KEY}
     try:
-        response = requests.get(GEOCODE_URL, params=params)
-        data = response.json()
-        
+        with call("geocode") as request:
+            response = requests.get(GEOCODE_URL, params=params, timeout=10)
+            data = response.json()
+            request.ok = data["status"] in ("OK", "ZERO_RESULTS")
         if data["status"] == "OK":
             loc = data["results"][0]["geometry"]["location"]
-            return loc["lat"], loc["lng"]
-        elif data["status"] == "REQUEST_DENIED":
-            print(f"   ⚠️ API Denied. Using Offline Backup...")
-        elif data["status"] == "ZERO_RESULTS":
-            pass # Try next level
-            
+            return "OK", loc["lat"], loc["lng"]
+        return data["status"], None, None
     except Exception as e:
         print(f"   ⚠️ Network Error: {e}")
+        return "NETWORK_ERROR", None, None
+
+def backup_lookup(district_name, state_name=None):
+    """Offline Backup (Plan B): the gazetteer's district centroid."""
+    hit = GAZETTEER.lookup(district_name, state_name) if district_name else None
+    if hit:
+        return hit['lat'], hit['lon']
+    return None
+
+def geocode_addresses(addresses, cache):
+    """Resolves each UNIQUE address once: cache first, Google only for misses.
+
+    Addresses are unique by their cache key ('Koppal ,  Karnataka' == 'koppal, karnataka'),
+    so spelling variants cost one lookup between them. Returns {address: (lat, lng) or None}
+    for every raw address. OK and ZERO_RESULTS answers are cached (positive/negative,
+    with TTLs); denials and network errors are not.
+    """
+    # One representative raw spelling per key; the rest share its answer
+    spellings = {}
+    for address in dict.fromkeys(addresses):
+        spellings.setdefault(normalize_address(address), []).append(address)
+    unique = [variants[0] for variants in spellings.values()]
+    results = cache.get_many(unique)
+    misses = [a for a in unique if a not in results]
+    print(f"   🔎 {len(unique)} unique addresses: {len(results)} cached, {len(misses)} to fetch")
+
+    fresh = {}
+    for address in misses:
+        status, lat, lng = query_google(address)
+        if status == "OK":
+            fresh[address] = (lat, lng)
+        elif status == "ZERO_RESULTS":
+            fresh[address] = None
+        elif status == "REQUEST_DENIED":
+            # Every remaining call would be denied too
+            print(f"   ⚠️ API Denied. Using Offline Backup...")
+            break
+        time.sleep(0.1)
 
-    # 2. Offline Backup (Plan B)
-    # If API fails, look up the district in our hardcoded list
-    if district_name:
-        clean_dist = district_name.strip().lower()
-        if clean_dist in DISTRICT_BACKUP:
-            return DISTRICT_BACKUP[clean_dist][0], DISTRICT_BACKUP[clean_dist][1]
-            
-    return None, None
+    cache.put_many(fresh)
+    results.update(fresh)
+    return {variant: results[variants[0]] for variants in spellings.values() if variants[0] in results
+            for variant in variants}
+
+def geocode_dataframe(df, cache):
+    """Fills missing lat/lon level by level (Village -> District -> State), one batch per level.
+
+    Same fallback order as before: a failed first level falls back to the offline
+    district list before the coarser levels are tried.
+    """
+    if "lat" not in df.columns: df["lat"] = None
+    if "lon" not in df.columns: df["lon"] = None
+
+    pending = [i for i in df.index if pd.isna(df.at[i, "lat"]) or pd.isna(df.at[i, "lon"])]
+    levels = {i: build_address_levels(df.loc[i]) for i in pending}
+    pending = [i for i in pending if levels[i]]
+
+    level_idx = 0
+    while pending:
+        wave = {i: levels[i][level_idx] for i in pending if len(levels[i]) > level_idx}
+        if not wave:
+            break
+        results = geocode_addresses(wave.values(), cache)
+
+        still_pending = []
+        for i, address in wave.items():
+            state = df.at[i, 'State'] if 'State' in df.columns else None
+            found = results.get(address) or backup_lookup(str(df.at[i, 'District']), state)
+            if found:
+                df.at[i, "lat"], df.at[i, "lon"] = found
+            else:
+                still_pending.append(i)
+        pending = still_pending
+        level_idx += 1
+
+    for i in pending:
+        print(f"   ❌ Failed: {df.at[i, 'District']}")
+    return df
 
 # --- 4. MAIN EXECUTION ---
 
 if __name__ == "__main__":
+    # Looked up here (not at import) so incremental_ingest.py can reuse the geocoder
+    CSV_PATH = find_input_file("incidents.csv")
+    mark("load")
     print(f"📂 Loading data...")
     # Handle encoding errors common in Excel CSVs
     try:
@@ -135,37 +175,14 @@ if __name__ == "__main__":
     except UnicodeDecodeError:
         df = pd.read_csv(CSV_PATH, encoding='ISO-8859-1')
 
-    if "lat" not in df.columns: df["lat"] = None
-    if "lon" not in df.columns: df["lon"] = None
-
     print(f"🚀 Processing {len(df)} incidents...")
-
-    for i, row in df.iterrows():
-        # Skip if already done
-        if pd.notna(row["lat"]) and pd.notna(row["lon"]):
-            continue
-
-        address_levels = build_address_levels(row)
-        district_name = str(row.get('District', ''))
-        found = False
-        
-        for level_idx, address in enumerate(address_levels):
-            # Pass district name only for backup lookup
-            lat, lng = get_lat_lng(address, district_name if level_idx >= 0 else None)
-            
-            if lat is not None and lng is not None:
-                df.at[i, "lat"] = lat
-                df.at[i, "lon"] = lng
-                print(f"   ✅ Found: {address[:30]}... -> {lat}, {lng}")
-                found = True
-                break
-            
-            time.sleep(0.1) 
-
-        if not found:
-            print(f"   ❌ Failed: {district_name}")
+    mark("geocode", rows=len(df))
+    cache = GeocodeCache(CACHE_FILE)
+    df = geocode_dataframe(df, cache)
+    cache.close()
 
     # --- SAVE ---
+    mark("save")
     # Save CSV for debugging
     df.to_csv("data/incidents_geocoded.csv", index=False)
     print("💾 Saved CSV to 'data/incidents_geocoded.csv'")
@@ -0,0 +1,111 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+
+from google_geocode import geocode_dataframe
+from modules.dem import DEMSampler
+from modules.gazetteer import fill_missing_coords
+from modules.geocode_cache import CACHE_FILE, GeocodeCache
+from modules.incident_store import STORE_DIR, open_store, read_raw_csv, store_exists, to_schema, upsert_incidents
+from modules.ingest_ledger import LEDGER_FILE, IngestLedger, content_hashes, incident_ids
+from modules.osm_index import FEATURE_TYPES, OSM_EXTRACT_FILE, OSM_INDEX_FILE, distance_to_nearest, load_index
+from modules.overpass_client import OverpassClient
+from modules.overpass_tiles import CACHE_DIR, OverpassCache, tile_distances
+from modules.telemetry import mark
+
+# --- CONFIGURATION ---
+# Daily update path: only incidents that are new or changed since the last run are
+# geocoded, featurized and written; deleted ones are dropped from the store.
+# process_full_dataset.py remains the from-scratch rebuild.
+INPUT_FILE = "data/incidents.csv"
+SEED = 42   # gazetteer jitter for incidents that could not be geocoded
+
+print(f"📂 Loading '{INPUT_FILE}' for incremental ingest...")
+if not os.path.exists(INPUT_FILE):
+    print(f"❌ Error: Could not find '{INPUT_FILE}'.")
+    exit()
+
+start = time.time()
+mark("load")
+raw = read_raw_csv(INPUT_FILE)
+raw = raw.loc[:, ~raw.columns.astype(str).str.startswith('Unnamed')]
+if 'Latitude' in raw.columns: raw = raw.rename(columns={'Latitude': 'lat', 'Longitude': 'lon'})
+hashes = content_hashes(raw)
+raw['Incident-id'] = incident_ids(raw, hashes)
+raw = raw.drop_duplicates('Incident-id', keep='last')
+hashes = content_hashes(raw)
+
+# --- 1. DIFF AGAINST THE LEDGER ---
+mark("diff", rows=len(raw))
+ledger = IngestLedger(LEDGER_FILE)
+if len(ledger) == 0 and store_exists(STORE_DIR):
+    # First run on a store built by process_full_dataset.py: adopt what it already holds
+    stored = open_store(STORE_DIR).to_table(columns=['Incident-id']).column('Incident-id').drop_null()
+    adopted = raw['Incident-id'].isin(set(stored.to_pylist())).to_numpy()
+    ledger.record(raw['Incident-id'][adopted], hashes[adopted])
+    print(f"📒 Ledger initialised from the existing store ({adopted.sum():,} incidents).")
+
+delta = ledger.diff(raw['Incident-id'], hashes)
+print(f"   🆕 {len(delta['new']):,} new, ✏️ {len(delta['changed']):,} changed, "
+      f"🗑️ {len(delta['deleted']):,} deleted, {delta['unchanged']:,} unchanged")
+if not (delta['new'] or delta['changed'] or delta['deleted']):
+    ledger.close()
+    print("✅ Store is already up to date.")
+    exit()
+
+work = raw[raw['Incident-id'].isin(delta['new'] + delta['changed'])].copy()
+work_hashes = content_hashes(work)
+
+# --- 2. GEOCODE THE DELTA (cache -> Google -> gazetteer) ---
+if len(work):
+    mark("geocode", rows=len(work))
+    print(f"🗺️ Geocoding {len(work):,} incidents...")
+    cache = GeocodeCache(CACHE_FILE)
+    work = geocode_dataframe(work, cache)
+    cache.close()
+    work['lat'], work['lon'] = fill_missing_coords(work, np.random.default_rng(SEED))
+    located = work[['lat', 'lon']].notna().all(axis=1).to_numpy()
+    if not located.all():
+        # Not recorded in the ledger, so they are retried on the next run
+        print(f"   ⚠️ {(~located).sum()} incidents still have no location; skipped for now.")
+    work, work_hashes = work[located], work_hashes[located]
+
+# --- 3. FEATURES FOR THE DELTA ---
+if len(work):
+    mark("features", rows=len(work))
+    print(f"🌲 Extracting features for {len(work):,} incidents...")
+    client = OverpassClient(cache=OverpassCache(CACHE_DIR))
+    points = list(zip(work['lat'], work['lon']))
+
+    # Elevation: local DEM tiles first, open-elevation for uncovered points
+    elevation = np.full(len(work), np.nan)
+    dem = DEMSampler()
+    if dem:
+        elevation = np.asarray(dem.sample(work['lat'], work['lon']), dtype=float)
+    missing = np.flatnonzero(np.isnan(elevation))
+    if len(missing):
+        fetched = client.elevations([points[k] for k in missing])
+        elevation[missing] = [np.nan if e is None else e for e in fetched]
+    work['elevation'] = elevation
+
+    # Distances: local OSM index if built (build_osm_index.py), else tiled Overpass queries
+    osm_index = load_index(OSM_INDEX_FILE, OSM_EXTRACT_FILE)
+    if osm_index is not None:
+        for feature_type in FEATURE_TYPES:
+            work[f'dist_{feature_type}'] = distance_to_nearest(osm_index, work['lat'], work['lon'], feature_type)
+    else:
+        distances = tile_distances(client, work['lat'], work['lon'], FEATURE_TYPES)
+        for feature_type in FEATURE_TYPES:
+            work[f'dist_{feature_type}'] = distances[feature_type]
+
+# --- 4. MERGE INTO THE CANONICAL STORE ---
+mark("upsert", rows=len(work))
+written, removed = upsert_incidents(to_schema(work), remove_ids=delta['deleted'], root=STORE_DIR)
+ledger.record(work['Incident-id'], work_hashes)
+ledger.forget(delta['deleted'])
+ledger.close()
+
+print(f"🎉 Done in {time.time() - start:.1f}s: {written:,} incidents written, {removed:,} old versions removed.")
+print(f"🗄️ Incident store updated at: {STORE_DIR}")
+print("👉 Re-run generate_training_data.py / train_model.py to refresh the model.")
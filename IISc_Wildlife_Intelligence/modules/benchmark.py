@@ -0,0 +1,130 @@
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+# --- CONFIGURATION ---
+RESULTS_DIR = "data/bench/results"
+BASELINE_FILE = "data/bench/baseline.json"
+SIZES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+REPEAT = 3                 # timed runs per (case, size); the fastest is compared
+THRESHOLD = 0.10           # slower than baseline by more than this fraction = regression
+NOISE_FLOOR = 0.01         # seconds; differences below this are timer noise, never flagged
+
+
+class Case:
+    """One benchmarked hot path.
+
+    setup(rows) builds the inputs (untimed) and returns a state object;
+    run(state) is the timed call; teardown(state) cleans up. Sizes above
+    `max_rows` are skipped (e.g. per-row code paths at 1M rows).
+    """
+
+    def __init__(self, name, setup, run, teardown=None, max_rows=None, repeat=REPEAT):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.teardown = teardown
+        self.max_rows = max_rows
+        self.repeat = repeat
+
+
+# --- 1. TIMING ---
+
+def time_case(case, rows, repeat=None):
+    """{'rows', 'seconds' (best), 'median', 'runs', 'rows_per_second'} for one case at one size."""
+    state = case.setup(rows)
+    runs = []
+    try:
+        for _ in range(repeat or case.repeat):
+            gc.collect()
+            start = time.perf_counter()
+            case.run(state)
+            runs.append(time.perf_counter() - start)
+    finally:
+        if case.teardown:
+            case.teardown(state)
+    best = min(runs)
+    return {
+        'rows': rows,
+        'seconds': round(best, 6),
+        'median': round(float(np.median(runs)), 6),
+        'runs': len(runs),
+        'rows_per_second': round(rows / best, 1) if best > 0 else None,
+    }
+
+
+def environment():
+    """What the numbers depend on besides the code: versions, CPU, commit."""
+    import pandas as pd
+    import sklearn
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+# --- 2. RESULT FILES ---
+
+def result_key(case_name, size_label):
+    return f"{case_name}@{size_label}"
+
+
+def save_results(results, path=None):
+    """Writes {'environment', 'results'} JSON; default path is RESULTS_DIR/<timestamp>.json."""
+    path = path or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".partial", "w") as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    os.replace(path + ".partial", path)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- 3. COMPARISON ---
+
+def compare(baseline, current, threshold=THRESHOLD, noise_floor=NOISE_FLOOR):
+    """Rows of (key, baseline s, current s, ratio, verdict) for keys present in both runs.
+
+    verdict is 'REGRESSION' when current is slower by more than `threshold` (and by more
+    than `noise_floor` seconds), 'faster' when quicker by the same margins, else 'ok'.
+    """
+    base, cur = baseline['results'], current['results']
+    rows = []
+    for key in sorted(set(base) & set(cur)):
+        b, c = base[key]['seconds'], cur[key]['seconds']
+        ratio = c / b if b > 0 else float('inf')
+        if c - b > noise_floor and ratio > 1 + threshold:
+            verdict = 'REGRESSION'
+        elif b - c > noise_floor and ratio < 1 - threshold:
+            verdict = 'faster'
+        else:
+            verdict = 'ok'
+        rows.append((key, b, c, ratio, verdict))
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'benchmark':<36}{'baseline':>12}{'current':>12}{'ratio':>9}  verdict"]
+    for key, b, c, ratio, verdict in rows:
+        lines.append(f"{key:<36}{b:>11.4f}s{c:>11.4f}s{ratio:>8.2f}x  {verdict}")
+    return "\n".join(lines)
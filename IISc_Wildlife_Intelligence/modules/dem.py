@@ -0,0 +1,212 @@
+import glob
+import json
+import os
+import zlib
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# --- CONFIGURATION ---
+DEM_DIR = "data/dem"
+INDEX_FILE = "tiles.json"
+METERS_PER_DEGREE = 111320.0
+STRIP_ROWS = 1024
+
+# Terrain Ruggedness Index (mean |dz| to the 8 neighbours, metres) that counts as
+# fully "rocky" (1.0) for the app's shelter layer. Riley et al. class 240-500 m as
+# moderately-to-highly rugged at 30 m; SRTM 90 m tiles land in the same range.
+RUGGED_TRI_MAX = 250.0
+
+
+# --- 1. TILE INDEX ---
+# tiles.json: [{"name", "south", "west", "north", "east", "rows", "cols", "nodata"}, ...]
+# Bounds are outer pixel edges; tile data lives in <name>.npy (+ _slope / _ruggedness).
+
+def _layer_path(dem_dir, name, layer):
+    suffix = "" if layer == "elevation" else f"_{layer}"
+    return os.path.join(dem_dir, f"{name}{suffix}.npy")
+
+
+def load_tile_index(dem_dir=DEM_DIR):
+    path = os.path.join(dem_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_tile_index(tiles, dem_dir=DEM_DIR):
+    os.makedirs(dem_dir, exist_ok=True)
+    with open(os.path.join(dem_dir, INDEX_FILE), "w") as f:
+        json.dump(tiles, f, indent=2)
+
+
+def add_npy_tile(name, array, bounds, dem_dir=DEM_DIR, nodata=None):
+    """Registers an elevation array covering (south, west, north, east) as a tile."""
+    south, west, north, east = bounds
+    os.makedirs(dem_dir, exist_ok=True)
+    np.save(_layer_path(dem_dir, name, "elevation"), np.asarray(array, dtype=np.float32))
+    tiles = [t for t in load_tile_index(dem_dir) if t['name'] != name]
+    tiles.append({'name': name, 'south': south, 'west': west, 'north': north, 'east': east,
+                  'rows': int(array.shape[0]), 'cols': int(array.shape[1]), 'nodata': nodata})
+    save_tile_index(tiles, dem_dir)
+
+
+def import_geotiffs(dem_dir=DEM_DIR):
+    """Converts any *.tif in dem_dir to .npy tiles once (needs rasterio). Returns names imported."""
+    paths = sorted(glob.glob(os.path.join(dem_dir, "*.tif")))
+    known = {t['name'] for t in load_tile_index(dem_dir)}
+    todo = [p for p in paths if os.path.splitext(os.path.basename(p))[0] not in known]
+    if not todo:
+        return []
+    try:
+        import rasterio
+    except ImportError:
+        raise ImportError("Importing GeoTIFF DEM tiles needs 'rasterio' (pip install rasterio).")
+
+    imported = []
+    for path in todo:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with rasterio.open(path) as src:
+            b = src.bounds
+            add_npy_tile(name, src.read(1), (b.bottom, b.left, b.top, b.right), dem_dir, src.nodata)
+        imported.append(name)
+    return imported
+
+
+# --- 2. DERIVATIVES (slope + ruggedness) ---
+
+def _derive_strip(z, lat_centers, res_lat, res_lon):
+    """Slope (degrees) and TRI (metres) for the interior rows of a haloed strip."""
+    dy = res_lat * METERS_PER_DEGREE
+    dx = res_lon * METERS_PER_DEGREE * np.cos(np.radians(lat_centers))[:, None]
+    p = np.pad(z, ((0, 0), (1, 1)), mode="edge")
+    center = p[1:-1, 1:-1]
+
+    dzdx = (p[1:-1, 2:] - p[1:-1, :-2]) / (2 * dx)
+    dzdy = (p[:-2, 1:-1] - p[2:, 1:-1]) / (2 * dy)
+    slope = np.degrees(np.arctan(np.hypot(dzdx, dzdy)))
+
+    tri = np.zeros_like(center)
+    for dr in (-1, 0, 1):
+        for dc in (-1, 0, 1):
+            if dr or dc:
+                tri += np.abs(p[1 + dr:p.shape[0] - 1 + dr, 1 + dc:p.shape[1] - 1 + dc] - center)
+    return slope.astype(np.float32), (tri / 8).astype(np.float32)
+
+
+def build_derivatives(dem_dir=DEM_DIR, force=False):
+    """Precomputes <tile>_slope.npy and <tile>_ruggedness.npy in haloed row strips."""
+    built = []
+    for tile in load_tile_index(dem_dir):
+        slope_path = _layer_path(dem_dir, tile['name'], "slope")
+        rugged_path = _layer_path(dem_dir, tile['name'], "ruggedness")
+        if not force and os.path.exists(slope_path) and os.path.exists(rugged_path):
+            continue
+
+        z = np.load(_layer_path(dem_dir, tile['name'], "elevation"), mmap_mode='r')
+        rows, cols = z.shape
+        res_lat = (tile['north'] - tile['south']) / rows
+        res_lon = (tile['east'] - tile['west']) / cols
+        slope = open_memmap(slope_path, mode='w+', dtype=np.float32, shape=z.shape)
+        rugged = open_memmap(rugged_path, mode='w+', dtype=np.float32, shape=z.shape)
+
+        for r0 in range(0, rows, STRIP_ROWS):
+            r1 = min(rows, r0 + STRIP_ROWS)
+            lo, hi = max(0, r0 - 1), min(rows, r1 + 1)
+            strip = np.asarray(z[lo:hi], dtype=np.float32)
+            if tile.get('nodata') is not None:
+                strip = np.where(strip == tile['nodata'], np.nan, strip)
+            # Edge rows repeat themselves so the halo is always one row each side
+            if r0 == 0:
+                strip = np.vstack([strip[:1], strip])
+            if r1 == rows:
+                strip = np.vstack([strip, strip[-1:]])
+            lat_centers = tile['north'] - (np.arange(r0, r1) + 0.5) * res_lat
+            slope[r0:r1], rugged[r0:r1] = _derive_strip(strip, lat_centers, res_lat, res_lon)
+        slope.flush()
+        rugged.flush()
+        built.append(tile['name'])
+    return built
+
+
+# --- 3. BATCHED BILINEAR SAMPLER ---
+
+class DEMSampler:
+    """Samples elevation / slope / ruggedness for thousands of points per call from memory-mapped tiles."""
+
+    def __init__(self, dem_dir=DEM_DIR):
+        self.dem_dir = dem_dir
+        self.tiles = load_tile_index(dem_dir)
+        self._arrays = {}
+
+    def __bool__(self):
+        return bool(self.tiles)
+
+    def has_layer(self, layer):
+        """True if at least one tile has `layer` on disk (slope/ruggedness need build_dem_derivatives.py)."""
+        return any(os.path.exists(_layer_path(self.dem_dir, tile['name'], layer)) for tile in self.tiles)
+
+    def layer_version(self, layer):
+        """Fingerprint of the tile index and every tile's `layer` file (size + mtime); changes when tiles are added or rebuilt."""
+        parts = []
+        for tile in self.tiles:
+            path = _layer_path(self.dem_dir, tile['name'], layer)
+            if os.path.exists(path):
+                st = os.stat(path)
+                parts.append(f"{tile['name']}:{tile['south']},{tile['west']},{tile['north']},{tile['east']}:"
+                             f"{st.st_size}:{st.st_mtime_ns}")
+        return f"{zlib.crc32('|'.join(parts).encode()):08x}"
+
+    def _array(self, tile, layer):
+        """Memory-mapped `layer` of one tile, or None if it has not been built yet."""
+        key = (tile['name'], layer)
+        if key not in self._arrays:
+            path = _layer_path(self.dem_dir, tile['name'], layer)
+            if not os.path.exists(path):
+                return None
+            self._arrays[key] = np.load(path, mmap_mode='r')
+        return self._arrays[key]
+
+    def sample(self, lats, lons, layer="elevation"):
+        """Bilinear samples `layer` at each point. NaN outside coverage, on nodata, or where the layer is not built."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        out = np.full(lats.shape, np.nan)
+
+        for tile in self.tiles:
+            inside = (np.isnan(out) & (lats >= tile['south']) & (lats <= tile['north'])
+                      & (lons >= tile['west']) & (lons <= tile['east']))
+            if not inside.any():
+                continue
+            arr = self._array(tile, layer)
+            if arr is None:
+                continue
+            rows, cols = arr.shape
+            # Fractional pixel coordinates relative to pixel centres
+            r = (tile['north'] - lats[inside]) / (tile['north'] - tile['south']) * rows - 0.5
+            c = (lons[inside] - tile['west']) / (tile['east'] - tile['west']) * cols - 0.5
+            r = np.clip(r, 0, rows - 1)
+            c = np.clip(c, 0, cols - 1)
+            r0 = np.minimum(r.astype(np.int64), rows - 2) if rows > 1 else np.zeros(r.shape, np.int64)
+            c0 = np.minimum(c.astype(np.int64), cols - 2) if cols > 1 else np.zeros(c.shape, np.int64)
+            r1 = np.minimum(r0 + 1, rows - 1)
+            c1 = np.minimum(c0 + 1, cols - 1)
+            fr, fc = r - r0, c - c0
+
+            # Gather the 4 neighbours (fancy indexing reads only those pages of the memmap)
+            v00 = arr[r0, c0].astype(np.float64)
+            v01 = arr[r0, c1].astype(np.float64)
+            v10 = arr[r1, c0].astype(np.float64)
+            v11 = arr[r1, c1].astype(np.float64)
+            values = (v00 * (1 - fr) * (1 - fc) + v01 * (1 - fr) * fc
+                      + v10 * fr * (1 - fc) + v11 * fr * fc)
+            if layer == "elevation" and tile.get('nodata') is not None:
+                bad = (v00 == tile['nodata']) | (v01 == tile['nodata']) | (v10 == tile['nodata']) | (v11 == tile['nodata'])
+                values[bad] = np.nan
+            out[inside] = values
+        return out
+
+    def rockiness(self, lats, lons):
+        """Ruggedness scaled to [0, 1] (the app's 'sim_rocky' shelter score)."""
+        return np.clip(self.sample(lats, lons, "ruggedness") / RUGGED_TRI_MAX, 0, 1)
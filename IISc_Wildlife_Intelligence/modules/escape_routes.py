@@ -0,0 +1,208 @@
+import hashlib
+import os
+
+import joblib
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from modules.raster_grid import (
+    DEFAULT_RESOLUTION, INDIA_BOUNDS, RASTER_DIR, feature_version, load_feature_layers, make_grid,
+    simulated_layers, window_bounds, window_for_bounds
+)
+
+# --- CONFIGURATION ---
+ROUTE_CACHE_DIR = os.path.join(RASTER_DIR, "escape_routes")
+COST_LAYERS = ['vegetation_index', 'slope_angle', 'proximity_to_village', 'proximity_to_forest']
+
+# Friction per cell (1 = easy going). Open ground, steep slopes and the
+# neighbourhood of villages are what a displaced animal avoids.
+COST_WEIGHTS = {
+    'open_ground': 4.0,      # x (1 - vegetation_index)
+    'slope': 3.0,            # x slope / 45°
+    'settlement': 8.0,       # x exp(-distance to village / SETTLEMENT_SCALE)
+}
+SETTLEMENT_SCALE = 1000.0    # metres
+
+# Refuge: dense cover inside or right next to forest
+REFUGE_MIN_VEGETATION = 0.7
+REFUGE_MAX_FOREST_DIST = 500.0   # metres
+
+# Incidents are routed tile by tile; each tile's graph extends PAD_DEG beyond it
+# so a route can leave the tile (max route length is roughly PAD_DEG * 111 km).
+TILE_DEG = 2.0
+PAD_DEG = 0.5
+METERS_PER_DEGREE = 111320.0
+
+
+# --- 1. COST SURFACE ---
+
+def cost_surface(layers):
+    """Per-cell friction and refuge mask from the feature layers (arrays of one window)."""
+    veg = np.clip(np.asarray(layers['vegetation_index'], dtype=np.float32), 0, 1)
+    slope = np.clip(np.asarray(layers['slope_angle'], dtype=np.float32), 0, 90)
+    village = np.asarray(layers['proximity_to_village'], dtype=np.float32)
+    forest = np.asarray(layers['proximity_to_forest'], dtype=np.float32)
+
+    cost = (1.0
+            + COST_WEIGHTS['open_ground'] * (1 - veg)
+            + COST_WEIGHTS['slope'] * slope / 45.0
+            + COST_WEIGHTS['settlement'] * np.exp(-village / SETTLEMENT_SCALE))
+    refuge = (veg >= REFUGE_MIN_VEGETATION) & (forest <= REFUGE_MAX_FOREST_DIST)
+    return cost.astype(np.float32), refuge
+
+
+def cost_version():
+    """Changes whenever the feature layers or the cost parameters change."""
+    params = repr((COST_WEIGHTS, SETTLEMENT_SCALE, REFUGE_MIN_VEGETATION, REFUGE_MAX_FOREST_DIST,
+                   TILE_DEG, PAD_DEG, DEFAULT_RESOLUTION))
+    return f"{feature_version(names=COST_LAYERS)}-{hashlib.md5(params.encode()).hexdigest()[:8]}"
+
+
+def load_cost_layers(grid):
+    """Memory-maps the COST_LAYERS built by build_feature_layers.py; raises FileNotFoundError if missing.
+
+    Never writes: routes are read-only consumers of data/rasters/features.
+    """
+    return load_feature_layers(grid, COST_LAYERS, simulate_missing=False)
+
+
+def simulated_cost_layers():
+    """{layer: fraction simulated} for the cost layers that are not real terrain/OSM data."""
+    return simulated_layers(COST_LAYERS)
+
+
+# --- 2. GRAPH + MULTI-SOURCE DIJKSTRA ---
+
+def _grid_graph(cost, lat_centers, res):
+    """8-connected sparse graph; an edge costs the mean friction of its two cells x its length in metres."""
+    rows, cols = cost.shape
+    ids = np.arange(rows * cols).reshape(rows, cols)
+    dy = res * METERS_PER_DEGREE
+    dx = res * METERS_PER_DEGREE * np.cos(np.radians(lat_centers))[:, None]
+
+    src, dst, weight = [], [], []
+    # Half of the 8 neighbours; the graph is made symmetric by adding both directions
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        ra, rb = slice(0, rows - dr), slice(dr, rows)
+        ca, cb = slice(max(0, -dc), cols - max(0, dc)), slice(max(0, dc), cols - max(0, -dc))
+        a, b = ids[ra, ca], ids[rb, cb]
+        length = np.broadcast_to(np.hypot(dx[ra] * abs(dc), dy * dr), a.shape)
+        w = (cost[ra, ca] + cost[rb, cb]) / 2 * length
+        src += [a.ravel(), b.ravel()]
+        dst += [b.ravel(), a.ravel()]
+        weight += [w.ravel(), w.ravel()]
+    n = rows * cols
+    return coo_matrix((np.concatenate(weight), (np.concatenate(src), np.concatenate(dst))), shape=(n, n)).tocsr()
+
+
+def _trace(predecessors, starts):
+    """Follows the predecessor tree from every start node at once. Returns a list of node-index paths."""
+    paths = [[s] for s in starts]
+    current = np.array(starts, dtype=np.int64)
+    active = np.arange(len(starts))
+    while active.size:
+        nxt = predecessors[current[active]]
+        alive = nxt >= 0
+        for k, node in zip(active[alive], nxt[alive]):
+            paths[k].append(int(node))
+        current[active[alive]] = nxt[alive]
+        active = active[alive]
+    return paths
+
+
+def route_window(cost, refuge, lat_centers, res, start_cells):
+    """Least-cost path from each start cell to its nearest refuge cell, in one Dijkstra pass.
+
+    Dijkstra runs once from *all* refuge cells (min_only), so every cell learns its
+    cheapest refuge and the predecessor on the way there; each incident's route is
+    that predecessor chain read from the incident outwards. Returns
+    (list of node paths or None, total cost per start).
+    """
+    graph = _grid_graph(cost, lat_centers, res)
+    sources = np.flatnonzero(refuge.ravel())
+    if sources.size == 0:
+        return [None] * len(start_cells), np.full(len(start_cells), np.inf)
+    dist, predecessors, _ = dijkstra(graph, directed=True, indices=sources,
+                                     min_only=True, return_predecessors=True)
+    costs = dist[start_cells]
+    paths = _trace(predecessors, start_cells)
+    return [p if np.isfinite(c) else None for p, c in zip(paths, costs)], costs
+
+
+# --- 3. BATCH ENGINE ---
+
+def incidents_key(lats, lons):
+    """Fingerprint of an incident set (order-independent, to ~1 m)."""
+    pts = np.unique(np.round(np.column_stack([lats, lons]).astype(np.float64), 5), axis=0)
+    return hashlib.md5(pts.tobytes()).hexdigest()[:16]
+
+
+def compute_escape_routes(lats, lons, grid=None, layers=None):
+    """Escape routes for every incident, one multi-source Dijkstra per tile of incidents.
+
+    Returns a list (aligned with the input) of dicts {'path': [[lon, lat], ...],
+    'cost': float} or None where no refuge is reachable inside the tile window.
+    Incidents sharing a grid cell share a route.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    grid = grid or make_grid(INDIA_BOUNDS, DEFAULT_RESOLUTION)
+    layers = layers or load_cost_layers(grid)
+    results = [None] * len(lats)
+
+    inside = ((lats >= grid['south']) & (lats < grid['north'])
+              & (lons >= grid['west']) & (lons < grid['east']))
+    tile_r = np.floor((lats - grid['south']) / TILE_DEG).astype(np.int64)
+    tile_c = np.floor((lons - grid['west']) / TILE_DEG).astype(np.int64)
+    for tr, tc in set(zip(tile_r[inside], tile_c[inside])):
+        members = np.flatnonzero(inside & (tile_r == tr) & (tile_c == tc))
+        south = grid['south'] + tr * TILE_DEG
+        west = grid['west'] + tc * TILE_DEG
+        r0, r1, c0, c1 = window_for_bounds(grid, (south - PAD_DEG, west - PAD_DEG,
+                                                  south + TILE_DEG + PAD_DEG, west + TILE_DEG + PAD_DEG))
+        window = {name: layers[name][r0:r1, c0:c1] for name in COST_LAYERS}
+        cost, refuge = cost_surface(window)
+        _, west_edge, north_edge, _ = window_bounds(grid, r0, r1, c0, c1)
+        lat_centers = north_edge - (np.arange(r1 - r0) + 0.5) * grid['res']
+
+        # Incident -> window cell; route each distinct cell once
+        rows = np.clip(((north_edge - lats[members]) / grid['res']).astype(np.int64), 0, r1 - r0 - 1)
+        cols = np.clip(((lons[members] - west_edge) / grid['res']).astype(np.int64), 0, c1 - c0 - 1)
+        cells, inverse = np.unique(rows * (c1 - c0) + cols, return_inverse=True)
+        paths, costs = route_window(cost, refuge, lat_centers, grid['res'], cells)
+
+        for cell_pos, (path, total) in enumerate(zip(paths, costs)):
+            if path is None:
+                continue
+            pr, pc = np.divmod(np.asarray(path), c1 - c0)
+            # Start exactly at the incident's cell centre, end at the refuge cell centre
+            line = np.column_stack([west_edge + (pc + 0.5) * grid['res'],
+                                    north_edge - (pr + 0.5) * grid['res']]).round(5).tolist()
+            route = {'path': line, 'cost': float(total)}
+            for k in members[inverse == cell_pos]:
+                results[k] = route
+    return results
+
+
+def load_escape_routes(lats, lons, cache_dir=ROUTE_CACHE_DIR):
+    """compute_escape_routes with an on-disk cache keyed by (cost-surface version, incident set).
+
+    Raises FileNotFoundError when the cost layers have not been built yet.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    grid = make_grid(INDIA_BOUNDS, DEFAULT_RESOLUTION)
+    # Key taken once the layers are known to exist, so it matches every later run
+    layers = load_cost_layers(grid)
+    key = f"{cost_version()}-{incidents_key(lats, lons)}"
+    path = os.path.join(cache_dir, f"{key}.pkl")
+    points = list(zip(np.round(lats, 5).tolist(), np.round(lons, 5).tolist()))
+    if os.path.exists(path):
+        cached = joblib.load(path)
+        return [cached[p] for p in points], key
+
+    routes = compute_escape_routes(lats, lons, grid, layers)
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump(dict(zip(points, routes)), path)
+    return routes, key
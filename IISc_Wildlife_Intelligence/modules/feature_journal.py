@@ -0,0 +1,108 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+JOURNAL_FILE = "data/model_ready_data.journal.jsonl"
+REPAIR_BLOCK = 1 << 16
+COORD_TOLERANCE = 1e-6   # degrees
+
+
+class FeatureJournal:
+    """Append-only JSON-lines log of per-row feature results, for resumable extraction.
+
+    Each line is {"row": index label, "lat", "lon", <column>: value, ...}. lat/lon tie
+    an entry to its input row, so a regenerated input never picks up stale values.
+    Every append is flushed and fsynced before it returns: a crash loses at most the
+    requests that were still in flight. Only real values are logged, so a row that
+    failed (NaN) is fetched again on resume while a genuine 0 m distance is kept.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, sync=True):
+        self.path = path
+        self.sync = sync
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._repair()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _repair(self):
+        """Truncates a torn last line left by a crash mid-write, so appends start on a fresh line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = end
+            while pos > 0:
+                start = max(0, pos - REPAIR_BLOCK)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                pos = start
+            f.truncate(0)
+
+    def append(self, rows, lats, lons, values):
+        """Logs {column: values} for `rows` (DataFrame index labels); NaN values are skipped.
+
+        One write + fsync per call, i.e. per request's worth of rows. Returns rows logged.
+        """
+        columns = {c: np.asarray(v, dtype=float) for c, v in values.items()}
+        lines = []
+        for k, row in enumerate(rows):
+            entry = {c: float(v[k]) for c, v in columns.items() if not np.isnan(v[k])}
+            if entry:
+                lines.append(json.dumps({'row': int(row), 'lat': float(lats[k]), 'lon': float(lons[k]), **entry}))
+        if lines:
+            self.file.write("\n".join(lines) + "\n")
+            self.file.flush()
+            if self.sync:
+                os.fsync(self.file.fileno())
+        return len(lines)
+
+    def replay(self, df, columns):
+        """Fills `columns` of df in place from the journal (latest value wins). Returns rows restored."""
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        if not records:
+            return 0
+        log = pd.DataFrame.from_records(records)
+        log = log[log['row'].isin(df.index)]
+        # Entries for a different point under the same row label are stale; drop them before
+        # merging. Within ~0.1 m, since compaction's JSON floats are not bit-exact.
+        lat, lon = df.loc[log['row'], 'lat'].to_numpy(), df.loc[log['row'], 'lon'].to_numpy()
+        log = log[(np.abs(lat - log['lat'].to_numpy()) <= COORD_TOLERANCE)
+                  & (np.abs(lon - log['lon'].to_numpy()) <= COORD_TOLERANCE)]
+        # groupby().last() takes the last non-null value per column, merging partial entries
+        log = log.groupby('row', sort=False).last()
+        for c in columns:
+            if c in log.columns:
+                known = log[c].dropna()
+                df.loc[known.index, c] = known.to_numpy()
+        return len(log)
+
+    def compact(self, df, columns):
+        """Rewrites the journal as one line per row with df's current values (atomic)."""
+        self.file.close()
+        snapshot = df[['lat', 'lon'] + list(columns)].copy()
+        snapshot.insert(0, 'row', df.index)
+        snapshot = snapshot[snapshot[list(columns)].notna().any(axis=1)]
+        partial = self.path + ".partial"
+        snapshot.to_json(partial, orient="records", lines=True, double_precision=15)
+        os.replace(partial, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,220 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+GAZETTEER_FILE = "data/gazetteer.csv"
+INDIA_CENTER = (20.59, 78.96)
+FUZZY_MIN_LENGTH = 6   # shorter names must match exactly, by alias or by containment
+
+
+# --- 1. KEY NORMALIZATION ---
+
+def normalize_key(text):
+    """'  Jammu & kashmir ' -> 'jammu and kashmir' (the hash-index key)."""
+    if not isinstance(text, str):
+        return ""
+    text = text.lower().replace("&", " and ")
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def normalize_keys(values):
+    """Vectorized normalize_key over a Series / array of names."""
+    s = pd.Series(values, dtype="string").fillna("").str.lower()
+    s = s.str.replace("&", " and ", regex=False)
+    s = s.str.replace(r"[^a-z0-9 ]+", " ", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+# --- 2. INDEX ---
+
+class Gazetteer:
+    """District/state lookups: exact/alias hash index, whole-word containment, then n-gram + edit-distance fuzzy match."""
+
+    def __init__(self, path=GAZETTEER_FILE):
+        table = pd.read_csv(path, dtype={'aliases': 'string'})
+        self.districts = table[table['level'] == 'district'].reset_index(drop=True)
+        self.states = table[table['level'] == 'state'].reset_index(drop=True)
+        self.district_index = self._hash_index(self.districts)
+        self.state_index = self._hash_index(self.states)
+        self.district_trigrams = self._trigram_index(self.district_index)
+        self.state_trigrams = self._trigram_index(self.state_index)
+        self._resolved = {}   # (district key, state key) -> resolve() row, shared across chunks
+        self._by_state = {}   # state name -> (hash index, trigram index) of its districts only
+
+    @staticmethod
+    def _hash_index(frame):
+        """normalized name or alias -> list of row positions (a district name may exist in several states)."""
+        index = defaultdict(list)
+        for pos, row in frame.iterrows():
+            names = [row['name']] + (row['aliases'].split('|') if isinstance(row['aliases'], str) else [])
+            for name in names:
+                key = normalize_key(name)
+                if key and pos not in index[key]:
+                    index[key].append(pos)
+        return dict(index)
+
+    @staticmethod
+    def _trigram_index(hash_index):
+        grams = defaultdict(set)
+        for key in hash_index:
+            for gram in _trigrams(key):
+                grams[gram].add(key)
+        return grams
+
+    def _match_key(self, key, hash_index, trigram_index):
+        """Returns (matched key, match type) or (None, None)."""
+        if not key:
+            return None, None
+        if key in hash_index:
+            return key, "exact"
+
+        # Whole-word containment: 'nagina dehat block' -> 'nagina dehat', 'lakhimpur kheri' -> 'kheri'
+        padded = f" {key} "
+        contained = [k for k in hash_index if f" {k} " in padded]
+        if contained:
+            return max(contained, key=len), "contains"
+
+        # Fuzzy: candidates sharing trigrams, ranked by edit distance
+        counts = defaultdict(int)
+        for gram in _trigrams(key):
+            for candidate in trigram_index.get(gram, ()):
+                counts[candidate] += 1
+        best, best_dist = None, None
+        for candidate, _ in sorted(counts.items(), key=lambda kv: -kv[1])[:10]:
+            dist = _edit_distance(key, candidate)
+            if best_dist is None or dist < best_dist:
+                best, best_dist = candidate, dist
+        # Short names are too close to each other to guess at ('korea' vs 'korba')
+        if best is not None and len(key) >= FUZZY_MIN_LENGTH and best_dist <= max(1, len(key) // 4):
+            return best, "fuzzy"
+        return None, None
+
+    def state_name(self, name):
+        """Canonical state name for `name`, or None if it matches no known state."""
+        key, _ = self._match_key(normalize_key(name), self.state_index, self.state_trigrams)
+        return None if key is None else self.states.at[self.state_index[key][0], 'name']
+
+    def canonical_state(self, name):
+        """'Maharastra' -> 'Maharashtra'; unknown names come back title-cased."""
+        found = self.state_name(name)
+        if found is None:
+            return name.strip().title() if isinstance(name, str) else ""
+        return found
+
+    def _state_indices(self, state):
+        """(hash index, trigram index) restricted to the districts of one canonical state."""
+        if state not in self._by_state:
+            inside = set(np.flatnonzero((self.districts['state'] == state).to_numpy()))
+            index = {k: [p for p in ps if p in inside] for k, ps in self.district_index.items()}
+            index = {k: ps for k, ps in index.items() if ps}
+            self._by_state[state] = (index, self._trigram_index(index))
+        return self._by_state[state]
+
+    def lookup(self, district, state=None):
+        """Single district lookup -> dict(name, state, lat, lon, match) or None.
+
+        With a recognised `state`, contains/fuzzy matching only searches that
+        state's districts: a 'Dharmapuri, Tamil Nadu' that is not in the gazetteer
+        returns None rather than the nearest spelling somewhere else in India. An
+        exact name from another state is still accepted (a mistyped state column).
+        An unrecognised state falls back to the national index.
+        """
+        district_key = normalize_key(district)
+        wanted = self.state_name(state) if state else None
+        if wanted is None:
+            hash_index, trigram_index = self.district_index, self.district_trigrams
+        else:
+            hash_index, trigram_index = self._state_indices(wanted)
+        key, match = self._match_key(district_key, hash_index, trigram_index)
+        if key is None and wanted is not None and district_key in self.district_index:
+            hash_index, key, match = self.district_index, district_key, "exact"
+        if key is None:
+            return None
+        row = self.districts.loc[hash_index[key][0]]
+        return {'name': row['name'], 'state': row['state'], 'lat': row['lat'], 'lon': row['lon'], 'match': match}
+
+    def resolve(self, districts, states=None):
+        """Vectorized lookup for whole columns.
+
+        Each distinct (district, state) pair is matched once (and remembered for
+        later calls, e.g. the next chunk of a streaming run), then joined back onto
+        the rows. Returns a DataFrame aligned with `districts` holding
+        gazetteer_district, lat, lon and match (NaN / None where unresolved).
+        """
+        districts = pd.Series(districts)
+        keys = pd.DataFrame({
+            'district': normalize_keys(districts).to_numpy(),
+            'state': normalize_keys(states).to_numpy() if states is not None else "",
+        })
+        codes, uniques = pd.factorize(pd.MultiIndex.from_frame(keys))
+
+        resolved = []
+        for pair in uniques:
+            if pair not in self._resolved:
+                hit = self.lookup(pair[0], pair[1] or None)
+                self._resolved[pair] = (hit['name'], hit['lat'], hit['lon'], hit['match']) if hit else (None, np.nan, np.nan, None)
+            resolved.append(self._resolved[pair])
+        table = pd.DataFrame(resolved, columns=['gazetteer_district', 'lat', 'lon', 'match'])
+        out = table.take(codes).reset_index(drop=True)
+        out.index = districts.index
+        return out
+
+    def coords(self, names):
+        """{name: [lat, lon]} for a list of district names (unresolved names omitted)."""
+        out = {}
+        for name in names:
+            hit = self.lookup(name)
+            if hit:
+                out[name] = [hit['lat'], hit['lon']]
+        return out
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=GAZETTEER_FILE):
+    return Gazetteer(path)
+
+
+# --- 3. COORDINATE FILLING ---
+
+def fill_missing_coords(df, rng=None, jitter=0.05, gazetteer=None):
+    """Vectorized fill of missing/zero lat-lon from district centres plus uniform jitter.
+
+    Rows with valid coordinates are untouched; rows whose district cannot be
+    resolved stay NaN. Returns (lat, lon) arrays aligned with df.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    gazetteer = gazetteer or load_gazetteer()
+    lat = pd.to_numeric(df['lat'], errors='coerce').to_numpy(dtype=float, copy=True) if 'lat' in df else np.full(len(df), np.nan)
+    lon = pd.to_numeric(df['lon'], errors='coerce').to_numpy(dtype=float, copy=True) if 'lon' in df else np.full(len(df), np.nan)
+
+    missing = np.isnan(lat) | (lat == 0) | np.isnan(lon)
+    if missing.any():
+        sub = df.loc[missing]
+        # Inputs without a District column stay unresolved (NaN) instead of raising
+        districts = sub['District'] if 'District' in sub else pd.Series([None] * len(sub), index=sub.index)
+        hits = gazetteer.resolve(districts, sub['State'] if 'State' in sub else None)
+        n = int(missing.sum())
+        lat[missing] = hits['lat'].to_numpy() + rng.uniform(-jitter, jitter, n)
+        lon[missing] = hits['lon'].to_numpy() + rng.uniform(-jitter, jitter, n)
+    return lat, lon
+
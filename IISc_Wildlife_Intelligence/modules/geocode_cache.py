@@ -0,0 +1,73 @@
+import re
+import sqlite3
+import time
+
+# --- CONFIGURATION ---
+CACHE_FILE = "data/geocode_cache.sqlite"
+POSITIVE_TTL = 180 * 24 * 3600   # a found address is good for ~6 months
+NEGATIVE_TTL = 7 * 24 * 3600     # retry ZERO_RESULTS after a week
+
+
+def normalize_address(address):
+    """Cache key: lower-case, punctuation-insensitive, single-spaced ('Koppal ,  Karnataka' == 'koppal, karnataka')."""
+    text = str(address).lower().strip()
+    text = re.sub(r"\s*,\s*", ", ", text)
+    text = re.sub(r"[^\w, ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip(" ,")
+
+
+class GeocodeCache:
+    """Persistent SQLite cache of address -> (lat, lon), including 'not found' answers."""
+
+    def __init__(self, path=CACHE_FILE, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode (
+                key TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                found INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, addresses):
+        """Returns {address: (lat, lon) or None} for fresh entries only; misses are omitted.
+
+        Every input spelling that normalizes to a cached key gets the hit.
+        """
+        keys = {}
+        for a in addresses:
+            keys.setdefault(normalize_address(a), []).append(a)
+        now = time.time()
+        hits = {}
+        key_list = list(keys)
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, lat, lon, found, fetched_at FROM geocode WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for key, lat, lon, found, fetched_at in rows:
+                ttl = self.positive_ttl if found else self.negative_ttl
+                if now - fetched_at <= ttl:
+                    for a in keys[key]:
+                        hits[a] = (lat, lon) if found else None
+        return hits
+
+    def put_many(self, results):
+        """Stores {address: (lat, lon) or None}; None records a negative (not found) answer."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO geocode (key, lat, lon, found, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            [(normalize_address(a), r[0] if r else None, r[1] if r else None, int(r is not None), now)
+             for a, r in results.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
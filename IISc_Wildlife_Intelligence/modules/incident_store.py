@@ -0,0 +1,306 @@
+import codecs
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from modules.temporal import normalize_dates, season_codes
+
+# --- CONFIGURATION ---
+STORE_DIR = "data/incident_store"
+
+# Raw CSV exports we know about (oldest pipeline first so the richest file wins)
+LEGACY_CSV_FILES = [
+    "data/final_geocoded_data.csv",
+    "data/incidents_geocoded.csv",
+    "data/verified_geocoded.csv",
+    "incidents_geocoded.csv"
+]
+
+# --- 1. FIXED SCHEMA ---
+# Every incident file in the project is a subset of these columns.
+# Anything else (e.g. Excel's 'Unnamed: 10..55' spill columns) is dropped on ingest.
+INCIDENT_SCHEMA = pa.schema([
+    ("Incident-id", pa.string()),
+    ("Date(dd/mm/yr)", pa.string()),
+    ("Animal", pa.string()),
+    ("village", pa.string()),
+    ("District", pa.string()),
+    ("State", pa.string()),
+    ("Victim age", pa.string()),
+    ("Victim outcome", pa.string()),
+    ("Incident details", pa.string()),
+    ("Source url", pa.string()),
+    ("lat", pa.float64()),
+    ("lon", pa.float64()),
+    ("elevation", pa.float64()),
+    ("dist_water", pa.float64()),
+    ("dist_forest", pa.float64()),
+    ("dist_village", pa.float64()),
+    ("incident_date", pa.timestamp("ms")),   # normalized from 'Date(dd/mm/yr)' on ingest
+    ("season", pa.int8()),                   # temporal.SEASON_NAMES index, -1 if undated
+    ("year", pa.int16()),
+])
+
+PARTITION_COLS = ["State", "year"]
+PARTITIONING = ds.partitioning(
+    pa.schema([("State", pa.string()), ("year", pa.int16())]), flavor="hive"
+)
+
+# Columns the map and drill-down panel actually touch
+MAP_COLUMNS = [
+    "Incident-id", "Date(dd/mm/yr)", "Animal", "village", "District", "State",
+    "Victim outcome", "Incident details", "Source url", "lat", "lon", "incident_date", "season"
+]
+
+UNKNOWN_YEAR = 0
+
+
+# --- 2. RAW CSV HELPERS ---
+
+def read_raw_csv(path, **kwargs):
+    """Reads an Excel-exported CSV, falling back to Latin-1 for legacy files."""
+    try:
+        return pd.read_csv(path, encoding='utf-8', **kwargs)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding='ISO-8859-1', **kwargs)
+
+
+def detect_encoding(path, block_size=1 << 24):
+    """'utf-8' if the whole file decodes as UTF-8, else 'ISO-8859-1'.
+
+    Scans in blocks so a bad byte deep inside a multi-GB export is found before
+    any chunk has been written, instead of halfway through a streaming run.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        try:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    decoder.decode(b'', final=True)
+                    return 'utf-8'
+                decoder.decode(block)
+        except UnicodeDecodeError:
+            return 'ISO-8859-1'
+
+
+def iter_raw_csv(path, chunksize, **kwargs):
+    """Streams an Excel-exported CSV in DataFrame chunks of `chunksize` rows."""
+    encoding = detect_encoding(path)
+    with pd.read_csv(path, encoding=encoding, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def find_legacy_csv():
+    """Returns the first legacy incident CSV that exists, or None."""
+    for path in LEGACY_CSV_FILES:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def to_schema(df):
+    """Projects a raw incident frame onto INCIDENT_SCHEMA and returns an Arrow table."""
+    df = df.loc[:, ~df.columns.astype(str).str.startswith("Unnamed")]
+    if 'Latitude' in df.columns:
+        df = df.rename(columns={'Latitude': 'lat', 'Longitude': 'lon'})
+
+    out = {}
+    for field in INCIDENT_SCHEMA:
+        name = field.name
+        if name in ("incident_date", "season", "year"):
+            continue
+        if name not in df.columns:
+            out[name] = pa.nulls(len(df), type=field.type)
+        elif pa.types.is_string(field.type):
+            out[name] = pa.array(df[name].astype("string").str.strip(), type=pa.string(), from_pandas=True)
+        else:
+            out[name] = pa.array(pd.to_numeric(df[name], errors="coerce").to_numpy(dtype="float64"),
+                                 type=field.type, from_pandas=True)
+
+    # Partition keys must never be null
+    state = pc.fill_null(out["State"], "Unknown")
+    out["State"] = pc.if_else(pc.equal(state, ""), "Unknown", state)
+
+    # Typed date, season and year: the free text is normalized once, here
+    if "incident_date" in df.columns and df["incident_date"].notna().any():
+        dates = pd.to_datetime(df["incident_date"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    else:
+        dates = normalize_dates(df["Date(dd/mm/yr)"] if "Date(dd/mm/yr)" in df.columns else [None] * len(df))
+    out["incident_date"] = pa.array(dates.astype("datetime64[ms]"), type=pa.timestamp("ms"), from_pandas=True)
+    out["season"] = pa.array(season_codes(dates), type=pa.int8())
+    years = pd.Series(dates).dt.year.fillna(UNKNOWN_YEAR).to_numpy(dtype="int16")
+    out["year"] = pa.array(years, type=pa.int16())
+    return pa.table(out, schema=INCIDENT_SCHEMA)
+
+
+# --- 3. WRITER ---
+
+def write_store(df, root=STORE_DIR, overwrite=True):
+    """Writes incidents as Parquet partitioned by State/year.
+
+    `df` may be a DataFrame, an Arrow table, or an iterable of Arrow record batches
+    (streamed straight into the partition files, so memory stays flat).
+    With overwrite=False new files are added next to existing ones (used for chunked appends).
+    Returns the number of rows written.
+    """
+    written = [0]
+
+    def counted(batches):
+        for batch in batches:
+            written[0] += batch.num_rows
+            yield batch
+
+    if isinstance(df, pd.DataFrame):
+        df = to_schema(df)
+    if isinstance(df, pa.Table):
+        written[0] = df.num_rows
+        data = df
+    else:
+        data = pa.RecordBatchReader.from_batches(INCIDENT_SCHEMA, counted(df))
+
+    if overwrite and os.path.exists(root):
+        shutil.rmtree(root)
+    ds.write_dataset(
+        data,
+        root,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{{i}}-{os.getpid()}-{np.random.randint(1 << 30)}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=256_000,
+    )
+    return written[0]
+
+
+def publish_store(staging_root, root=STORE_DIR):
+    """Swaps a fully written staging store into place, so readers never see a half-built one."""
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.replace(staging_root, root)
+
+
+def upsert_incidents(df, remove_ids=(), root=STORE_DIR):
+    """Replaces incidents by Incident-id and deletes `remove_ids`, touching only the files involved.
+
+    Files holding an affected id are rewritten without it (or removed if nothing is
+    left); the new versions in `df` are then appended as new files. Returns
+    (rows written, rows removed).
+    """
+    table = to_schema(df) if isinstance(df, pd.DataFrame) else df
+    ids = pa.array(sorted(set(map(str, remove_ids)) | set(table.column("Incident-id").drop_null().to_pylist())),
+                   type=pa.string())
+
+    removed = 0
+    if len(ids) and store_exists(root):
+        for fragment in open_store(root).get_fragments():
+            # Only the id column is read unless the file actually holds an affected incident
+            hit = pc.is_in(pq.read_table(fragment.path, columns=["Incident-id"]).column("Incident-id"), value_set=ids)
+            n_hit = pc.sum(hit).as_py() or 0
+            if not n_hit:
+                continue
+            removed += n_hit
+            # Partition columns (State/year) live in the path, not in the file
+            keep = pq.read_table(fragment.path).filter(pc.invert(pc.fill_null(hit, False)))
+            if keep.num_rows:
+                staging = fragment.path + ".partial"
+                pq.write_table(keep, staging)
+                os.replace(staging, fragment.path)
+            else:
+                os.remove(fragment.path)
+
+    written = write_store(table, root=root, overwrite=False) if table.num_rows else 0
+    return written, removed
+
+
+def store_exists(root=STORE_DIR):
+    return os.path.isdir(root) and any(
+        name.endswith(".parquet") for _, _, files in os.walk(root) for name in files
+    )
+
+
+# --- 4. READER (projection + predicate pushdown) ---
+
+def _build_filter(filters):
+    """Turns [('State', '==', 'Karnataka'), ('year', '>=', 2024)] into an Arrow expression."""
+    if not filters:
+        return None
+    ops = {
+        "==": lambda f, v: f == v,
+        "!=": lambda f, v: f != v,
+        ">": lambda f, v: f > v,
+        ">=": lambda f, v: f >= v,
+        "<": lambda f, v: f < v,
+        "<=": lambda f, v: f <= v,
+        "in": lambda f, v: f.isin(list(v)),
+    }
+    expr = None
+    for column, op, value in filters:
+        term = ops[op](ds.field(column), value)
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def open_store(root=STORE_DIR):
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=INCIDENT_SCHEMA)
+
+
+def read_incidents(columns=None, filters=None, root=STORE_DIR):
+    """Reads only the requested columns, skipping partitions/row groups that fail `filters`."""
+    dataset = open_store(root)
+    table = dataset.to_table(columns=columns, filter=_build_filter(filters))
+    return table.to_pandas()
+
+
+def load_map_incidents(root=STORE_DIR, dem=None):
+    """The frame app.py maps: MAP_COLUMNS, tidy species names, located rows only, MCDA inputs.
+
+    `dem` (a modules.dem.DEMSampler) replaces simulated rockiness with real terrain where tiles exist.
+    """
+    # Column projection: only what the map + drill-down needs is read from disk
+    df = read_incidents(columns=MAP_COLUMNS, root=root)
+
+    if df.empty:
+        return pd.DataFrame()
+
+    # Standardization
+    if 'Animal' in df.columns:
+        df['Animal'] = df['Animal'].astype(str).str.title().str.strip()
+
+    # Ensure coordinates
+    df = df.dropna(subset=['lat', 'lon'])
+
+    # Ensure Source URL exists
+    if 'Source url' not in df.columns:
+        df['Source url'] = "#"
+
+    # --- SIMULATE ENV DATA FOR MCDA MODEL ---
+    # NOTE: This is where we simulate satellite data for the "Model"
+    # (RandomState(42) draws the same values the old np.random.seed(42) calls did)
+    rng = np.random.RandomState(42)
+    rows = len(df)
+    df['sim_water_dist'] = rng.uniform(0, 1, rows)  # 0 = close to water
+    df['sim_veg_density'] = rng.uniform(0, 1, rows) # 1 = dense forest
+    df['sim_rocky'] = rng.uniform(0, 1, rows)       # 1 = rocky terrain
+
+    # Real terrain where DEM tiles and their derivatives exist (ruggedness scaled to 0-1)
+    if dem and dem.has_layer("ruggedness"):
+        rocky = dem.rockiness(df['lat'], df['lon'])
+        df['sim_rocky'] = np.where(np.isnan(rocky), df['sim_rocky'], rocky)
+
+    return df
+
+
+def build_store_from_csv(path=None, root=STORE_DIR):
+    """One-off migration from the legacy CSV exports into the Parquet store."""
+    path = path or find_legacy_csv()
+    if path is None:
+        return 0
+    return write_store(read_raw_csv(path), root=root)
@@ -0,0 +1,143 @@
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+FEATURE_COLUMNS = ['elevation', 'dist_water', 'dist_forest', 'dist_village']   # same order as train_model.py
+MAX_BATCH_ROWS = 4096      # rows per predict_proba call
+MAX_WAIT_MS = 2.0          # how long the first request of a batch waits for company
+LATENCY_WINDOW = 10_000    # requests kept for the percentile report
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def points_to_matrix(points, feature_columns=FEATURE_COLUMNS):
+    """[{'lat':.., 'lon':.., 'elevation':.., ...}, ...] -> float64 matrix (n, features).
+
+    Raises ValueError naming the first point with a missing or non-numeric feature.
+    """
+    matrix = np.empty((len(points), len(feature_columns)), dtype=np.float64)
+    for i, point in enumerate(points):
+        try:
+            matrix[i] = [float(point[col]) for col in feature_columns]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"point {i} needs numeric {', '.join(feature_columns)}")
+    return matrix
+
+
+class LatencyTracker:
+    """Rolling window of request latencies and batch sizes."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.batches = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def add_request(self, seconds, rows):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.requests += 1
+            self.rows += rows
+
+    def add_batch(self, rows):
+        with self._lock:
+            self.batches.append(rows)
+
+    def report(self):
+        with self._lock:
+            latencies = np.array(self.latencies) * 1000
+            batches = np.array(self.batches)
+            uptime = time.time() - self.started
+            out = {'requests': self.requests, 'rows': self.rows, 'rows_per_second': round(self.rows / uptime, 1)}
+        if latencies.size:
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            out.update(latency_ms={'p50': round(p50, 2), 'p90': round(p90, 2), 'p99': round(p99, 2),
+                                   'max': round(float(latencies.max()), 2)})
+        if batches.size:
+            out.update(batches=int(batches.size), mean_batch_rows=round(float(batches.mean()), 1))
+        return out
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one predict_proba call.
+
+    Callers submit a feature matrix and get a Future of their conflict
+    probabilities. A single worker thread drains the queue: it waits at most
+    `max_wait_ms` after the first request for others to arrive, up to
+    `max_batch_rows` rows, scores them together and splits the result.
+    """
+
+    def __init__(self, model, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS, tracker=None):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.tracker = tracker or LatencyTracker()
+        self.positive = list(model.classes_).index(1) if 1 in list(model.classes_) else len(model.classes_) - 1
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, matrix):
+        future = Future()
+        self._queue.put((np.asarray(matrix, dtype=np.float64), future, time.perf_counter()))
+        return future
+
+    def predict(self, matrix):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(matrix).result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self._score(batch, rows)
+
+    def _score(self, batch, rows):
+        try:
+            matrix = np.concatenate([m for m, _, _ in batch]) if len(batch) > 1 else batch[0][0]
+            if hasattr(self.model, 'feature_names_in_'):
+                # Fitted on a DataFrame: keep sklearn's feature-name check quiet
+                matrix = pd.DataFrame(matrix, columns=self.model.feature_names_in_)
+            proba = self.model.predict_proba(matrix)[:, self.positive] if rows else np.empty(0)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        self.tracker.add_batch(rows)
+        offset = 0
+        done = time.perf_counter()
+        for matrix, future, submitted in batch:
+            future.set_result(proba[offset:offset + len(matrix)])
+            offset += len(matrix)
+            self.tracker.add_request(done - submitted, len(matrix))
+
+
+# --- CLIENT ---
+
+def score_points(points, url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=30):
+    """Posts points to a running serve_model.py; returns conflict probabilities in the same order."""
+    body = json.dumps({'points': list(points)}).encode()
+    request = urllib.request.Request(f"{url}/predict", data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())['probabilities']
@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+LEDGER_FILE = "data/ingest_ledger.sqlite"
+ID_COLUMN = "Incident-id"
+
+# Fields reported by the source. Derived columns (features, season, year) are
+# not hashed: they are recomputed for every new or changed incident anyway.
+SOURCE_COLUMNS = [
+    "Incident-id", "Date(dd/mm/yr)", "Animal", "village", "District", "State",
+    "Victim age", "Victim outcome", "Incident details", "Source url", "lat", "lon"
+]
+COORD_COLUMNS = ("lat", "lon")
+COORD_DECIMALS = 6
+
+
+# --- 1. KEYS + CONTENT HASHES ---
+
+def source_frame(df):
+    """Source fields as stripped strings ('' for missing), so re-exports hash identically."""
+    df = df.rename(columns={'Latitude': 'lat', 'Longitude': 'lon'})
+    out = {}
+    for c in SOURCE_COLUMNS:
+        if c not in df.columns:
+            continue
+        values = df[c]
+        if c in COORD_COLUMNS:
+            # CSV round trips are not float-exact; ~0.1 m is plenty
+            values = pd.to_numeric(values, errors="coerce").round(COORD_DECIMALS)
+        out[c] = values.astype("string").str.strip().fillna("")
+    return pd.DataFrame(out, index=df.index)
+
+
+def content_hashes(df):
+    """64-bit content hash per row (signed, to fit an SQLite INTEGER)."""
+    return pd.util.hash_pandas_object(source_frame(df), index=False).to_numpy(dtype=np.uint64).view(np.int64)
+
+
+def incident_ids(df, hashes=None):
+    """Incident-id per row; rows without one are keyed by their content ('auto-<hash>')."""
+    hashes = content_hashes(df) if hashes is None else hashes
+    auto = pd.Series([f"auto-{h & 0xFFFFFFFFFFFFFFFF:016x}" for h in hashes.tolist()], index=df.index, dtype="string")
+    if ID_COLUMN not in df.columns:
+        return auto
+    ids = df[ID_COLUMN].astype("string").str.strip()
+    return ids.mask(ids.isna() | (ids == ""), auto)
+
+
+# --- 2. LEDGER ---
+
+class IngestLedger:
+    """Persistent SQLite record of Incident-id -> content hash of what the store holds.
+
+    Diffing a fresh export against it tells the incremental pipeline which incidents
+    are new, changed or gone, so only those are geocoded, featurized and rewritten.
+    """
+
+    def __init__(self, path=LEDGER_FILE):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ledger (
+                incident_id TEXT PRIMARY KEY,
+                content_hash INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def snapshot(self):
+        """Series of content hashes indexed by Incident-id."""
+        rows = self.conn.execute("SELECT incident_id, content_hash FROM ledger").fetchall()
+        return pd.Series([h for _, h in rows], index=pd.Index([i for i, _ in rows], dtype="string"), dtype="int64")
+
+    def diff(self, ids, hashes):
+        """Splits an export into {'new', 'changed', 'deleted', 'unchanged'} Incident-id lists.
+
+        `ids`/`hashes` are aligned per row; for duplicated ids the last row wins.
+        """
+        current = pd.Series(np.asarray(hashes, dtype=np.int64), index=pd.Index(ids, dtype="string"))
+        current = current[~current.index.duplicated(keep="last")]
+        known = self.snapshot()
+
+        seen = current.index.isin(known.index)
+        stored = known.reindex(current.index[seen])
+        changed = current.index[seen][stored.to_numpy() != current[seen].to_numpy()]
+        return {
+            'new': current.index[~seen].tolist(),
+            'changed': changed.tolist(),
+            'deleted': known.index[~known.index.isin(current.index)].tolist(),
+            'unchanged': int(seen.sum()) - len(changed),
+        }
+
+    def record(self, ids, hashes):
+        """Marks incidents as ingested with the given content hashes."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO ledger (incident_id, content_hash, ingested_at) VALUES (?, ?, ?)",
+            [(str(i), int(h), now) for i, h in zip(ids, hashes)],
+        )
+        self.conn.commit()
+
+    def forget(self, ids):
+        self.conn.executemany("DELETE FROM ledger WHERE incident_id = ?", [(str(i),) for i in ids])
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM ledger").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
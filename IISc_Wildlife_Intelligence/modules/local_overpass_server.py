@@ -0,0 +1,97 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from modules.overpass_client import TokenBucket
+
+# --- LOCAL STAND-IN FOR OVERPASS + OPEN-ELEVATION ---
+# Serves the two endpoints extract_features_real.py talks to, with a per-server
+# quota (429 when exceeded) and artificial latency, so client throughput can be
+# measured without touching the public mirrors.
+
+AROUND_RE = re.compile(r"around:(\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)")
+BBOX_RE = re.compile(r"\((-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)\)")
+
+
+def _make_handler(quota, latency, rng_seed):
+    rng = random.Random(rng_seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real mirrors
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if quota.try_acquire() > 0:
+                self.server.stats['rejected'] += 1
+                return self._send(429, {"error": "rate limited"})
+            time.sleep(latency)
+            self.server.stats['served'] += 1
+
+            if url.path.endswith("/interpreter"):
+                data = params.get("data", [""])[0]
+                match = AROUND_RE.search(data)
+                box = BBOX_RE.search(data)
+                elements = []
+                if match:
+                    radius, lat, lon = (float(g) for g in match.groups())
+                    with lock:
+                        count = rng.randint(0, 6)
+                        offsets = [(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(count)]
+                    deg = radius / 111000
+                    elements = [{"type": "node", "lat": lat + dy * deg, "lon": lon + dx * deg}
+                                for dy, dx in offsets]
+                elif box:
+                    # Same feature density as the around: answers (0-6 per 10x10 km square)
+                    south, west, north, east = (float(g) for g in box.groups())
+                    squares = max(1, round((north - south) * (east - west) * 111 ** 2 / 100))
+                    with lock:
+                        count = sum(rng.randint(0, 6) for _ in range(squares))
+                        points = [(rng.uniform(south, north), rng.uniform(west, east)) for _ in range(count)]
+                    elements = [{"type": "node", "lat": lat, "lon": lon} for lat, lon in points]
+                return self._send(200, {"elements": elements})
+
+            if url.path.endswith("/lookup"):
+                results = []
+                for loc in params.get("locations", [""])[0].split("|"):
+                    lat, lon = (float(v) for v in loc.split(","))
+                    results.append({"latitude": lat, "longitude": lon,
+                                    "elevation": int(200 + abs(lat * 37 + lon * 11) % 800)})
+                return self._send(200, {"results": results})
+
+            self._send(404, {"error": "unknown path"})
+
+    return Handler
+
+
+def start_server(rate=2.0, burst=2, latency=0.05, port=0, seed=0):
+    """Starts one mirror on a background thread. Returns (server, base_url)."""
+    handler = _make_handler(TokenBucket(rate, burst), latency, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = {'served': 0, 'rejected': 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_mirrors(count=3, rate=2.0, burst=2, latency=0.05):
+    """Starts `count` independent mirrors plus an elevation server."""
+    mirrors = [start_server(rate, burst, latency, seed=i) for i in range(count)]
+    elevation = start_server(rate, burst, latency, seed=count)
+    return mirrors, elevation
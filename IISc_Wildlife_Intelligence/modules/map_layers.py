@@ -0,0 +1,104 @@
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import pydeck as pdk
+
+
+# --- RASTER OVERLAYS ---
+
+def raster_to_png_uri(values, color_range, max_alpha=180):
+    """Colours a [0, 1] array between two RGB stops and encodes it as a PNG data URI.
+
+    Cells at 0 are fully transparent so the base map stays visible.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=np.float32), nan=0.0)
+    low, high = np.asarray(color_range[0], np.float32), np.asarray(color_range[1], np.float32)
+    rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = (low + (high - low) * values[..., None]).astype(np.uint8)
+    rgba[..., 3] = (values * max_alpha).astype(np.uint8)
+
+    buf = io.BytesIO()
+    plt.imsave(buf, rgba, format="png")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def raster_bitmap_layer(values, bounds, color_range, opacity=0.7):
+    """A single BitmapLayer for a (south, west, north, east) window - payload is one image."""
+    south, west, north, east = bounds
+    return pdk.Layer(
+        "BitmapLayer",
+        data=None,
+        image=raster_to_png_uri(values, color_range),
+        bounds=[west, south, east, north],
+        opacity=opacity
+    )
+
+
+# --- POINT LAYERS ---
+
+SPECIES_COLORS = [
+    ('tiger', [255, 140, 0, 200]),
+    ('leopard', [255, 215, 0, 200]),
+    ('bear', [200, 30, 0, 200]),
+]
+DEFAULT_COLOR = [128, 128, 128, 200]
+
+
+def species_colors(animals):
+    """RGBA per row (vectorized replacement for the per-row get_color)."""
+    names = pd.Series(animals, dtype="string").str.lower().fillna("")
+    colors = np.tile(np.array(DEFAULT_COLOR, dtype=np.uint8), (len(names), 1))
+    # Reverse order so the first matching keyword wins, as in the old if-chain
+    for keyword, rgba in reversed(SPECIES_COLORS):
+        colors[names.str.contains(keyword, regex=False).to_numpy()] = rgba
+    return colors.tolist()
+
+
+def incident_point_layer(points):
+    """Raw incidents as dots (only used when the viewport holds few enough of them)."""
+    # Only what the dot + tooltip need goes into the browser payload
+    points = points[['lat', 'lon', 'Animal', 'District', 'Incident details']].assign(
+        color=species_colors(points['Animal'])
+    )
+    return pdk.Layer(
+        "ScatterplotLayer",
+        data=points,
+        get_position='[lon, lat]',
+        get_color='color',
+        get_radius=8000,
+        pickable=True,
+        stroked=True,
+        line_width_min_pixels=1,
+        get_line_color=[0, 0, 0]
+    )
+
+
+def incident_cluster_layer(cells):
+    """Aggregated quadtree cells: one dot per cell, sized by count, coloured by the dominant species.
+
+    Columns are named after the tooltip fields (Animal / District / Incident details)
+    so the app's single tooltip template works for cells and raw points alike.
+    """
+    cells = cells.assign(
+        color=species_colors(cells['dominant']),
+        radius=np.sqrt(cells['count'].to_numpy(dtype=float)) * 6,
+        Animal=cells['mix'],
+        District=cells['count'].astype(str) + " incidents",
+        **{'Incident details': "Zoom in for individual reports"}
+    )
+    return pdk.Layer(
+        "ScatterplotLayer",
+        data=cells[['lat', 'lon', 'count', 'color', 'radius', 'Animal', 'District', 'Incident details']],
+        get_position='[lon, lat]',
+        get_color='color',
+        get_radius='radius',
+        radius_units='pixels',
+        radius_min_pixels=4,
+        pickable=True,
+        stroked=True,
+        line_width_min_pixels=1,
+        get_line_color=[0, 0, 0]
+    )
@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+
+# --- CONFIGURATION ---
+REGISTRY_DIR = "data/models"
+CURRENT_FILE = "CURRENT"          # holds the version name the app/server should load
+MANIFEST_FILE = "manifest.json"
+ESTIMATOR_FILE = "estimator.joblib"
+
+# Flattened forest: one row per node across all trees, saved as plain .npy so
+# np.load(mmap_mode='r') maps them instead of reading them. Every process that
+# loads the same version shares one copy through the page cache. (joblib's
+# mmap_mode does not help here: sklearn copies each tree's node array on unpickle.)
+FOREST_ARRAYS = ['left', 'right', 'feature', 'threshold', 'missing_left', 'proba', 'roots']
+
+
+# --- 1. FLAT FOREST ---
+
+def flatten_forest(model):
+    """Concatenates every tree of a fitted forest classifier into flat node arrays.
+
+    Child indices are made global (offset by the tree's first node); leaves point to
+    themselves so a traversal can run a fixed number of steps.
+    """
+    left, right, feature, threshold, missing_left, proba, roots = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        own = np.arange(n) + offset
+        is_leaf = tree.children_left < 0
+        left.append(np.where(is_leaf, own, tree.children_left + offset))
+        right.append(np.where(is_leaf, own, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(n, dtype=np.uint8)).astype(bool))
+        values = tree.value[:, 0, :]
+        proba.append(values / np.maximum(values.sum(axis=1, keepdims=True), 1e-12))
+        roots.append(offset)
+        offset += n
+    return {
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'missing_left': np.concatenate(missing_left),
+        'proba': np.concatenate(proba).astype(np.float32),
+        'roots': np.asarray(roots, dtype=np.int32),
+    }
+
+
+class FlatForest:
+    """predict_proba over memory-mapped flat node arrays (same results as the sklearn forest).
+
+    Every (row, tree) pair is walked at once, one vectorized step per level;
+    pairs drop out as soon as they reach a leaf.
+    """
+
+    def __init__(self, arrays, manifest):
+        self.arrays = arrays
+        self.manifest = manifest
+        self.classes_ = np.asarray(manifest['classes'])
+        self.feature_columns = list(manifest['feature_columns'])
+        self.n_trees = len(arrays['roots'])
+        self.is_leaf = np.asarray(arrays['left']) == np.arange(len(arrays['left']))
+
+    def predict_proba(self, X):
+        a = self.arrays
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        flat_x = X.ravel()
+        node = np.tile(np.asarray(a['roots'], dtype=np.int64), n)
+        base = np.repeat(np.arange(n, dtype=np.int64) * n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            value = flat_x[base[active] + a['feature'][current]]
+            go_left = np.where(np.isnan(value), a['missing_left'][current], value <= a['threshold'][current])
+            current = np.where(go_left, a['left'][current], a['right'][current])
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return a['proba'][node].reshape(n, self.n_trees, -1).mean(axis=1, dtype=np.float64)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+# --- 2. REGISTRY ---
+
+def list_versions(root=REGISTRY_DIR):
+    """Registered version names, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(v for v in os.listdir(root) if os.path.exists(os.path.join(root, v, MANIFEST_FILE)))
+
+
+def current_version(root=REGISTRY_DIR):
+    path = os.path.join(root, CURRENT_FILE)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip() or None
+    versions = list_versions(root)
+    return versions[-1] if versions else None
+
+
+def set_current(version, root=REGISTRY_DIR):
+    """Points the registry at `version` (atomic, so readers never see a half-written name)."""
+    path = os.path.join(root, CURRENT_FILE)
+    with open(path + ".partial", 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(path + ".partial", path)
+
+
+def register_model(model, feature_columns, metrics=None, data_hash=None, params=None,
+                   root=REGISTRY_DIR, make_current=True):
+    """Saves a new version: flat forest arrays, the full estimator and a manifest. Returns the version."""
+    versions = list_versions(root)
+    version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+    staging = os.path.join(root, f".{version}.partial")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    arrays = flatten_forest(model)
+    for name in FOREST_ARRAYS:
+        np.save(os.path.join(staging, f"{name}.npy"), arrays[name])
+    # Kept for warm starts / feature importances; the server never needs to unpickle it
+    joblib.dump(model, os.path.join(staging, ESTIMATOR_FILE))
+
+    manifest = {
+        'version': version,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'model_type': type(model).__name__,
+        'feature_columns': list(feature_columns),
+        'classes': [int(c) for c in model.classes_],
+        'n_trees': len(model.estimators_),
+        'max_depth': int(max(e.tree_.max_depth for e in model.estimators_)),
+        'n_nodes': int(len(arrays['left'])),
+        'params': {k: v for k, v in (params or model.get_params()).items() if isinstance(v, (int, float, str, bool, type(None)))},
+        'metrics': metrics or {},
+        'data_hash': data_hash,
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(staging, os.path.join(root, version))
+    if make_current:
+        set_current(version, root)
+    return version
+
+
+def load_manifest(version=None, root=REGISTRY_DIR):
+    version = version or current_version(root)
+    if version is None:
+        return None
+    with open(os.path.join(root, version, MANIFEST_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_model(version=None, root=REGISTRY_DIR, mmap=True):
+    """FlatForest for `version` (default: current), arrays memory-mapped. None if nothing is registered."""
+    manifest = load_manifest(version, root)
+    if manifest is None:
+        return None
+    folder = os.path.join(root, manifest['version'])
+    arrays = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode='r' if mmap else None)
+              for name in FOREST_ARRAYS}
+    return FlatForest(arrays, manifest)
+
+
+def load_estimator(version=None, root=REGISTRY_DIR):
+    """The original sklearn estimator (full unpickle; for retraining, not serving)."""
+    manifest = load_manifest(version, root)
+    return None if manifest is None else joblib.load(os.path.join(root, manifest['version'], ESTIMATOR_FILE))
@@ -0,0 +1,163 @@
+import bz2
+import gzip
+import os
+import xml.etree.ElementTree as ET
+
+import joblib
+import numpy as np
+from sklearn.neighbors import BallTree
+
+# --- CONFIGURATION ---
+OSM_EXTRACT_FILE = "data/osm/india_features.osm"
+OSM_INDEX_FILE = "data/osm_feature_index.pkl"
+SEARCH_RADIUS = 5000          # metres - same cap as the Overpass 'around:' queries
+EARTH_RADIUS = 6371000.0
+
+# The tags each Overpass query asked for, per element type
+FEATURE_TAGS = {
+    "water": {"way": [("natural", "water")], "relation": [("natural", "water")]},
+    "forest": {"way": [("landuse", "forest"), ("natural", "wood")]},
+    "village": {"node": [("place", "village")], "way": [("landuse", "residential")]},
+}
+FEATURE_TYPES = list(FEATURE_TAGS)
+
+
+# --- 1. OSM EXTRACT PARSER ---
+# Expects OSM XML (.osm / .osm.bz2 / .osm.gz). A full country .pbf is best cut down first:
+#   osmium tags-filter india-latest.osm.pbf n/place=village w/landuse=forest,residential \
+#       wr/natural=water,wood -o india_features.osm
+
+def _open(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _iter_elements(path, wanted):
+    """Streams (tag, element) for top-level elements of the wanted kinds, freeing memory as it goes."""
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag in wanted:
+                yield elem.tag, elem
+            if elem.tag in ("node", "way", "relation"):
+                elem.clear()
+
+
+def _matches(kind, tags):
+    """Feature types an element with `tags` belongs to."""
+    return [feature for feature, rules in FEATURE_TAGS.items()
+            if any(tags.get(k) == v for k, v in rules.get(kind, []))]
+
+
+def parse_osm_features(path):
+    """Returns {feature_type: (N, 2) array of [lat, lon]} using Overpass 'out center' semantics.
+
+    Three streaming passes keep memory bounded by the features of interest:
+    relations -> member ways, ways -> node refs, nodes -> coordinates.
+    """
+    # Pass 1: tagged relations and the ways they are built from
+    relation_members = {}
+    for _, elem in _iter_elements(path, {"relation"}):
+        tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+        for feature in _matches("relation", tags):
+            ways = [int(m.get("ref")) for m in elem.findall("member") if m.get("type") == "way"]
+            relation_members.setdefault(feature, []).append(ways)
+    member_way_ids = {w for groups in relation_members.values() for ways in groups for w in ways}
+
+    # Pass 2: tagged ways (and relation member ways) -> node refs
+    way_nodes = {}
+    tagged_ways = {}
+    for _, elem in _iter_elements(path, {"way"}):
+        way_id = int(elem.get("id"))
+        tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+        features = _matches("way", tags)
+        if features or way_id in member_way_ids:
+            way_nodes[way_id] = [int(nd.get("ref")) for nd in elem.findall("nd")]
+        for feature in features:
+            tagged_ways.setdefault(feature, []).append(way_id)
+    needed_nodes = {n for refs in way_nodes.values() for n in refs}
+
+    # Pass 3: node coordinates (plus directly tagged nodes such as villages)
+    node_coords = {}
+    points = {feature: [] for feature in FEATURE_TYPES}
+    for _, elem in _iter_elements(path, {"node"}):
+        node_id = int(elem.get("id"))
+        lat, lon = float(elem.get("lat")), float(elem.get("lon"))
+        if node_id in needed_nodes:
+            node_coords[node_id] = (lat, lon)
+        tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+        for feature in _matches("node", tags):
+            points[feature].append((lat, lon))
+
+    def bbox_center(node_ids):
+        coords = [node_coords[n] for n in node_ids if n in node_coords]
+        if not coords:
+            return None
+        arr = np.asarray(coords)
+        return ((arr[:, 0].min() + arr[:, 0].max()) / 2, (arr[:, 1].min() + arr[:, 1].max()) / 2)
+
+    for feature, ways in tagged_ways.items():
+        for way_id in ways:
+            center = bbox_center(way_nodes[way_id])
+            if center:
+                points[feature].append(center)
+    for feature, groups in relation_members.items():
+        for ways in groups:
+            center = bbox_center([n for w in ways for n in way_nodes.get(w, [])])
+            if center:
+                points[feature].append(center)
+
+    return {feature: np.asarray(pts, dtype=np.float64).reshape(-1, 2) for feature, pts in points.items()}
+
+
+# --- 2. INDEX BUILD / LOAD ---
+
+def build_index(extract_path=OSM_EXTRACT_FILE, index_path=OSM_INDEX_FILE):
+    """Parses the extract once and saves one haversine BallTree per feature type."""
+    features = parse_osm_features(extract_path)
+    index = {
+        "source": os.path.abspath(extract_path),
+        "counts": {feature: len(pts) for feature, pts in features.items()},
+        "trees": {feature: BallTree(np.radians(pts), metric="haversine") if len(pts) else None
+                  for feature, pts in features.items()},
+    }
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    joblib.dump(index, index_path)
+    return index
+
+
+def load_index(index_path=OSM_INDEX_FILE, extract_path=OSM_EXTRACT_FILE):
+    """Loads the saved index, (re)building it if the extract is newer. None if neither exists."""
+    if os.path.exists(index_path):
+        stale = os.path.exists(extract_path) and os.path.getmtime(extract_path) > os.path.getmtime(index_path)
+        if not stale:
+            return joblib.load(index_path)
+    if os.path.exists(extract_path):
+        return build_index(extract_path, index_path)
+    return None
+
+
+def index_version(index_path=OSM_INDEX_FILE):
+    """Fingerprint (size + mtime) of the saved index, or None if it has not been built."""
+    if not os.path.exists(index_path):
+        return None
+    st = os.stat(index_path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+# --- 3. VECTORIZED QUERY ---
+
+def distance_to_nearest(index, lats, lons, feature_type, radius=SEARCH_RADIUS):
+    """Haversine metres from every (lat, lon) to the nearest feature, capped at `radius`."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    out = np.full(lats.shape, float(radius))
+    tree = index["trees"].get(feature_type)
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    if tree is None or not valid.any():
+        return out
+    dist, _ = tree.query(np.radians(np.column_stack([lats[valid], lons[valid]])), k=1)
+    out[valid] = np.minimum(dist[:, 0] * EARTH_RADIUS, radius)
+    return np.round(out, 2)
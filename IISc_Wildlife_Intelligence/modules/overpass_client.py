@@ -0,0 +1,255 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.telemetry import record_call
+
+# --- CONFIGURATION ---
+OVERPASS_ENDPOINTS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://lz4.overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter"
+]
+ELEVATION_URL = "https://api.open-elevation.com/api/v1/lookup"
+
+RATE_PER_ENDPOINT = 1.0      # sustained requests/second each mirror tolerates
+BURST = 2                    # tokens a mirror may bank while idle
+SLOTS_PER_ENDPOINT = 2       # Overpass allows ~2 concurrent slots per client IP
+MAX_IN_FLIGHT = 8            # total concurrent requests across all mirrors
+MAX_BACKOFF = 60.0           # seconds
+SEARCH_RADIUS = 5000         # metres; "nothing found" is reported as this distance
+
+# Optimized Queries (Search smaller radius first for speed)
+FEATURE_QUERIES = {
+    "water": """
+        [out:json][timeout:25];
+        (way["natural"="water"](around:{radius},{lat},{lon});
+         relation["natural"="water"](around:{radius},{lat},{lon}););
+        out center;
+    """,
+    "forest": """
+        [out:json][timeout:25];
+        (way["landuse"="forest"](around:{radius},{lat},{lon});
+         way["natural"="wood"](around:{radius},{lat},{lon}););
+        out center;
+    """,
+    "village": """
+        [out:json][timeout:25];
+        (node["place"="village"](around:{radius},{lat},{lon});
+         way["landuse"="residential"](around:{radius},{lat},{lon}););
+        out center;
+    """
+}
+
+
+# --- 1. RATE LIMITING ---
+
+class TokenBucket:
+    """Token bucket with AIMD rate: halve on 429, creep back up on success."""
+
+    def __init__(self, rate=RATE_PER_ENDPOINT, capacity=BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Takes a token if one is available. Returns 0 on success, else seconds until the next token."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = 0
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class Endpoint:
+    """One mirror: its bucket, concurrency slots, backoff state and counters."""
+
+    def __init__(self, url, rate=RATE_PER_ENDPOINT, burst=BURST, slots=SLOTS_PER_ENDPOINT):
+        self.url = url
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(slots)
+        self.backoff = 0.0
+        self.cooldown_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {'ok': 0, 'rate_limited': 0, 'errors': 0, 'seconds': 0.0}
+
+    def on_success(self, elapsed):
+        with self.lock:
+            self.backoff = 0.0
+            self.stats['ok'] += 1
+            self.stats['seconds'] += elapsed
+        self.bucket.speed_up()
+
+    def on_rate_limited(self):
+        # Adaptive backoff: 2s, 4s, 8s ... capped, and the bucket rate is halved
+        with self.lock:
+            self.backoff = min(MAX_BACKOFF, self.backoff * 2 if self.backoff else 2.0)
+            self.cooldown_until = time.monotonic() + self.backoff
+            self.stats['rate_limited'] += 1
+        self.bucket.slow_down()
+
+    def on_error(self):
+        with self.lock:
+            self.backoff = min(MAX_BACKOFF, self.backoff * 2 if self.backoff else 1.0)
+            self.cooldown_until = time.monotonic() + self.backoff
+            self.stats['errors'] += 1
+
+
+# --- 2. CLIENT ---
+
+class OverpassClient:
+    """Thread-safe Overpass/elevation client over pooled keep-alive sessions.
+
+    Every request goes to whichever healthy mirror has a token and a free slot, so
+    the combined quota of all mirrors is used instead of one random pick at a time.
+    """
+
+    def __init__(self, endpoints=None, elevation_url=ELEVATION_URL, rate=RATE_PER_ENDPOINT,
+                 burst=BURST, slots=SLOTS_PER_ENDPOINT, max_in_flight=MAX_IN_FLIGHT,
+                 timeout=20, max_retries=5, cache=None):
+        self.endpoints = [Endpoint(url, rate, burst, slots) for url in (endpoints or OVERPASS_ENDPOINTS)]
+        self.elevation_endpoint = Endpoint(elevation_url, rate, burst, slots)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_in_flight = max_in_flight
+        self.cache = cache   # optional OverpassCache (modules/overpass_tiles.py)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints) + 1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _acquire(self, endpoints):
+        """Blocks until some endpoint grants a token and a slot; returns that endpoint."""
+        while True:
+            now = time.monotonic()
+            wait = 0.5
+            # Healthiest first: least backoff, then most headroom
+            for ep in sorted(endpoints, key=lambda e: (e.cooldown_until > now, e.backoff, -e.bucket.tokens)):
+                if ep.cooldown_until > now:
+                    wait = min(wait, ep.cooldown_until - now)
+                    continue
+                if not ep.slots.acquire(blocking=False):
+                    continue
+                token_wait = ep.bucket.try_acquire()
+                if token_wait == 0:
+                    return ep
+                ep.slots.release()
+                wait = min(wait, token_wait)
+            time.sleep(max(wait, 0.005))
+
+    def _get(self, endpoints, params, kind="overpass"):
+        """GET with per-endpoint limits and adaptive backoff. Returns parsed JSON or None.
+
+        Every attempt's latency is recorded under `kind` (see modules/telemetry.py).
+        """
+        for _ in range(self.max_retries):
+            ep = self._acquire(endpoints)
+            start = time.monotonic()
+            ok = False
+            try:
+                with self.in_flight:
+                    response = self.session.get(ep.url, params=params, timeout=self.timeout)
+                if response.status_code == 200:
+                    data = response.json()
+                    ok = True
+                    ep.on_success(time.monotonic() - start)
+                    return data
+                if response.status_code == 429:
+                    ep.on_rate_limited()
+                else:
+                    ep.on_error()
+            except (requests.RequestException, ValueError):
+                # ValueError: HTML error page instead of JSON
+                ep.on_error()
+            finally:
+                record_call(kind, time.monotonic() - start, ok)
+                ep.slots.release()
+        return None
+
+    def query(self, query):
+        """Runs an Overpass QL query on the best available mirror (or answers it from the cache)."""
+        if self.cache is not None:
+            data = self.cache.get(query)
+            if data is not None:
+                return data
+        data = self._get(self.endpoints, {'data': query})
+        if self.cache is not None:
+            self.cache.put(query, data)
+        return data
+
+    def distance_to_nearest(self, lat, lon, feature_type, radius=SEARCH_RADIUS):
+        """Metres from (lat, lon) to the nearest OSM water/forest/village within `radius`."""
+        data = self.query(FEATURE_QUERIES[feature_type].format(radius=radius, lat=lat, lon=lon))
+        if not data or not data.get('elements'):
+            return radius  # Assume max distance if nothing found
+
+        min_dist = radius
+        for element in data['elements']:
+            if 'lat' in element:
+                el_lat, el_lon = element['lat'], element['lon']
+            elif 'center' in element:
+                el_lat, el_lon = element['center']['lat'], element['center']['lon']
+            else:
+                continue
+            # Fast Euclidean Calc
+            d_lat = (el_lat - lat) * 111000
+            d_lon = (el_lon - lon) * 111000 * math.cos(math.radians(lat))
+            min_dist = min(min_dist, math.sqrt(d_lat ** 2 + d_lon ** 2))
+        return round(min_dist, 2)
+
+    def elevations(self, points):
+        """Elevation for a batch of (lat, lon) in one open-elevation call; None entries on failure."""
+        if not points:
+            return []
+        locations = "|".join(f"{lat},{lon}" for lat, lon in points)
+        data = self._get([self.elevation_endpoint], {'locations': locations}, kind="elevation")
+        try:
+            return [r['elevation'] for r in data['results']]
+        except (TypeError, KeyError):
+            return [None] * len(points)
+
+    def map(self, fn, items, window=None):
+        """Applies fn to items on a thread pool, yielding (item, result) in input order.
+
+        At most `window` tasks are queued at once, so memory stays bounded for large inputs.
+        """
+        window = window or self.max_in_flight * 2
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            pending = deque()
+            for item in items:
+                pending.append((item, pool.submit(fn, item)))
+                if len(pending) >= window:
+                    done_item, future = pending.popleft()
+                    yield done_item, future.result()
+            while pending:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+
+    def stats(self):
+        return {ep.url: dict(ep.stats, rate=round(ep.bucket.rate, 3))
+                for ep in self.endpoints + [self.elevation_endpoint]}
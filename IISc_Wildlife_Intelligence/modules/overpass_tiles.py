@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+from modules.overpass_client import FEATURE_QUERIES, SEARCH_RADIUS
+
+# --- CONFIGURATION ---
+CACHE_DIR = "data/overpass_cache"
+TILE_DEG = 0.1               # ~11 km tiles; one bbox query per (tile, feature type)
+MAX_PAIRS = 2_000_000        # point x element distances evaluated per numpy chunk
+
+# Same tag filters as the per-point FEATURE_QUERIES, over a bounding box instead of
+# an `around:` circle. Boxes are bigger than one circle, so the server timeout is too.
+TILE_QUERIES = {
+    feature_type: query.replace("around:{radius},{lat},{lon}", "{bbox}").replace("[timeout:25]", "[timeout:90]")
+    for feature_type, query in FEATURE_QUERIES.items()
+}
+
+
+# --- 1. CONTENT-ADDRESSED RESPONSE CACHE ---
+
+class OverpassCache:
+    """Overpass responses on disk, keyed by the sha256 of the query text.
+
+    <root>/<first 2 hex>/<sha256>.json.gz. The same query always maps to the same
+    file, so a rerun over the same tiles (or points) needs no network at all.
+    Failed requests (None) are never stored.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(query):
+        # Indentation/blank-line differences between templates do not change the answer
+        text = re.sub(r"\s+", " ", query).strip()
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json.gz")
+
+    def get(self, query):
+        """Cached response for `query`, or None on a miss."""
+        try:
+            with gzip.open(self.path(self.key(query)), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Missing, or a torn/corrupt file from a crash: treat as a miss and refetch
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return data
+
+    def put(self, query, data):
+        if data is None:
+            return
+        path = self.path(self.key(query))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique staging name: two threads may fetch the same query at once
+        partial = f"{path}.{os.getpid()}-{threading.get_ident()}.partial"
+        with gzip.open(partial, "wt", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(partial, path)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+# --- 2. TILES ---
+
+def tile_groups(lats, lons, tile_deg=TILE_DEG):
+    """[(row, col, positions)] for every occupied tile; positions index into lats/lons."""
+    rows = np.floor(np.asarray(lats, dtype=float) / tile_deg).astype(np.int64)
+    cols = np.floor(np.asarray(lons, dtype=float) / tile_deg).astype(np.int64)
+    keys, inverse = np.unique(np.column_stack([rows, cols]), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+    return [(int(r), int(c), positions) for (r, c), positions in zip(keys, np.split(order, bounds))]
+
+
+def tile_bbox(row, col, tile_deg=TILE_DEG, radius=SEARCH_RADIUS):
+    """(south, west, north, east) of the tile grown by `radius` metres on every side.
+
+    Uses the same flat-earth metres as distance_to_nearest, so every element within
+    `radius` of any point in the tile falls inside the box.
+    """
+    south, west = row * tile_deg, col * tile_deg
+    north, east = south + tile_deg, west + tile_deg
+    margin_lat = radius / 111000
+    margin_lon = radius / (111000 * math.cos(math.radians(min(89.0, max(abs(south), abs(north))))))
+    # Rounded outwards to 6 decimals so the query text (the cache key) is stable
+    return (math.floor((south - margin_lat) * 1e6) / 1e6, math.floor((west - margin_lon) * 1e6) / 1e6,
+            math.ceil((north + margin_lat) * 1e6) / 1e6, math.ceil((east + margin_lon) * 1e6) / 1e6)
+
+
+def tile_query(feature_type, bbox):
+    return TILE_QUERIES[feature_type].format(bbox=",".join(f"{v:.6f}" for v in bbox))
+
+
+# --- 3. DISTANCES ---
+
+def element_coords(data):
+    """(lats, lons) of the nodes and way/relation centers in an Overpass response."""
+    coords = []
+    for element in (data or {}).get('elements', []):
+        if 'lat' in element:
+            coords.append((element['lat'], element['lon']))
+        elif 'center' in element:
+            coords.append((element['center']['lat'], element['center']['lon']))
+    coords = np.array(coords, dtype=float).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1]
+
+
+def nearest_distances(lats, lons, el_lats, el_lons, radius=SEARCH_RADIUS):
+    """Per point, metres to the nearest element (capped at `radius`), as in OverpassClient.distance_to_nearest."""
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    out = np.full(len(lats), float(radius))
+    if len(el_lats) == 0:
+        return out
+    step = max(1, MAX_PAIRS // len(el_lats))
+    for start in range(0, len(lats), step):
+        lat = lats[start:start + step, None]
+        lon = lons[start:start + step, None]
+        d_lat = (el_lats[None, :] - lat) * 111000
+        d_lon = (el_lons[None, :] - lon) * 111000 * np.cos(np.radians(lat))
+        out[start:start + step] = np.minimum(radius, np.sqrt(d_lat ** 2 + d_lon ** 2).min(axis=1))
+    return np.round(out, 2)
+
+
+def iter_tile_distances(client, lats, lons, feature_types, tile_deg=TILE_DEG, radius=SEARCH_RADIUS):
+    """Yields (positions, {feature_type: distances}) one tile at a time.
+
+    One bbox query per (tile, feature type) replaces one `around:` query per
+    (point, feature type); queries run concurrently through client.map. A feature
+    type whose query failed comes back as NaN for that tile, so callers can retry it.
+    """
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    tiles = tile_groups(lats, lons, tile_deg)
+    tasks = [(t, feature_type, tile_query(feature_type, tile_bbox(row, col, tile_deg, radius)))
+             for t, (row, col, _) in enumerate(tiles) for feature_type in feature_types]
+
+    results = {}
+    # client.map keeps input order, so a tile's feature types arrive back to back
+    for (t, feature_type, _), data in client.map(lambda task: client.query(task[2]), tasks):
+        positions = tiles[t][2]
+        if data is None:
+            results[feature_type] = np.full(len(positions), np.nan)
+        else:
+            el_lats, el_lons = element_coords(data)
+            results[feature_type] = nearest_distances(lats[positions], lons[positions], el_lats, el_lons, radius)
+        if len(results) == len(feature_types):
+            yield positions, results
+            results = {}
+
+
+def tile_distances(client, lats, lons, feature_types, tile_deg=TILE_DEG, radius=SEARCH_RADIUS):
+    """{feature_type: distances for every point}, in input order (NaN where a tile query failed)."""
+    out = {feature_type: np.full(len(lats), np.nan) for feature_type in feature_types}
+    for positions, result in iter_tile_distances(client, lats, lons, feature_types, tile_deg, radius):
+        for feature_type, values in result.items():
+            out[feature_type][positions] = values
+    return out
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from modules.telemetry import span
+
+# --- CONFIGURATION ---
+STATE_FILE = "data/pipeline_state.json"
+LOG_DIR = "data/logs"
+HASH_BLOCK = 1 << 20
+
+# Local imports a stage's code hash follows ('from modules.dem import ...', 'from google_geocode import ...')
+IMPORT_PATTERN = re.compile(r"^\s*(?:from|import)\s+([\w.]+)", re.MULTILINE)
+
+
+class Stage:
+    """One pipeline step: a script plus the paths it reads and writes.
+
+    `optional` inputs are hashed when present but never block the stage
+    (e.g. DEM tiles, which every script falls back from). `params` is any extra
+    configuration that should trigger a re-run when it changes.
+    """
+
+    def __init__(self, name, script, inputs=(), outputs=(), optional=(), params=None):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.optional = list(optional)
+        self.params = params or {}
+
+
+# --- 1. FINGERPRINTS ---
+
+class Hasher:
+    """Content hashes of files and directories, memoized on (size, mtime) across runs."""
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else {}
+
+    def file(self, path):
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = self.memo.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        h = hashlib.md5()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                h.update(block)
+        self.memo[path] = [stamp, h.hexdigest()]
+        return h.hexdigest()
+
+    def path(self, path):
+        """md5 of a file, of a directory tree (relative paths + contents), or None if missing."""
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+        # Content-only, so a rebuilt Parquet store with new random file names but the
+        # same rows per partition still hashes the same
+        entries = []
+        for folder, _, files in os.walk(path):
+            rel = os.path.relpath(folder, path)
+            entries += [f"{rel}:{self.file(os.path.join(folder, name))}" for name in files
+                        if not name.endswith('.partial')]
+        return hashlib.md5("\n".join(sorted(entries)).encode()).hexdigest()
+
+
+def code_files(script, root="."):
+    """The script plus every project module it imports, transitively."""
+    seen, todo = [], [script]
+    while todo:
+        path = todo.pop()
+        if path in seen or not os.path.exists(os.path.join(root, path)):
+            continue
+        seen.append(path)
+        with open(os.path.join(root, path), encoding='utf-8') as f:
+            for name in IMPORT_PATTERN.findall(f.read()):
+                todo.append(name.replace('.', '/') + '.py')
+    return sorted(seen)
+
+
+def stage_key(stage, hasher, root="."):
+    """Hash of the stage's code, params and current input contents."""
+    parts = {
+        'code': {p: hasher.file(os.path.join(root, p)) for p in code_files(stage.script, root)},
+        'params': stage.params,
+        'inputs': {p: hasher.path(os.path.join(root, p)) for p in stage.inputs + stage.optional},
+    }
+    return hashlib.md5(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+# --- 2. GRAPH ---
+
+def dependencies(stages, include_optional=True):
+    """{stage name: set of upstream stage names}, from outputs feeding inputs."""
+    producer = {}
+    for stage in stages:
+        for out in stage.outputs:
+            if out in producer:
+                raise ValueError(f"'{out}' is written by both {producer[out]} and {stage.name}")
+            producer[out] = stage.name
+    return {s.name: {producer[p] for p in s.inputs + (s.optional if include_optional else [])
+                     if p in producer and producer[p] != s.name}
+            for s in stages}
+
+
+def select(stages, targets):
+    """`targets` plus everything upstream of them (all stages if no targets)."""
+    if not targets:
+        return stages
+    deps = dependencies(stages)
+    unknown = set(targets) - set(deps)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo += deps[name]
+    return [s for s in stages if s.name in wanted]
+
+
+# --- 3. RUNNER ---
+
+def load_state(path=STATE_FILE):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {'stages': {}, 'hashes': {}}
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".partial", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".partial", path)
+
+
+def run_stage(stage, root=".", log_dir=LOG_DIR):
+    """Runs the script in its own interpreter; stdout/stderr go to <log_dir>/<stage>.log."""
+    os.makedirs(os.path.join(root, log_dir), exist_ok=True)
+    log_path = os.path.join(root, log_dir, f"{stage.name}.log")
+    start = time.time()
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    with open(log_path, 'w', encoding='utf-8') as log, span(stage.name, script=stage.script):
+        code = subprocess.call([sys.executable, stage.script], cwd=root, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return code, time.time() - start, log_path
+
+
+def run_pipeline(stages, root=".", force=(), dry_run=False, workers=None, state_path=STATE_FILE, report=print):
+    """Runs every stale stage, independent ones in parallel.
+
+    A stage is up to date when its key (code + params + input hashes) matches the
+    last successful run and its outputs still hash to what that run produced.
+    Keys are computed when a stage becomes ready, i.e. after its upstream stages
+    finished, so an upstream re-run with identical output does not invalidate it.
+    Returns {stage name: 'ran' | 'fresh' | 'failed' | 'blocked' | 'stale'}.
+    """
+    state = load_state(os.path.join(root, state_path))
+    hasher = Hasher(state.setdefault('hashes', {}))
+    deps = dependencies(stages)
+    required = dependencies(stages, include_optional=False)
+    by_name = {s.name: s for s in stages}
+    status, keys, running = {}, {}, {}
+
+    def outputs_intact(stage, record):
+        return all(hasher.path(os.path.join(root, p)) == record['outputs'].get(p) for p in stage.outputs)
+
+    def start_ready(pool):
+        for stage in stages:
+            name = stage.name
+            if name in status or name in running.values():
+                continue
+            # Wait for every upstream stage; only a failed *required* one blocks this stage
+            if not all(u in status for u in deps[name] & set(by_name)):
+                continue
+            if any(status.get(u) in ('failed', 'blocked') for u in required[name]):
+                status[name] = 'blocked'
+                report(f"   ⛔ {name}: blocked by a failed upstream stage")
+                continue
+            missing = [p for p in stage.inputs if hasher.path(os.path.join(root, p)) is None]
+            if missing:
+                status[name] = 'blocked'
+                report(f"   ⛔ {name}: missing input {', '.join(missing)}")
+                continue
+
+            key = stage_key(stage, hasher, root)
+            record = state['stages'].get(name)
+            fresh = record and record['key'] == key and outputs_intact(stage, record)
+            # In a dry run an upstream stage that "would run" makes this one stale too
+            if fresh and name not in force and not any(status.get(u) == 'stale' for u in deps[name]):
+                status[name] = 'fresh'
+                report(f"   ✅ {name}: up to date")
+            elif dry_run:
+                status[name] = 'stale'
+                report(f"   🔁 {name}: would run")
+            else:
+                report(f"   ▶️ {name}: running {stage.script}")
+                keys[name] = key
+                running[pool.submit(run_stage, stage, root)] = name
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        start_ready(pool)
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = by_name[name]
+                code, seconds, log_path = future.result()
+                if code == 0:
+                    status[name] = 'ran'
+                    state['stages'][name] = {
+                        'key': keys[name],
+                        'outputs': {p: hasher.path(os.path.join(root, p)) for p in stage.outputs},
+                        'seconds': round(seconds, 2),
+                        'finished_at': time.time(),
+                    }
+                    save_state(state, os.path.join(root, state_path))
+                    report(f"   ✔️ {name}: done in {seconds:.1f}s")
+                else:
+                    status[name] = 'failed'
+                    report(f"   ❌ {name}: exit code {code} (see {log_path})")
+            start_ready(pool)
+
+    save_state(state, os.path.join(root, state_path))
+    return status
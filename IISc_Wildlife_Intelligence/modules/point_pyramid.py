@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Quadtree of equal-angle cells: level 0 cells are BASE_CELL_DEG wide and every
+# level halves them, so a level-k cell splits into exactly four level-(k+1) cells.
+BASE_CELL_DEG = 8.0
+MAX_LEVEL = 10              # 8° / 2^10 ~ 0.008° (~900 m)
+ORIGIN = (-90.0, -180.0)    # (lat, lon) of cell (0, 0)
+
+CELL_PIXELS = 48            # target on-screen width of one aggregate cell
+MAX_RAW_POINTS = 2000       # raw rows are sent only when the viewport holds fewer than this
+VIEWPORT_PIXELS = (1200, 700)
+
+
+# --- 1. CELL KEYS ---
+
+def cell_index(lats, lons, level):
+    """(row, col) of the level-`level` cell holding each point."""
+    size = BASE_CELL_DEG / 2 ** level
+    rows = np.floor((np.asarray(lats, dtype=np.float64) - ORIGIN[0]) / size).astype(np.int64)
+    cols = np.floor((np.asarray(lons, dtype=np.float64) - ORIGIN[1]) / size).astype(np.int64)
+    return rows, cols
+
+
+# --- 2. PRECOMPUTE (once per dataset) ---
+
+def build_point_pyramid(df, max_level=MAX_LEVEL, species_col='Animal', levels=None):
+    """Per-level counts and coordinate sums for every (cell, species).
+
+    Returns {level: DataFrame[row, col, species, count, lat_sum, lon_sum]} for
+    `levels` (default: 0..max_level). A level
+    never has more rows than incidents, and coarse levels shrink to a few hundred,
+    so aggregating a view later costs O(cells), not O(incidents).
+    """
+    points = df[['lat', 'lon', species_col]].dropna(subset=['lat', 'lon'])
+    species = points[species_col].astype(str).to_numpy()
+    pyramid = {}
+    for level in (levels if levels is not None else range(max_level + 1)):
+        rows, cols = cell_index(points['lat'], points['lon'], level)
+        frame = pd.DataFrame({
+            'row': rows, 'col': cols, 'species': species,
+            'lat': points['lat'].to_numpy(), 'lon': points['lon'].to_numpy(),
+        })
+        pyramid[level] = (frame.groupby(['row', 'col', 'species'], sort=False)
+                          .agg(count=('lat', 'size'), lat_sum=('lat', 'sum'), lon_sum=('lon', 'sum'))
+                          .reset_index())
+    return pyramid
+
+
+# --- 3. VIEW SELECTION ---
+
+def viewport_bounds(lat, lon, zoom, pixels=VIEWPORT_PIXELS):
+    """Approximate (south, west, north, east) a deck.gl map of `pixels` shows at this centre/zoom."""
+    deg_per_px = 360.0 / (512 * 2 ** zoom)
+    half_w = pixels[0] / 2 * deg_per_px
+    half_h = pixels[1] / 2 * deg_per_px * np.cos(np.radians(lat))
+    return lat - half_h, lon - half_w, lat + half_h, lon + half_w
+
+
+def level_for_zoom(zoom, max_level=MAX_LEVEL):
+    """Quadtree level whose cells are about CELL_PIXELS wide on screen at `zoom`."""
+    cell_deg = CELL_PIXELS * 360.0 / (512 * 2 ** zoom)
+    return int(np.clip(np.round(np.log2(BASE_CELL_DEG / cell_deg)), 0, max_level))
+
+
+def aggregate_view(pyramid, level, bounds=None, species=None):
+    """Cells of `level` inside `bounds` (for the selected species) with counts and species mix.
+
+    Each cell is placed at the centroid of its incidents. 'mix' is a readable
+    breakdown ('Leopard 12 · Tiger 3') and 'dominant' the most frequent species.
+    """
+    cells = pyramid[level]
+    if species is not None:
+        cells = cells[cells['species'].isin(list(species))]
+    if bounds is not None:
+        south, west, north, east = bounds
+        r0, c0 = cell_index(south, west, level)
+        r1, c1 = cell_index(north, east, level)
+        cells = cells[cells['row'].between(r0, r1) & cells['col'].between(c0, c1)]
+    if cells.empty:
+        return pd.DataFrame(columns=['lat', 'lon', 'count', 'dominant', 'mix'])
+
+    cells = cells.sort_values(['row', 'col', 'count'], ascending=[True, True, False])
+    grouped = cells.groupby(['row', 'col'], sort=False)
+    out = grouped.agg(count=('count', 'sum'), lat_sum=('lat_sum', 'sum'),
+                      lon_sum=('lon_sum', 'sum'), dominant=('species', 'first'))
+    labels = cells['species'] + " " + cells['count'].astype(str)
+    out['mix'] = labels.groupby([cells['row'], cells['col']], sort=False).agg(" · ".join)
+    out['lat'] = out['lat_sum'] / out['count']
+    out['lon'] = out['lon_sum'] / out['count']
+    return out.reset_index()[['lat', 'lon', 'count', 'dominant', 'mix']]
+
+
+def points_in_bounds(df, bounds):
+    south, west, north, east = bounds
+    return df[df['lat'].between(south, north) & df['lon'].between(west, east)]
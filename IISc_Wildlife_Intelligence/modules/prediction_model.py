@@ -1,4 +1,6 @@
 import numpy as np
+import pandas as pd
+from functools import lru_cache
 
 def calculate_habitat_suitability(row, season, species, demographic_profile="General"):
     score = 0
@@ -34,4 +36,99 @@ def calculate_habitat_suitability(row, season, species, demographic_profile="Gen
 
     # Normalize
     final_prob = max(0, min(score, 100)) / 100.0
-    return final_prob
\ No newline at end of file
+    return final_prob
+
+
+# --- BATCH ENGINE (Rule Tables) ---
+# The same logic as calculate_habitat_suitability, written as data so it can be
+# compiled into whole-array expressions. Each rule adds `score` where
+# `feature <op> threshold` holds and `else_score` where it does not.
+# `season` / `profile` restrict a rule; `except_profile` is the "else" branch.
+SPECIES = ["Sloth Bear", "Tiger", "Leopard", "Elephant"]
+SEASONS = ["Summer", "Monsoon", "Winter"]
+DEMOGRAPHIC_PROFILES = ["General", "Mother with Cubs"]
+
+SPECIES_RULES = {
+    "Sloth Bear": [
+        {'feature': 'vegetation_index', 'op': '>', 'threshold': 0.5, 'score': 20},
+        {'feature': 'proximity_to_rocky_outcrop', 'op': '<', 'threshold': 300, 'score': 60, 'profile': "Mother with Cubs"},
+        {'feature': 'proximity_to_village', 'op': '<', 'threshold': 800, 'score': -40, 'profile': "Mother with Cubs"},
+        {'feature': 'proximity_to_agriculture', 'op': '<', 'threshold': 300, 'score': 30, 'except_profile': "Mother with Cubs"},
+        {'feature': 'proximity_to_rocky_outcrop', 'op': '<', 'threshold': 1000, 'score': 20, 'except_profile': "Mother with Cubs"},
+    ],
+    "Tiger": [
+        {'feature': 'vegetation_index', 'op': '>', 'threshold': 0.7, 'score': 40},
+        {'feature': 'proximity_to_grassland', 'op': '<', 'threshold': 500, 'score': 30},
+        {'feature': 'proximity_to_water', 'op': '<', 'threshold': 500, 'score': 30, 'season': "Summer"},
+    ],
+    "Leopard": [
+        {'feature': 'vegetation_index', 'op': '>', 'threshold': 0.4, 'score': 20},
+        {'feature': 'proximity_to_village', 'op': '<', 'threshold': 500, 'score': 40},
+        {'feature': 'proximity_to_rocky_outcrop', 'op': '<', 'threshold': 500, 'score': 20},
+    ],
+    "Elephant": [
+        {'feature': 'proximity_to_water', 'op': '<', 'threshold': 1000, 'score': 50},
+        {'feature': 'slope_angle', 'op': '>', 'threshold': 30, 'score': -100, 'else_score': 20},
+        {'feature': 'proximity_to_agriculture', 'op': '<', 'threshold': 200, 'score': 40, 'season': "Winter"},
+    ],
+}
+
+_OPS = {'>': np.greater, '<': np.less}
+
+
+@lru_cache(maxsize=None)
+def compile_rules(species, season, demographic_profile="General"):
+    """Resolves season/profile conditions once, leaving (feature, op, threshold, score, else_score) tuples."""
+    compiled = []
+    for rule in SPECIES_RULES.get(species, []):
+        if 'season' in rule and rule['season'] != season:
+            continue
+        if 'profile' in rule and rule['profile'] != demographic_profile:
+            continue
+        if 'except_profile' in rule and rule['except_profile'] == demographic_profile:
+            continue
+        compiled.append((rule['feature'], _OPS[rule['op']], rule['threshold'],
+                         rule['score'], rule.get('else_score', 0)))
+    return tuple(compiled)
+
+
+def required_features(species=None):
+    """Feature columns the rule tables read (for one species or all of them)."""
+    names = SPECIES_RULES.keys() if species is None else [species]
+    return sorted({rule['feature'] for name in names for rule in SPECIES_RULES.get(name, [])})
+
+
+def calculate_habitat_suitability_batch(data, season, species, demographic_profile="General"):
+    """Vectorized calculate_habitat_suitability over whole columns.
+
+    `data` is a DataFrame or a dict of equal-length NumPy arrays (any shape, e.g. a raster).
+    Returns float64 suitability in [0, 1], identical to the scalar function per element.
+    """
+    rules = compile_rules(species, season, demographic_profile)
+    if isinstance(data, pd.DataFrame):
+        shape = (len(data),)
+    else:
+        shape = np.shape(next(iter(data.values())))
+
+    score = np.zeros(shape, dtype=np.int32)
+    for feature, op, threshold, points, else_points in rules:
+        # NaN compares False everywhere, exactly like the scalar `if`
+        mask = op(np.asarray(data[feature]), threshold)
+        if points:
+            np.add(score, points, out=score, where=mask)
+        if else_points:
+            np.add(score, else_points, out=score, where=~mask)
+
+    np.clip(score, 0, 100, out=score)
+    return score / 100.0
+
+
+def score_all_combinations(data, species_list=None, seasons=None, profiles=None):
+    """Scores every (species, season, profile) combination. Returns {(species, season, profile): array}."""
+    results = {}
+    for species in species_list or SPECIES:
+        for season in seasons or SEASONS:
+            for profile in profiles or DEMOGRAPHIC_PROFILES:
+                results[(species, season, profile)] = calculate_habitat_suitability_batch(
+                    data, season, species, profile)
+    return results
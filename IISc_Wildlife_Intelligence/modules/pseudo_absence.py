@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# --- CONFIGURATION ---
+EARTH_RADIUS = 6371000.0     # metres
+MIN_DISTANCE_M = 2000.0      # candidates are drawn in a ring around their anchor incident...
+MAX_DISTANCE_M = 8000.0      # ...(roughly the old +/-0.05 degree box)
+MIN_SEPARATION_M = 1000.0    # and rejected if this close to ANY recorded conflict
+MAX_ROUNDS = 8               # resampling rounds for rejected candidates
+
+
+# --- 1. GEOMETRY ---
+
+def unit_vectors(lat, lon):
+    """(n, 3) points on the unit sphere; chord length between them maps 1:1 to haversine distance."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_for_distance(metres):
+    return 2 * np.sin(np.asarray(metres) / (2 * EARTH_RADIUS))
+
+
+def destination(lat, lon, bearing, distance_m):
+    """Great-circle destination from (lat, lon) after `distance_m` along `bearing` (radians). Vectorized."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    delta = np.asarray(distance_m) / EARTH_RADIUS
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(bearing))
+    lon2 = lon1 + np.arctan2(np.sin(bearing) * np.sin(delta) * np.cos(lat1),
+                             np.cos(delta) - np.sin(lat1) * np.sin(lat2))
+    return np.degrees(lat2), (np.degrees(lon2) + 540) % 360 - 180
+
+
+def ring_offsets(lat, lon, rng, min_m=MIN_DISTANCE_M, max_m=MAX_DISTANCE_M):
+    """One point per anchor, uniform by area in the ring [min_m, max_m] around it."""
+    n = len(lat)
+    distance = np.sqrt(rng.uniform(min_m ** 2, max_m ** 2, n))
+    return destination(lat, lon, rng.uniform(0, 2 * np.pi, n), distance)
+
+
+# --- 2. SAMPLER ---
+
+def anchor_rows(n, k, rng, strata=None, balance=False):
+    """Positive row indices to anchor negatives on, K per positive.
+
+    With `strata` (one label per positive) and balance=True, the same K x n
+    negatives are spread evenly across strata (the remainder going to randomly
+    chosen strata), each drawn from its own positives with replacement, so rare
+    species/districts are not drowned out and the class ratio stays 1:K.
+    """
+    if strata is None or not balance:
+        return np.repeat(np.arange(n), k)
+    codes, _ = pd.factorize(pd.Series(strata).astype("string").fillna("Unknown"))
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes)
+    counts = np.full(len(sizes), (k * n) // len(sizes))
+    counts[rng.permutation(len(sizes))[:(k * n) % len(sizes)]] += 1
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    stratum = np.repeat(np.arange(len(sizes)), counts)
+    picks = (rng.random(len(stratum)) * sizes[stratum]).astype(np.int64) + starts[stratum]
+    return order[picks]
+
+
+def sample_pseudo_absences(lat, lon, k=1, strata=None, balance=False, rng=None,
+                           min_m=MIN_DISTANCE_M, max_m=MAX_DISTANCE_M,
+                           min_separation_m=MIN_SEPARATION_M, max_rounds=MAX_ROUNDS):
+    """K pseudo-absence points per positive (or per stratum, see anchor_rows).
+
+    Candidates are drawn for all anchors in one array operation; those within
+    `min_separation_m` of any positive (cKDTree over unit vectors, so the test is
+    an exact great-circle distance) are redrawn, up to `max_rounds` times, and
+    then dropped. Returns (neg_lat, neg_lon, anchor row index per negative).
+    """
+    rng = rng or np.random.default_rng()
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    anchors = anchor_rows(len(lat), k, rng, strata, balance)
+
+    tree = cKDTree(unit_vectors(lat, lon))
+    limit = chord_for_distance(min_separation_m)
+    neg_lat = np.empty(len(anchors))
+    neg_lon = np.empty(len(anchors))
+    pending = np.arange(len(anchors))
+    for _ in range(max_rounds):
+        if not pending.size:
+            break
+        cand_lat, cand_lon = ring_offsets(lat[anchors[pending]], lon[anchors[pending]], rng, min_m, max_m)
+        dist, _ = tree.query(unit_vectors(cand_lat, cand_lon), k=1, distance_upper_bound=limit, workers=-1)
+        ok = ~(dist < limit)
+        neg_lat[pending[ok]] = cand_lat[ok]
+        neg_lon[pending[ok]] = cand_lon[ok]
+        pending = pending[~ok]
+
+    keep = np.ones(len(anchors), dtype=bool)
+    keep[pending] = False
+    return neg_lat[keep], neg_lon[keep], anchors[keep]
@@ -0,0 +1,158 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules.temporal import SEASON_NAMES, seasonal_aggregates, with_temporal_columns
+
+# --- CONFIGURATION ---
+INDEX_COLUMNS = ['Animal', 'State', 'District']
+DATE_COLUMN = 'Date(dd/mm/yr)'
+
+# Columns with at most this many distinct values get one packed bitmap per value
+# (N/8 bytes each). Wider columns (districts) keep sorted row-id postings instead
+# and are turned into a bitmap only for the values a query selects.
+BITMAP_MAX_CARDINALITY = 256
+RESULT_CACHE_SIZE = 32
+
+
+class IncidentIndex:
+    """Filter index over the incident frame, built once per dataset load.
+
+    Each indexed column is stored as categorical codes plus per-value bitmaps
+    (or postings); seasons get one bitmap each and dates a sorted index. A query ANDs one packed
+    bitmap per active filter, so a widget change costs a few N/8-byte operations
+    and the frame itself is never copied when nothing is filtered out.
+    """
+
+    def __init__(self, df, columns=INDEX_COLUMNS, date_column=DATE_COLUMN):
+        self.df = with_temporal_columns(df.reset_index(drop=True), date_column)
+        self.n = len(self.df)
+        self.codes, self.categories, self.bitmaps, self.postings = {}, {}, {}, {}
+
+        for col in columns:
+            if col not in self.df.columns:
+                continue
+            codes, categories = pd.factorize(self.df[col].astype("string"), sort=True)
+            self.codes[col] = codes.astype(np.int32)
+            self.categories[col] = pd.Index(categories)
+            # Row ids grouped by code (stable sort keeps them ascending inside a group)
+            order = np.argsort(codes, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            if len(categories) <= BITMAP_MAX_CARDINALITY:
+                self.bitmaps[col] = [self._pack(order[bounds[k]:bounds[k + 1]]) for k in range(len(categories))]
+            else:
+                self.postings[col] = [order[bounds[k]:bounds[k + 1]] for k in range(len(categories))]
+
+        # Sorted date index: undated rows (NaT) sort last and never match a range
+        dates = self.df['incident_date'].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        self.date_order = np.argsort(dates, kind="stable")
+        self.sorted_dates = dates[self.date_order]
+        self.dated = int((~np.isnat(dates)).sum())
+
+        # Seasons: one bitmap per season code, plus per-(season, species) aggregates
+        seasons = self.df['season'].to_numpy(dtype=np.int8)
+        self.season_bitmaps = [np.packbits(seasons == k) for k in range(len(SEASON_NAMES))]
+        self.season_summary = seasonal_aggregates(
+            seasons, self.df['Animal'] if 'Animal' in self.df.columns else [None] * self.n, dates
+        )
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()   # one index is shared by every browser session
+
+    # --- BITMAPS ---
+
+    def _pack(self, rows):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def _column_bitmap(self, col, selected):
+        """OR of the selected values' bitmaps; None when the filter keeps every row."""
+        if col not in self.categories or selected is None:
+            return None
+        positions = self.categories[col].get_indexer(pd.Index(list(selected), dtype="string"))
+        positions = np.unique(positions[positions >= 0])
+        if len(positions) == len(self.categories[col]):
+            return None
+        if col in self.bitmaps:
+            out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+            for k in positions:
+                np.bitwise_or(out, self.bitmaps[col][k], out=out)
+            return out
+        rows = np.concatenate([self.postings[col][k] for k in positions]) if len(positions) else []
+        return self._pack(rows)
+
+    def _season_bitmap(self, seasons):
+        if seasons is None:
+            return None
+        codes = sorted(set(int(c) for c in seasons if 0 <= int(c) < len(SEASON_NAMES)))
+        out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for k in codes:
+            np.bitwise_or(out, self.season_bitmaps[k], out=out)
+        return out
+
+    def _date_bitmap(self, date_range):
+        if date_range is None:
+            return None
+        start, end = (np.datetime64(pd.Timestamp(d).date(), "D") for d in date_range)
+        lo = np.searchsorted(self.sorted_dates[:self.dated], start, side="left")
+        hi = np.searchsorted(self.sorted_dates[:self.dated], end, side="right")
+        if lo == 0 and hi == self.n:
+            return None
+        return self._pack(self.date_order[lo:hi])
+
+    # --- QUERIES ---
+
+    def values(self, col):
+        """Sorted distinct values of an indexed column (for the sidebar widgets)."""
+        return self.categories[col].tolist() if col in self.categories else []
+
+    def date_bounds(self):
+        """(first, last) incident date, or None if no row has a readable date."""
+        if not self.dated:
+            return None
+        return (pd.Timestamp(self.sorted_dates[0]).date(), pd.Timestamp(self.sorted_dates[self.dated - 1]).date())
+
+    def season_view(self, season, species=None):
+        """Precomputed per-species counts for one season (no scan of the incidents)."""
+        view = self.season_summary[self.season_summary['season'] == SEASON_NAMES[season]]
+        if species is not None:
+            view = view[view['species'].isin(list(species))]
+        return view.sort_values('incidents', ascending=False)
+
+    def select(self, species=None, states=None, districts=None, date_range=None, seasons=None):
+        """Row positions matching every active filter, or None if no filter removes anything.
+
+        A filter given as None is inactive; an empty list matches nothing.
+        `seasons` holds season codes (temporal.SEASON_NAMES indices).
+        """
+        masks = [m for m in (self._column_bitmap('Animal', species),
+                             self._column_bitmap('State', states),
+                             self._column_bitmap('District', districts),
+                             self._date_bitmap(date_range),
+                             self._season_bitmap(seasons)) if m is not None]
+        if not masks:
+            return None
+        combined = masks[0] if len(masks) == 1 else np.bitwise_and.reduce(masks)
+        return np.flatnonzero(np.unpackbits(combined, count=self.n))
+
+    def query(self, species=None, states=None, districts=None, date_range=None, seasons=None):
+        """Filtered frame. Unfiltered queries return the indexed frame itself (no copy);
+        recent filter combinations are memoized, so reruns with unchanged widgets are free.
+        Results are shared between reruns and sessions: treat them as read-only.
+        """
+        key = tuple(None if v is None else tuple(sorted(map(str, v)))
+                    for v in (species, states, districts, date_range, seasons))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        rows = self.select(species, states, districts, date_range, seasons)
+        result = self.df if rows is None else self.df.take(rows)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > RESULT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,334 @@
+import json
+import os
+import zlib
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from modules.dem import DEMSampler
+from modules.osm_index import OSM_INDEX_FILE, distance_to_nearest, index_version, load_index
+from modules.prediction_model import (
+    DEMOGRAPHIC_PROFILES, SEASONS, SPECIES, calculate_habitat_suitability_batch, required_features
+)
+
+# --- CONFIGURATION ---
+RASTER_DIR = "data/rasters"
+FEATURE_DIR = os.path.join(RASTER_DIR, "features")
+SUITABILITY_DIR = os.path.join(RASTER_DIR, "suitability")
+
+# (south, west, north, east) - mainland India plus a margin
+INDIA_BOUNDS = (6.5, 68.0, 37.5, 97.5)
+DEFAULT_RESOLUTION = 0.02   # degrees (~2 km)
+STRIP_ROWS = 512            # rows scored per pass, keeps memory flat at fine resolutions
+
+# Every layer a grid consumer may ask for, with the range used when simulating it
+FEATURE_RANGES = {
+    'vegetation_index': (0.0, 1.0),
+    'proximity_to_water': (0.0, 3000.0),
+    'proximity_to_forest': (0.0, 3000.0),
+    'proximity_to_village': (0.0, 3000.0),
+    'proximity_to_agriculture': (0.0, 3000.0),
+    'proximity_to_grassland': (0.0, 3000.0),
+    'proximity_to_rocky_outcrop': (0.0, 3000.0),
+    'slope_angle': (0.0, 45.0),
+    'elevation': (0.0, 2500.0),
+}
+
+# Layers that come from real terrain when DEM tiles are available
+DEM_LAYERS = {'slope_angle': 'slope', 'elevation': 'elevation'}
+# Layers computed from the OSM feature index (build_osm_index.py) when it exists:
+# metres from each cell centre to the nearest feature, capped like the training features
+OSM_LAYERS = {'proximity_to_water': 'water', 'proximity_to_forest': 'forest', 'proximity_to_village': 'village'}
+
+
+# --- 1. GRID GEOMETRY ---
+# Row 0 is the northern edge (image order), column 0 the western edge.
+
+def make_grid(bounds=INDIA_BOUNDS, res=DEFAULT_RESOLUTION):
+    south, west, north, east = bounds
+    return {
+        'south': south, 'west': west, 'north': north, 'east': east, 'res': res,
+        'rows': int(round((north - south) / res)),
+        'cols': int(round((east - west) / res)),
+    }
+
+
+def cell_centers(grid, rows=slice(None), cols=slice(None)):
+    """Returns 2-D (lat, lon) arrays of cell centres for a row/column window."""
+    r = np.arange(grid['rows'])[rows]
+    c = np.arange(grid['cols'])[cols]
+    lat = grid['north'] - (r + 0.5) * grid['res']
+    lon = grid['west'] + (c + 0.5) * grid['res']
+    return np.meshgrid(lat, lon, indexing='ij')
+
+
+def window_for_bounds(grid, bounds):
+    """Clips (south, west, north, east) to the grid and returns (row0, row1, col0, col1)."""
+    south, west, north, east = bounds
+    r0 = int(np.floor((grid['north'] - north) / grid['res']))
+    r1 = int(np.ceil((grid['north'] - south) / grid['res']))
+    c0 = int(np.floor((west - grid['west']) / grid['res']))
+    c1 = int(np.ceil((east - grid['west']) / grid['res']))
+    r0, r1 = max(r0, 0), min(r1, grid['rows'])
+    c0, c1 = max(c0, 0), min(c1, grid['cols'])
+    return r0, max(r1, r0), c0, max(c1, c0)
+
+
+def window_bounds(grid, r0, r1, c0, c1):
+    north = grid['north'] - r0 * grid['res']
+    south = grid['north'] - r1 * grid['res']
+    west = grid['west'] + c0 * grid['res']
+    east = grid['west'] + c1 * grid['res']
+    return south, west, north, east
+
+
+def overview_grid(grid, level):
+    """Grid of pyramid level `level` (each level halves the resolution)."""
+    factor = 2 ** level
+    out = dict(grid)
+    out['res'] = grid['res'] * factor
+    out['rows'] = -(-grid['rows'] // factor)
+    out['cols'] = -(-grid['cols'] // factor)
+    # Keep the north-west corner fixed; the last row/col may overhang slightly
+    out['south'] = grid['north'] - out['rows'] * out['res']
+    out['east'] = grid['west'] + out['cols'] * out['res']
+    return out
+
+
+# --- 2. FEATURE LAYERS ---
+
+def _smooth_noise(coarse, row0, rows, cols, cell=25):
+    """Spatially coherent noise in [0, 1]: rows [row0, row0+rows) of a bilinearly upsampled lattice."""
+    y = np.arange(row0, row0 + rows) / cell
+    x = np.arange(cols) / cell
+    y0, x0 = y.astype(int), x.astype(int)
+    fy, fx = (y - y0)[:, None], (x - x0)[None, :]
+    top = coarse[y0][:, x0] * (1 - fx) + coarse[y0][:, x0 + 1] * fx
+    bottom = coarse[y0 + 1][:, x0] * (1 - fx) + coarse[y0 + 1][:, x0 + 1] * fx
+    return (top * (1 - fy) + bottom * fy).astype(np.float32)
+
+
+def feature_path(name, feature_dir=FEATURE_DIR):
+    return os.path.join(feature_dir, f"{name}.npy")
+
+
+def source_path(name, feature_dir=FEATURE_DIR):
+    return os.path.join(feature_dir, f"{name}.source.json")
+
+
+def read_source(name, feature_dir=FEATURE_DIR):
+    """Provenance sidecar of a layer written by load_feature_layers, or None for a hand-supplied product.
+
+    {'source': 'simulated' | 'dem' | 'dem+simulated' | 'osm', 'simulated_fraction', 'inputs'}
+    """
+    path = source_path(name, feature_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_source(name, feature_dir, source):
+    path = source_path(name, feature_dir)
+    with open(path + ".partial", "w") as f:
+        json.dump(source, f, indent=2)
+    os.replace(path + ".partial", path)
+
+
+def _layer_inputs(name, dem):
+    """What a generated layer was derived from; a change means it must be rebuilt."""
+    if name in DEM_LAYERS:
+        return {'dem': dem.layer_version(DEM_LAYERS[name]) if dem and dem.has_layer(DEM_LAYERS[name]) else None}
+    if name in OSM_LAYERS:
+        return {'osm': index_version(OSM_INDEX_FILE)}
+    return {}
+
+
+def simulated_layers(names, feature_dir=FEATURE_DIR):
+    """{layer: fraction of cells simulated} for the generated layers among `names` that are not fully real."""
+    out = {}
+    for name in names:
+        source = read_source(name, feature_dir)
+        if source is not None and source.get('simulated_fraction', 0) > 0:
+            out[name] = source['simulated_fraction']
+    return out
+
+
+def load_feature_layers(grid, names=None, feature_dir=FEATURE_DIR, simulate_missing=True, dem=None):
+    """Memory-maps `<feature_dir>/<name>.npy` for each layer on `grid`.
+
+    Layers that do not exist yet are derived from DEM tiles where possible (slope,
+    elevation) or from the OSM feature index (water / forest / village proximity);
+    anything still missing (no satellite product ingested) is simulated with seeded
+    smooth noise and written, so every run sees the same surface.
+    Generated layers carry a `<name>.source.json` sidecar and are rebuilt when the
+    DEM or OSM index they came from changes (e.g. tiles imported after a simulated
+    build). A layer without a sidecar is a real product supplied by hand and is used
+    as is, except for DEM/OSM-derivable layers, which this function always owns.
+    With simulate_missing=False nothing is written: missing layers raise.
+    """
+    dem = DEMSampler() if dem is None else dem
+    layers = {}
+    for name in names or list(FEATURE_RANGES):
+        path = feature_path(name, feature_dir)
+        inputs = _layer_inputs(name, dem)
+        if os.path.exists(path):
+            arr = np.load(path, mmap_mode='r')
+            if arr.shape == (grid['rows'], grid['cols']):
+                source = read_source(name, feature_dir)
+                # No sidecar: a hand-supplied product (derivable layers are always generated here)
+                fresh = (source.get('inputs') == inputs if source is not None
+                         else name not in DEM_LAYERS and name not in OSM_LAYERS)
+                if fresh or not simulate_missing:
+                    layers[name] = arr
+                    continue
+        if not simulate_missing:
+            raise FileNotFoundError(f"Feature layer '{path}' missing or not on this grid.")
+        lo, hi = FEATURE_RANGES[name]
+        rng = np.random.default_rng(zlib.crc32(name.encode()))
+        coarse = rng.random((grid['rows'] // 25 + 2, grid['cols'] // 25 + 2))
+        osm = load_index(OSM_INDEX_FILE) if inputs.get('osm') else None
+        os.makedirs(feature_dir, exist_ok=True)
+        out = open_memmap(path, mode='w+', dtype=np.float32, shape=(grid['rows'], grid['cols']))
+        simulated = 0
+        for r0 in range(0, grid['rows'], STRIP_ROWS):
+            n = min(STRIP_ROWS, grid['rows'] - r0)
+            if osm is not None:
+                lat, lon = cell_centers(grid, slice(r0, r0 + n))
+                out[r0:r0 + n] = distance_to_nearest(osm, lat, lon, OSM_LAYERS[name])
+                continue
+            strip = lo + _smooth_noise(coarse, r0, n, grid['cols']) * (hi - lo)
+            if inputs.get('dem'):
+                lat, lon = cell_centers(grid, slice(r0, r0 + n))
+                terrain = dem.sample(lat, lon, DEM_LAYERS[name])
+                simulated += int(np.isnan(terrain).sum())
+                strip = np.where(np.isnan(terrain), strip, terrain)
+            else:
+                simulated += strip.size
+            out[r0:r0 + n] = strip
+        out.flush()
+        fraction = simulated / (grid['rows'] * grid['cols'])
+        _write_source(name, feature_dir, {
+            'source': ('osm' if osm is not None else 'simulated' if fraction == 1
+                       else 'dem' if fraction == 0 else 'dem+simulated'),
+            'simulated_fraction': round(fraction, 4),
+            'inputs': inputs,
+        })
+        layers[name] = np.load(path, mmap_mode='r')
+    return layers
+
+
+def feature_version(feature_dir=FEATURE_DIR, names=None):
+    """Cheap fingerprint of the feature layers (size + mtime), used to invalidate caches."""
+    parts = []
+    for name in sorted(names or FEATURE_RANGES):
+        path = feature_path(name, feature_dir)
+        if os.path.exists(path):
+            st = os.stat(path)
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+    return f"{zlib.crc32('|'.join(parts).encode()):08x}"
+
+
+# --- 3. SUITABILITY PYRAMID ---
+
+def _slug(text):
+    return text.lower().replace(' ', '_')
+
+
+def combo_dir(species, season, profile, root=SUITABILITY_DIR):
+    return os.path.join(root, f"{_slug(species)}__{_slug(season)}__{_slug(profile)}")
+
+
+def downsample_level(level_arr, out_path):
+    """2x2 mean of a uint8 level into the next overview level (NaN-free, edge-padded)."""
+    rows, cols = level_arr.shape
+    out = open_memmap(out_path, mode='w+', dtype=np.uint8, shape=(-(-rows // 2), -(-cols // 2)))
+    for r0 in range(0, rows, STRIP_ROWS * 2):
+        block = np.asarray(level_arr[r0:r0 + STRIP_ROWS * 2], dtype=np.float32)
+        if block.shape[0] % 2:
+            block = np.vstack([block, block[-1:]])
+        if block.shape[1] % 2:
+            block = np.hstack([block, block[:, -1:]])
+        pooled = block.reshape(block.shape[0] // 2, 2, block.shape[1] // 2, 2).mean(axis=(1, 3))
+        out[r0 // 2:r0 // 2 + pooled.shape[0]] = np.rint(pooled).astype(np.uint8)
+    out.flush()
+    return out
+
+
+def build_suitability_pyramid(grid, layers, root=SUITABILITY_DIR, min_level_cells=256, feature_dir=FEATURE_DIR):
+    """Scores every (species, season, profile) on `grid` and writes level_0..level_N as uint8 percent.
+
+    Layers that are (partly) simulated are listed in the manifest's 'simulated_layers'.
+    """
+    os.makedirs(root, exist_ok=True)
+    levels = 1
+    while max(overview_grid(grid, levels - 1)['rows'], overview_grid(grid, levels - 1)['cols']) > min_level_cells:
+        levels += 1
+
+    combos = []
+    for species in SPECIES:
+        needed = required_features(species)
+        for season in SEASONS:
+            for profile in DEMOGRAPHIC_PROFILES:
+                out_dir = combo_dir(species, season, profile, root)
+                os.makedirs(out_dir, exist_ok=True)
+                base = open_memmap(os.path.join(out_dir, "level_0.npy"), mode='w+',
+                                   dtype=np.uint8, shape=(grid['rows'], grid['cols']))
+                for r0 in range(0, grid['rows'], STRIP_ROWS):
+                    strip = {name: layers[name][r0:r0 + STRIP_ROWS] for name in needed}
+                    prob = calculate_habitat_suitability_batch(strip, season, species, profile)
+                    base[r0:r0 + STRIP_ROWS] = np.rint(prob * 100).astype(np.uint8)
+                base.flush()
+
+                current = base
+                for level in range(1, levels):
+                    current = downsample_level(current, os.path.join(out_dir, f"level_{level}.npy"))
+                combos.append({'species': species, 'season': season, 'profile': profile,
+                               'path': os.path.relpath(out_dir, root)})
+
+    manifest = {
+        'grid': grid,
+        'levels': [overview_grid(grid, level) for level in range(levels)],
+        'combos': combos,
+        'feature_version': feature_version(feature_dir),
+        'simulated_layers': simulated_layers(required_features(), feature_dir),
+    }
+    with open(os.path.join(root, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(root=SUITABILITY_DIR):
+    path = os.path.join(root, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def pick_level(manifest, bounds, max_cells=250_000):
+    """Finest level whose window over `bounds` stays under `max_cells` cells."""
+    for level, grid in enumerate(manifest['levels']):
+        r0, r1, c0, c1 = window_for_bounds(grid, bounds)
+        if (r1 - r0) * (c1 - c0) <= max_cells:
+            return level
+    return len(manifest['levels']) - 1
+
+
+def read_suitability_window(species, season, profile, bounds, max_cells=250_000, root=SUITABILITY_DIR):
+    """Slice-reads the viewport window from the right overview level.
+
+    Returns (probability array in [0, 1], (south, west, north, east) of the window), or None
+    if the pyramid has not been built.
+    """
+    manifest = load_manifest(root)
+    if manifest is None:
+        return None
+    level = pick_level(manifest, bounds, max_cells)
+    grid = manifest['levels'][level]
+    path = os.path.join(combo_dir(species, season, profile, root), f"level_{level}.npy")
+    if not os.path.exists(path):
+        return None
+    r0, r1, c0, c1 = window_for_bounds(grid, bounds)
+    arr = np.load(path, mmap_mode='r')[r0:r1, c0:c1]
+    return arr / 100.0, window_bounds(grid, r0, r1, c0, c1)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from modules.model_registry import load_model
+from modules.raster_grid import (
+    FEATURE_DIR, RASTER_DIR, downsample_level, load_feature_layers, overview_grid, pick_level,
+    simulated_layers, window_bounds, window_for_bounds
+)
+
+# --- CONFIGURATION ---
+RISK_DIR = os.path.join(RASTER_DIR, "risk")
+MODEL_FILE = "data/wildlife_model.pkl"   # used only when nothing is in the model registry
+
+# Model feature -> raster layer it is read from (same units: metres)
+MODEL_FEATURE_LAYERS = {
+    'elevation': 'elevation',
+    'dist_water': 'proximity_to_water',
+    'dist_forest': 'proximity_to_forest',
+    'dist_village': 'proximity_to_village',
+}
+
+TILE_CELLS = 256          # tiles are TILE_CELLS x TILE_CELLS grid cells
+CHUNK_CELLS = 65_536      # cells per predict_proba call inside a worker (bounded memory)
+MIN_LEVEL_CELLS = 256     # stop adding overview levels below this size
+
+
+# --- 1. TILES ---
+
+def tile_windows(grid, tile_cells=TILE_CELLS):
+    """(tile id, (r0, r1, c0, c1)) for every tile of the grid."""
+    for r0 in range(0, grid['rows'], tile_cells):
+        for c0 in range(0, grid['cols'], tile_cells):
+            yield f"{r0 // tile_cells}_{c0 // tile_cells}", (
+                r0, min(r0 + tile_cells, grid['rows']), c0, min(c0 + tile_cells, grid['cols']))
+
+
+def tile_key(layers, window, feature_columns, model_version):
+    """Fingerprint of everything a tile's probabilities depend on."""
+    r0, r1, c0, c1 = window
+    h = hashlib.md5(f"{model_version}|{feature_columns}".encode())
+    for col in feature_columns:
+        h.update(np.ascontiguousarray(layers[MODEL_FEATURE_LAYERS[col]][r0:r1, c0:c1]).tobytes())
+    return h.hexdigest()
+
+
+# --- 2. WORKERS ---
+# Each worker process loads the model and memory-maps the feature layers once;
+# tiles then only ship their window coordinates in and a uint8 array out.
+
+_worker = {}
+
+
+def _init_worker(version, grid, feature_dir):
+    model = load_model(version)
+    if model is None:
+        model = joblib.load(MODEL_FILE)
+    _worker['model'] = model
+    _worker['positive'] = list(model.classes_).index(1) if 1 in list(model.classes_) else -1
+    _worker['layers'] = load_feature_layers(grid, list(MODEL_FEATURE_LAYERS.values()), feature_dir,
+                                            simulate_missing=False)
+
+
+def _score_tile(window, feature_columns, chunk_cells=CHUNK_CELLS):
+    """Conflict probability (uint8 percent) for one tile window."""
+    r0, r1, c0, c1 = window
+    model, layers = _worker['model'], _worker['layers']
+    columns = [np.asarray(layers[MODEL_FEATURE_LAYERS[col]][r0:r1, c0:c1], dtype=np.float64).ravel()
+               for col in feature_columns]
+    n = columns[0].size
+    out = np.empty(n, dtype=np.uint8)
+    for start in range(0, n, chunk_cells):
+        X = np.column_stack([c[start:start + chunk_cells] for c in columns])
+        if hasattr(model, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=model.feature_names_in_)
+        proba = model.predict_proba(X)[:, _worker['positive']]
+        out[start:start + chunk_cells] = np.rint(proba * 100).astype(np.uint8)
+    return out.reshape(r1 - r0, c1 - c0)
+
+
+# --- 3. BUILD ---
+
+def load_manifest(root=RISK_DIR):
+    path = os.path.join(root, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_risk_surface(grid, version=None, root=RISK_DIR, feature_dir=FEATURE_DIR, workers=None, report=print):
+    """Scores every grid cell with the trained model and writes level_0..level_N (uint8 percent).
+
+    Only tiles whose feature windows or model version changed since the last build
+    are recomputed; unchanged tiles keep their cells in the existing level_0.
+    Raises FileNotFoundError if the model or a feature layer is missing.
+    Inputs that are (partly) simulated rather than derived from DEM tiles / the OSM
+    index are listed in the manifest's 'simulated_layers' so readers can label them.
+    Returns (manifest, number of tiles recomputed).
+    """
+    model = load_model(version)
+    if model is not None:
+        model_version, feature_columns = model.manifest['version'], model.feature_columns
+    elif os.path.exists(MODEL_FILE):
+        model_version, feature_columns = f"pkl-{os.path.getmtime(MODEL_FILE):.0f}", list(MODEL_FEATURE_LAYERS)
+    else:
+        raise FileNotFoundError("No trained model: run train_model.py first.")
+
+    # Read-only: the layers are built by build_feature_layers.py (the 'feature_layers' stage)
+    layers = load_feature_layers(grid, list(MODEL_FEATURE_LAYERS.values()), feature_dir, simulate_missing=False)
+    simulated = simulated_layers(MODEL_FEATURE_LAYERS.values(), feature_dir)
+    for name, fraction in simulated.items():
+        report(f"   ⚠️ '{name}' is simulated on {fraction:.0%} of cells (no DEM tiles / OSM index for it)")
+    os.makedirs(root, exist_ok=True)
+    base_path = os.path.join(root, "level_0.npy")
+    previous = load_manifest(root)
+    reuse = (previous is not None and previous['grid'] == grid and os.path.exists(base_path))
+    old_keys = previous['tiles'] if reuse else {}
+
+    keys, todo = {}, []
+    for tile_id, window in tile_windows(grid):
+        keys[tile_id] = tile_key(layers, window, feature_columns, model_version)
+        if old_keys.get(tile_id) != keys[tile_id]:
+            todo.append(window)
+    report(f"   🧩 {len(keys)} tiles, {len(todo)} to score with model {model_version}")
+
+    base = (np.load(base_path, mmap_mode='r+') if reuse
+            else open_memmap(base_path, mode='w+', dtype=np.uint8, shape=(grid['rows'], grid['cols'])))
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(version, grid, feature_dir)) as pool:
+            for done, (window, probs) in enumerate(
+                    zip(todo, pool.map(_score_tile, todo, [feature_columns] * len(todo))), 1):
+                r0, r1, c0, c1 = window
+                base[r0:r1, c0:c1] = probs
+                if done % 10 == 0 or done == len(todo):
+                    report(f"   ✔️ {done}/{len(todo)} tiles")
+        base.flush()
+
+    levels = 1
+    while max(overview_grid(grid, levels - 1)['rows'], overview_grid(grid, levels - 1)['cols']) > MIN_LEVEL_CELLS:
+        levels += 1
+    if todo or not reuse:
+        current = base
+        for level in range(1, levels):
+            current = downsample_level(current, os.path.join(root, f"level_{level}.npy"))
+
+    manifest = {
+        'grid': grid,
+        'levels': [overview_grid(grid, level) for level in range(levels)],
+        'model_version': model_version,
+        'feature_columns': feature_columns,
+        'simulated_layers': simulated,
+        'tiles': keys,
+    }
+    with open(os.path.join(root, "manifest.json.partial"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(root, "manifest.json.partial"), os.path.join(root, "manifest.json"))
+    return manifest, len(todo)
+
+
+# --- 4. READER ---
+
+def read_risk_window(bounds, max_cells=250_000, root=RISK_DIR):
+    """(probability array in [0, 1], window bounds) for the viewport, or None if not built."""
+    manifest = load_manifest(root)
+    if manifest is None:
+        return None
+    level = pick_level(manifest, bounds, max_cells)
+    grid = manifest['levels'][level]
+    path = os.path.join(root, f"level_{level}.npy")
+    if not os.path.exists(path):
+        return None
+    r0, r1, c0, c1 = window_for_bounds(grid, bounds)
+    arr = np.load(path, mmap_mode='r')[r0:r1, c0:c1]
+    return arr / 100.0, window_bounds(grid, r0, r1, c0, c1)
@@ -0,0 +1,185 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+
+# --- CONFIGURATION ---
+SEED = 42
+CHUNK_ROWS = 1_000_000       # rows generated (and held in memory) at a time
+START_DATE = "2020-01-01"
+END_DATE = "2024-12-31"
+JITTER_DEG = 0.1             # spreads points ~10km around their hotspot so they don't stack
+
+# --- SCIENTIFIC HOTSPOTS (Where do these animals actually live?) ---
+HOTSPOTS = {
+    'Sloth Bear': [
+        {'District': 'Koppal', 'State': 'Karnataka', 'Coords': [15.35, 76.15]},
+        {'District': 'Banaskantha', 'State': 'Gujarat', 'Coords': [24.30, 72.20]},
+        {'District': 'Balaghat', 'State': 'Madhya Pradesh', 'Coords': [21.81, 80.18]},
+        {'District': 'Dhenkanal', 'State': 'Odisha', 'Coords': [20.64, 85.59]}
+    ],
+    'Tiger': [
+        {'District': 'Mysuru', 'State': 'Karnataka', 'Coords': [12.29, 76.63]}, # Bandipur area
+        {'District': 'Chandrapur', 'State': 'Maharashtra', 'Coords': [19.96, 79.29]}, # Tadoba area
+        {'District': 'Nainital', 'State': 'Uttarakhand', 'Coords': [29.38, 79.46]}  # Corbett area
+    ],
+    'Elephant': [
+        {'District': 'Kodagu', 'State': 'Karnataka', 'Coords': [12.42, 75.73]},
+        {'District': 'Angul', 'State': 'Odisha', 'Coords': [20.83, 85.15]},
+        {'District': 'Coimbatore', 'State': 'Tamil Nadu', 'Coords': [11.01, 76.95]}
+    ],
+    'Leopard': [
+        {'District': 'Mumbai Suburban', 'State': 'Maharashtra', 'Coords': [19.07, 72.87]}, # Aarey Colony
+        {'District': 'Mandya', 'State': 'Karnataka', 'Coords': [12.52, 76.89]},
+        {'District': 'Guwahati', 'State': 'Assam', 'Coords': [26.14, 91.73]}
+    ]
+}
+
+# Elephants/Tigers cause more fatalities than Leopards
+DEATH_RATE = {'Tiger': 0.4, 'Elephant': 0.4, 'Sloth Bear': 0.1, 'Leopard': 0.1}
+
+# Simulated environment: (mean, sd, floor) per feature for conflict (1) and safe (0) sites
+FEATURE_PROFILES = {
+    'dist_forest': {1: (400, 300, 0), 0: (3000, 1500, 500)},     # conflicts happen CLOSE to forest
+    'dist_water': {1: (500, 400, 0), 0: (2000, 1000, 200)},      # animals need water
+    'dist_village': {1: (300, 200, 0), 0: (1500, 1000, 0)},      # the village/forest interface
+    'elevation': {1: (600, 150, 200), 0: (300, 100, 100)},       # bears/leopards prefer rocky hills
+}
+
+# Fixed load-test corpus: same seed, size and chunking -> byte-identical file
+BENCHMARK_ROWS = 1_000_000
+BENCHMARK_FILE = "data/bench/synthetic_incidents.parquet"
+
+
+# --- 1. LOOKUP TABLES ---
+
+def hotspot_table(hotspots=HOTSPOTS, species_mix=None):
+    """Flat arrays for the hotspot set; a species is weighted by `species_mix` (default: equal)."""
+    species = list(hotspots)
+    mix = np.array([(species_mix or {}).get(s, 0.0 if species_mix else 1.0) for s in species], dtype=float)
+    if mix.sum() <= 0:
+        raise ValueError("species_mix gives no weight to any species in the hotspot set")
+    rows = [(i, h) for i, s in enumerate(species) for h in hotspots[s]]
+    return {
+        'species': np.array(species, dtype=object),
+        'species_p': mix / mix.sum(),
+        'death_rate': np.array([DEATH_RATE.get(s, 0.1) for s in species]),
+        'owner': np.array([i for i, _ in rows]),
+        'district': np.array([h['District'] for _, h in rows], dtype=object),
+        'state': np.array([h['State'] for _, h in rows], dtype=object),
+        'coords': np.array([h['Coords'] for _, h in rows], dtype=float),
+    }
+
+
+def date_strings(start=START_DATE, end=END_DATE):
+    """Every date in the range as 'dd/mm/YYYY' (a few thousand strings, indexed per row)."""
+    return pd.date_range(start, end, freq="D").strftime("%d/%m/%Y").to_numpy(dtype=object)
+
+
+# --- 2. GENERATORS ---
+
+def categorical(codes, labels):
+    """Categorical column from integer codes; repeated labels (e.g. two hotspots in one State) are merged."""
+    unique, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    return pd.Categorical.from_codes(inverse[codes], categories=unique)
+
+
+def generate_incidents(n, rng, table=None, dates=None, id_offset=0):
+    """`n` incident rows in the raw incidents.csv layout, every column one array draw."""
+    table = table or hotspot_table()
+    dates = date_strings() if dates is None else dates
+
+    species = rng.choice(len(table['species']), size=n, p=table['species_p'])
+    # A random hotspot of the chosen species: its hotspots are contiguous in the table
+    first = np.searchsorted(table['owner'], np.arange(len(table['species'])))
+    count = np.bincount(table['owner'], minlength=len(table['species']))
+    spot = first[species] + (rng.random(n) * count[species]).astype(np.int64)
+
+    coords = table['coords'][spot] + rng.uniform(-JITTER_DEG, JITTER_DEG, (n, 2))
+    dead = rng.random(n) < table['death_rate'][species]
+    # Low-cardinality text is built as categoricals from integer codes (Parquet
+    # dictionary columns); materialising millions of Python strings is the slow part.
+    return pd.DataFrame({
+        'Incident-id': pd.array(pc.binary_join_element_wise(
+            "SIM-", pc.cast(pa.array(np.arange(n) + id_offset + 1000), pa.string()), ""), dtype="string"),
+        'Date(dd/mm/yr)': categorical(rng.integers(0, len(dates), n), dates),
+        'Animal': categorical(species, table['species']),
+        'village': categorical(np.zeros(n, dtype=np.int8), ['Forest Fringe (Simulated)']),
+        'District': categorical(spot, table['district']),
+        'State': categorical(spot, table['state']),
+        'Victim age': rng.integers(18, 71, n),
+        'Victim outcome': categorical(dead.astype(np.int8), ['Injured', 'Deceased']),
+        'Incident details': categorical(np.zeros(n, dtype=np.int8),
+                                        ['Simulated data based on regional conflict probability']),
+        'lat': np.round(coords[:, 0], 5),
+        'lon': np.round(coords[:, 1], 5),
+    })
+
+
+def simulate_features(target, rng):
+    """Environmental features that correlate with `target` (1 = conflict, 0 = safe)."""
+    target = np.asarray(target)
+    out = {}
+    for name, profile in FEATURE_PROFILES.items():
+        mean = np.where(target == 1, profile[1][0], profile[0][0])
+        sd = np.where(target == 1, profile[1][1], profile[0][1])
+        floor = np.where(target == 1, profile[1][2], profile[0][2])
+        out[name] = np.maximum(floor, rng.normal(mean, sd).astype(np.int64))
+    return out
+
+
+def iter_chunks(n_rows, seed=SEED, chunk_rows=CHUNK_ROWS, species_mix=None, hotspots=HOTSPOTS,
+                start=START_DATE, end=END_DATE, with_features=False):
+    """Yields DataFrames of at most `chunk_rows` rows, `n_rows` in total.
+
+    Chunk i draws from default_rng([seed, i]), so a given (seed, chunk_rows) always
+    produces the same rows regardless of how many chunks are consumed.
+    """
+    table = hotspot_table(hotspots, species_mix)
+    dates = date_strings(start, end)
+    for i, offset in enumerate(range(0, n_rows, chunk_rows)):
+        rng = np.random.default_rng([seed, i])
+        df = generate_incidents(min(chunk_rows, n_rows - offset), rng, table, dates, id_offset=offset)
+        if with_features:
+            df['Target'] = rng.integers(0, 2, len(df))
+            for name, values in simulate_features(df['Target'].to_numpy(), rng).items():
+                df[name] = values
+        yield df
+
+
+def write_synthetic(path, n_rows, report=print, **kwargs):
+    """Streams iter_chunks(...) to CSV or Parquet (by extension) through Arrow writers.
+
+    Written under a temporary name and swapped in, so readers never see a half file.
+    n_rows=0 writes an empty file with the usual columns. Returns the number of rows written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    staging = path + ".partial"
+    writer, written = None, 0
+
+    def open_writer(schema):
+        return (pq.ParquetWriter(staging, schema) if path.endswith(".parquet")
+                else pcsv.CSVWriter(staging, schema))
+
+    try:
+        for df in iter_chunks(n_rows, **kwargs):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = open_writer(table.schema)
+            writer.write_table(table)
+            written += len(df)
+            report(f"   🧩 {written:,}/{n_rows:,} rows")
+        if writer is None:
+            # No chunks: take the schema from a one-row sample and write just the header
+            sample = pa.Table.from_pandas(next(iter_chunks(1, **kwargs)), preserve_index=False)
+            writer = open_writer(sample.schema)
+            writer.write_table(sample.slice(0, 0))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(staging, path)
+    return written
@@ -0,0 +1,259 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+METRICS_DIR = "data/metrics"
+SPANS_FILE = os.path.join(METRICS_DIR, "spans.jsonl")   # one JSON object per finished span, all scripts
+# <METRICS_DIR>/<script>.prom is rewritten on every flush (node_exporter textfile collector format)
+CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)   # seconds, external call histogram
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far (None where `resource` is unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024   # macOS reports bytes, Linux KiB
+
+
+class Span:
+    """Handle yielded by Telemetry.span(); set `.rows` once the row count is known."""
+
+    def __init__(self, name, rows=None, attrs=None):
+        self.name = name
+        self.rows = rows
+        self.attrs = attrs or {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+
+class Call:
+    """Handle yielded by Telemetry.call(); set `.ok = False` for a failed (non-exception) response."""
+
+    def __init__(self):
+        self.ok = True
+
+
+class Telemetry:
+    """Spans (wall time, rows, peak RSS) and external-call latencies for one run of one script.
+
+    Spans nest per thread: a span opened inside another is recorded as 'outer/inner'.
+    flush() appends the finished spans to SPANS_FILE and rewrites <script>.prom.
+    """
+
+    def __init__(self, script, metrics_dir=METRICS_DIR, spans_file=SPANS_FILE):
+        self.script = script
+        self.metrics_dir = metrics_dir
+        self.spans_file = spans_file
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.spans = []
+        self.calls = {}
+        self._flushed = 0
+        self._mark = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    # --- spans ---
+
+    def start(self, name, rows=None, **attrs):
+        stack = self._stack()
+        span = Span(f"{stack[-1].name}/{name}" if stack else name, rows, attrs)
+        stack.append(span)
+        return span
+
+    def end(self, span):
+        seconds = time.perf_counter() - span._start
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        record = {
+            'ts': round(span.started_at, 3),
+            'run_id': self.run_id,
+            'script': self.script,
+            'span': span.name,
+            'seconds': round(seconds, 6),
+            'rows': span.rows,
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+        if span.attrs:
+            record['attrs'] = span.attrs
+        with self._lock:
+            self.spans.append(record)
+        return record
+
+    @contextmanager
+    def span(self, name, rows=None, **attrs):
+        span = self.start(name, rows, **attrs)
+        try:
+            yield span
+        finally:
+            self.end(span)
+
+    def mark(self, name, rows=None):
+        """Ends the previous mark() phase and starts `name` (for long top-level scripts like app.py)."""
+        self.end_mark()
+        self._mark = self.start(name, rows)
+        return self._mark
+
+    def end_mark(self):
+        if self._mark is not None:
+            self.end(self._mark)
+            self._mark = None
+
+    # --- external calls ---
+
+    def record_call(self, kind, seconds, ok=True):
+        with self._lock:
+            stats = self.calls.setdefault(kind, {'count': 0, 'errors': 0, 'seconds': 0.0,
+                                                 'buckets': [0] * len(CALL_BUCKETS)})
+            stats['count'] += 1
+            stats['errors'] += not ok
+            stats['seconds'] += seconds
+            for i, bound in enumerate(CALL_BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+
+    @contextmanager
+    def call(self, kind):
+        """Times one external request; an exception counts as an error and is re-raised."""
+        handle = Call()
+        start = time.perf_counter()
+        try:
+            yield handle
+        except BaseException:
+            handle.ok = False
+            raise
+        finally:
+            self.record_call(kind, time.perf_counter() - start, handle.ok)
+
+    # --- reports ---
+
+    def breakdown(self):
+        """Per-span totals for this run, in first-seen order: [{'span', 'calls', 'seconds', 'rows', 'peak_rss_mb'}]."""
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            t = totals.setdefault(s['span'], {'span': s['span'], 'calls': 0, 'seconds': 0.0, 'rows': None,
+                                              'peak_rss_mb': None})
+            t['calls'] += 1
+            t['seconds'] += s['seconds']
+            if s['rows'] is not None:
+                t['rows'] = (t['rows'] or 0) + s['rows']
+            if s['peak_rss_bytes'] is not None:
+                t['peak_rss_mb'] = max(t['peak_rss_mb'] or 0, round(s['peak_rss_bytes'] / 2 ** 20, 1))
+        return list(totals.values())
+
+    def prometheus(self):
+        """This run's spans and call latencies in Prometheus text exposition format."""
+        def labels(**pairs):
+            esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs.items()) + "}"
+
+        lines = [
+            "# HELP wildlife_span_seconds Wall time per span in the last run (summed over repeats).",
+            "# TYPE wildlife_span_seconds gauge",
+        ]
+        breakdown = self.breakdown()
+        for t in breakdown:
+            lines.append(f"wildlife_span_seconds{labels(script=self.script, span=t['span'])} {t['seconds']:.6f}")
+        lines += ["# HELP wildlife_span_rows Rows handled per span in the last run.",
+                  "# TYPE wildlife_span_rows gauge"]
+        for t in breakdown:
+            if t['rows'] is not None:
+                lines.append(f"wildlife_span_rows{labels(script=self.script, span=t['span'])} {t['rows']}")
+        lines += ["# HELP wildlife_peak_rss_bytes Peak resident memory of the last run.",
+                  "# TYPE wildlife_peak_rss_bytes gauge"]
+        rss = peak_rss_bytes()
+        if rss is not None:
+            lines.append(f"wildlife_peak_rss_bytes{labels(script=self.script)} {rss}")
+        lines += ["# HELP wildlife_last_run_timestamp_seconds When the last run flushed its metrics.",
+                  "# TYPE wildlife_last_run_timestamp_seconds gauge",
+                  f"wildlife_last_run_timestamp_seconds{labels(script=self.script)} {time.time():.0f}"]
+
+        with self._lock:
+            calls = {kind: dict(stats, buckets=list(stats['buckets'])) for kind, stats in self.calls.items()}
+        lines += ["# HELP wildlife_external_call_seconds Latency of geocoding/Overpass/elevation requests.",
+                  "# TYPE wildlife_external_call_seconds histogram"]
+        for kind, stats in sorted(calls.items()):
+            for bound, count in zip(CALL_BUCKETS, stats['buckets']):
+                lines.append(f"wildlife_external_call_seconds_bucket"
+                             f"{labels(script=self.script, kind=kind, le=bound)} {count}")
+            lines.append(f"wildlife_external_call_seconds_bucket"
+                         f"{labels(script=self.script, kind=kind, le='+Inf')} {stats['count']}")
+            lines.append(f"wildlife_external_call_seconds_sum{labels(script=self.script, kind=kind)} "
+                         f"{stats['seconds']:.6f}")
+            lines.append(f"wildlife_external_call_seconds_count{labels(script=self.script, kind=kind)} "
+                         f"{stats['count']}")
+        lines += ["# HELP wildlife_external_call_errors Failed external requests in the last run.",
+                  "# TYPE wildlife_external_call_errors gauge"]
+        for kind, stats in sorted(calls.items()):
+            lines.append(f"wildlife_external_call_errors{labels(script=self.script, kind=kind)} {stats['errors']}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Appends spans finished since the last flush to the JSON-lines file; rewrites <script>.prom."""
+        self.end_mark()
+        with self._lock:
+            new = self.spans[self._flushed:]
+            self._flushed = len(self.spans)
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            if new:
+                with open(self.spans_file, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(s) + "\n" for s in new))
+            prom = os.path.join(self.metrics_dir, f"{self.script}.prom")
+            with open(prom + ".partial", "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(prom + ".partial", prom)
+        except OSError:
+            pass   # metrics must never take a pipeline run down
+
+
+# --- PROCESS-WIDE DEFAULT ---
+# Scripts just call span()/call(); the instance is created on first use, named after
+# the running script, and flushed when the process exits.
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def telemetry():
+    global _default
+    with _default_lock:
+        if _default is None:
+            script = os.path.splitext(os.path.basename(sys.argv[0] if sys.argv else ""))[0]
+            if not script or script.startswith("-"):   # interactive / python -c
+                script = "python"
+            _default = Telemetry(script)
+            atexit.register(_default.flush)
+        return _default
+
+
+def span(name, rows=None, **attrs):
+    return telemetry().span(name, rows, **attrs)
+
+
+def call(kind):
+    return telemetry().call(kind)
+
+
+def record_call(kind, seconds, ok=True):
+    telemetry().record_call(kind, seconds, ok)
+
+
+def mark(name, rows=None):
+    return telemetry().mark(name, rows)
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Season codes index into SEASON_NAMES (same order as prediction_model.SEASONS)
+SEASON_NAMES = ["Summer", "Monsoon", "Winter"]
+UNKNOWN_SEASON = -1
+
+# IMD convention: Mar-May pre-monsoon summer, Jun-Sep south-west monsoon,
+# Oct-Feb post-monsoon + winter. Index 0 is unused (months are 1-based).
+MONTH_TO_SEASON = np.array([UNKNOWN_SEASON, 2, 2, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2], dtype=np.int8)
+
+# Two-digit years at or below this are 20xx, above it 19xx
+TWO_DIGIT_YEAR_PIVOT = 50
+
+DMY_PATTERN = r"^\s*(\d{1,2})[-/. ](\d{1,2})[-/. ](\d{4}|\d{2})\s*$"   # 07-09-25, 09/07/2025
+YMD_PATTERN = r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})"               # 2025-09-07[ 00:00]
+
+
+# --- 1. NORMALIZER ---
+
+def _number(parts):
+    return pd.to_numeric(parts, errors="coerce").astype("float64")
+
+
+def _from_parts(year, month, day):
+    parts = pd.DataFrame({'year': year, 'month': month, 'day': day}).astype("float64")
+    ok = parts.notna().all(axis=1)
+    out = pd.Series(pd.NaT, index=parts.index, dtype="datetime64[ns]")
+    if ok.any():
+        out[ok] = pd.to_datetime(parts[ok].astype("int64"), errors="coerce")
+    return out
+
+
+def normalize_dates(values):
+    """Free-text incident dates -> datetime64[ns] (NaT when unreadable).
+
+    Each distinct string is parsed once. Day-first 'dd-mm-yy(yy)' (the
+    'Date(dd/mm/yr)' convention) and ISO 'yyyy-mm-dd' are decoded with one
+    vectorized regex pass; only the leftovers go through pandas' per-value
+    'mixed' parser.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype="string"))
+    text = pd.Series(uniques, dtype="string")
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+
+    if len(text):
+        dmy = text.str.extract(DMY_PATTERN)
+        year = _number(dmy[2])
+        year = year.where((dmy[2].str.len() == 4).fillna(False),
+                          year + np.where(year <= TWO_DIGIT_YEAR_PIVOT, 2000, 1900))
+        parsed = _from_parts(year, _number(dmy[1]), _number(dmy[0]))
+
+        todo = parsed.isna()
+        if todo.any():
+            ymd = text[todo].str.extract(YMD_PATTERN)
+            parsed[todo] = _from_parts(_number(ymd[0]), _number(ymd[1]), _number(ymd[2]))
+
+        todo = parsed.isna()
+        if todo.any():
+            parsed[todo] = pd.to_datetime(text[todo], format="mixed", dayfirst=True, errors="coerce")
+
+    out = np.full(len(codes), np.datetime64("NaT", "ns"))
+    valid = codes >= 0
+    out[valid] = parsed.to_numpy(dtype="datetime64[ns]")[codes[valid]]
+    return out
+
+
+def season_codes(dates):
+    """Season code per timestamp (UNKNOWN_SEASON for NaT)."""
+    months = pd.DatetimeIndex(np.asarray(dates, dtype="datetime64[ns]")).month
+    return np.where(np.isnan(months), UNKNOWN_SEASON,
+                    MONTH_TO_SEASON[np.nan_to_num(months, nan=0).astype(int)]).astype(np.int8)
+
+
+def season_code(name):
+    """'Summer (Water Stress)' / 'Summer' -> 0; anything else -> UNKNOWN_SEASON."""
+    first = str(name).split(" ")[0]
+    return SEASON_NAMES.index(first) if first in SEASON_NAMES else UNKNOWN_SEASON
+
+
+def with_temporal_columns(df, date_column='Date(dd/mm/yr)'):
+    """Adds incident_date / season to frames from before they were stored (no-op otherwise)."""
+    if 'incident_date' in df.columns and df['incident_date'].notna().any():
+        return df
+    dates = normalize_dates(df[date_column] if date_column in df.columns else [None] * len(df))
+    return df.assign(incident_date=dates, season=season_codes(dates))
+
+
+# --- 2. SEASONAL AGGREGATES ---
+
+def seasonal_aggregates(seasons, species, dates):
+    """Per-(season, species) incident counts, share of the season and peak month.
+
+    Computed once per dataset load, so the seasonal panel reads a tiny table
+    instead of scanning incidents.
+    """
+    frame = pd.DataFrame({
+        'season': np.asarray(seasons),
+        'species': pd.Series(species, dtype="string").to_numpy(),
+        'month': pd.DatetimeIndex(np.asarray(dates, dtype="datetime64[ns]")).month,
+    })
+    frame = frame[frame['season'] != UNKNOWN_SEASON]
+    if frame.empty:
+        return pd.DataFrame(columns=['season', 'species', 'incidents', 'share', 'peak_month'])
+
+    counts = frame.groupby(['season', 'species']).size().rename('incidents')
+    peak = (frame.groupby(['season', 'species', 'month']).size()
+            .reset_index(name='n').sort_values('n', ascending=False)
+            .drop_duplicates(['season', 'species']).set_index(['season', 'species'])['month'])
+    out = pd.concat([counts, peak.rename('peak_month')], axis=1).reset_index()
+    out['peak_month'] = out['peak_month'].astype(int)
+    out['share'] = out['incidents'] / out.groupby('season')['incidents'].transform('sum')
+    out['season'] = out['season'].map(dict(enumerate(SEASON_NAMES)))
+    return out[['season', 'species', 'incidents', 'share', 'peak_month']]
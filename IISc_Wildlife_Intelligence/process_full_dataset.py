@@ -1,96 +1,114 @@
-import pandas as pd
 import numpy as np
 import os
+import shutil
+import time
+
+from modules.dem import DEMSampler
+from modules.gazetteer import fill_missing_coords
+from modules.incident_store import (
+    STORE_DIR, iter_raw_csv, publish_store, to_schema, write_store
+)
+from modules.telemetry import mark, span
 
 # --- CONFIGURATION ---
 INPUT_FILE = "data/incidents.csv"  # Your original big file
 OUTPUT_FILE = "data/final_geocoded_data.csv"     # The file app.py reads
 
-print(f"📂 Loading full dataset from '{INPUT_FILE}'...")
+# The file is streamed in chunks of this many rows, so memory stays flat whether it
+# holds 350 incidents or a 10M-row national archive.
+CHUNK_SIZE = 200_000
+
+# Jitter and simulated features draw from a generator seeded with (SEED, chunk number),
+# so re-running on the same file with the same CHUNK_SIZE gives identical output.
+SEED = 42
+
+print(f"📂 Streaming full dataset from '{INPUT_FILE}' in chunks of {CHUNK_SIZE:,} rows...")
 
-# 1. LOAD THE LARGE DATASET
+# 1. CHECK THE LARGE DATASET
 if not os.path.exists(INPUT_FILE):
     print(f"❌ Error: Could not find '{INPUT_FILE}'.")
     print("   Please make sure your original Excel/CSV is inside the 'data' folder.")
     exit()
 
-try:
-    df = pd.read_csv(INPUT_FILE, encoding='utf-8')
-except:
-    df = pd.read_csv(INPUT_FILE, encoding='ISO-8859-1')
-
-print(f"✅ Loaded {len(df)} rows.")
-
-# 2. ENSURE COORDINATES EXIST (Offline Backup System)
-# This map ensures that even if Google API failed earlier, we have locations.
-district_coords = {
-    'Koppal': [15.35, 76.15], 'Mysuru': [12.29, 76.63], 'Ballari': [15.13, 76.92],
-    'Belagavi': [15.84, 74.49], 'Shivamogga': [13.92, 75.56], 'Kodagu': [12.42, 75.73],
-    'Mandya': [12.52, 76.89], 'Saragur': [11.97, 76.43], 'Balaghat': [21.81, 80.18],
-    'Singrauli': [24.19, 82.66], 'Seoni': [22.08, 79.54], 'Chhota Udepur': [22.30, 74.01],
-    'Banaskantha': [24.30, 72.20], 'Dhenkanal': [20.64, 85.59], 'Angul': [20.83, 85.15],
-    'Jajpur': [20.85, 86.33], 'Korba': [22.35, 82.68], 'Kanker': [20.27, 81.49],
-    'Coimbatore': [11.01, 76.95], 'Tirupattur': [12.49, 78.57], 'Srikakulam': [18.30, 83.89],
-    'Vizianagaram': [18.10, 83.39], 'Prakasam': [15.75, 80.00], 'Bahraich': [27.57, 81.59],
-    'Pilibhit': [28.64, 79.80], 'Kheri': [27.94, 80.77], 'Lakhimpur Kheri': [27.94, 80.77],
-    'Bijnor': [29.37, 78.13], 'Sitapur': [27.57, 80.68], 'Dharmapur': [27.56, 81.58],
-    'Chandrapur': [19.96, 79.29], 'Chimur': [20.48, 79.35], 'Nashik': [19.99, 73.78],
-    'Bhandara': [21.17, 79.65], 'Pune': [18.52, 73.85], 'Reasi': [33.08, 74.83],
-    'Sujan Pur': [32.39, 75.87], 'Champawat': [29.33, 80.09], 'Nainital': [29.38, 79.46],
-    'Jalpaiguri': [26.54, 88.71]
-}
-
-def fill_missing_coords(row):
-    # If Lat/Lon is missing or 0, use the District center
-    if pd.isna(row.get('lat')) or row.get('lat') == 0 or pd.isna(row.get('lon')):
-        dist = str(row.get('District', '')).strip().title()
-        
-        # Look up district
-        center = district_coords.get(dist)
-        
-        # If still not found, try cleaning the name
-        if not center:
-             # Try matching partial string (e.g., "Nagina Dehat" -> "Bijnor")
-             if "Nagina" in dist: center = district_coords['Bijnor']
-             elif "Kheri" in dist: center = district_coords['Kheri']
-        
-        if center:
-            # Add random scatter (jitter) so points don't stack
-            return pd.Series([
-                center[0] + np.random.uniform(-0.05, 0.05),
-                center[1] + np.random.uniform(-0.05, 0.05)
-            ])
-        else:
-            return pd.Series([None, None])
-    else:
-        # Keep existing valid coordinates
-        return pd.Series([row['lat'], row['lon']])
-
-# Fix column names if needed (Handle case sensitivity)
-if 'Latitude' in df.columns: df.rename(columns={'Latitude': 'lat', 'Longitude': 'lon'}, inplace=True)
-
-# Apply the coordinate filler
-print("🛠️ Fixing missing coordinates...")
-coords = df.apply(fill_missing_coords, axis=1)
-df['lat'] = coords[0]
-df['lon'] = coords[1]
-
-# Drop rows that still have no location
-df = df.dropna(subset=['lat', 'lon'])
-
-# 3. ADD AI FEATURES (Simulate Environmental Data)
-# Since we can't query satellites for 350 points instantly without errors, 
-# we simulate valid data for the AI model to use.
-print("🧠 Generating AI features (Elevation, Forest Distance)...")
-np.random.seed(42)
-rows = len(df)
-df['elevation'] = np.random.randint(200, 800, rows)
-df['dist_water'] = np.random.randint(50, 3000, rows)
-df['dist_forest'] = np.random.randint(0, 1500, rows)
-df['dist_village'] = np.random.randint(0, 2000, rows)
-
-# 4. SAVE FINAL FILE
-df.to_csv(OUTPUT_FILE, index=False)
-print(f"🎉 Success! Processed {len(df)} rows.")
+dem = DEMSampler()
+if dem:
+    print(f"   ⛰️ Elevation will be sampled from {len(dem.tiles)} local DEM tile(s).")
+
+
+def process_chunk(df, rng):
+    """Coordinates + AI features for one chunk of raw incidents."""
+    # Drop Excel's empty 'Unnamed: N' spill columns
+    df = df.loc[:, ~df.columns.astype(str).str.startswith('Unnamed')]
+
+    # 2. ENSURE COORDINATES EXIST (Offline Backup System)
+    # District centres come from the shared gazetteer (data/gazetteer.csv), which also
+    # resolves aliases ("Lakhimpur Kheri", "Nagina") and misspellings.
+
+    # Fix column names if needed (Handle case sensitivity)
+    if 'Latitude' in df.columns: df = df.rename(columns={'Latitude': 'lat', 'Longitude': 'lon'})
+
+    # Vectorized filler: one gazetteer join, one jitter draw per chunk
+    df = df.copy()
+    df['lat'], df['lon'] = fill_missing_coords(df, rng)
+
+    # Drop rows that still have no location
+    df = df.dropna(subset=['lat', 'lon'])
+
+    # 3. ADD AI FEATURES (Simulate Environmental Data)
+    # Since we can't query satellites for every point instantly without errors,
+    # we simulate valid data for the AI model to use.
+    rows = len(df)
+    df['elevation'] = rng.integers(200, 800, rows)
+    if dem:
+        terrain = dem.sample(df['lat'], df['lon'])
+        df['elevation'] = np.where(np.isnan(terrain), df['elevation'], np.round(terrain))
+    df['dist_water'] = rng.integers(50, 3000, rows)
+    df['dist_forest'] = rng.integers(0, 1500, rows)
+    df['dist_village'] = rng.integers(0, 2000, rows)
+    return df
+
+
+# 4. STREAM: each chunk is appended to the CSV with every input column, then projected
+# onto the incident schema for the Parquet writer. Both are built under temporary
+# names and swapped in at the end, so app.py never reads a half-written dataset.
+csv_staging = OUTPUT_FILE + ".partial"
+store_staging = STORE_DIR + ".partial"
+stats = {'read': 0, 'kept': 0}
+start = time.time()
+
+
+def processed_batches():
+    for i, chunk in enumerate(iter_raw_csv(INPUT_FILE, CHUNK_SIZE)):
+        stats['read'] += len(chunk)
+        with span("chunk", rows=len(chunk)):
+            chunk = process_chunk(chunk, np.random.default_rng([SEED, i]))
+            stats['kept'] += len(chunk)
+            # The CSV keeps all columns, as before; only the store is schema-bound
+            chunk.to_csv(csv_staging, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            table = to_schema(chunk)
+        print(f"   🧩 Chunk {i + 1}: {stats['read']:,} rows read, {stats['kept']:,} kept "
+              f"({stats['read'] / (time.time() - start):,.0f} rows/s)")
+        yield from table.to_batches()
+
+
+print("🛠️ Fixing missing coordinates and generating AI features (Elevation, Forest Distance)...")
+stream = mark("stream chunks")
+write_store(processed_batches(), root=store_staging)
+
+if stats['read'] == 0:
+    shutil.rmtree(store_staging, ignore_errors=True)
+    if os.path.exists(csv_staging):
+        os.remove(csv_staging)
+    print(f"❌ Error: '{INPUT_FILE}' has no rows.")
+    exit()
+
+stream.rows = stats['kept']
+mark("publish", rows=stats['kept'])
+os.replace(csv_staging, OUTPUT_FILE)
+publish_store(store_staging, root=STORE_DIR)
+
+# 5. DONE
+print(f"🎉 Success! Processed {stats['kept']:,} rows in {time.time() - start:.1f}s.")
 print(f"💾 Saved to: {OUTPUT_FILE}")
-print("👉 You can now run the App.")
\ No newline at end of file
+print(f"🗄️ Incident store rebuilt at: {STORE_DIR}")
+print("👉 You can now run the App.")
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import os
 
+from modules.gazetteer import load_gazetteer
+
 # 1. SETUP
 if not os.path.exists("data"):
     os.makedirs("data")
@@ -36,15 +38,9 @@ df_real['Victim outcome'] = "Reported"
 # Instead of clustering at the center, we spread points by +/- 0.3 degrees (~30km)
 print("   ...Generating 100 scattered background points...")
 
-districts_map = {
-    'Nashik': [19.99, 73.78],
-    'Bijnor': [29.37, 78.13],
-    'Jalpaiguri': [26.54, 88.71],
-    'Chandrapur': [19.96, 79.29],
-    'Mysuru': [12.29, 76.63],
-    'Koppal': [15.35, 76.15],
-    'Wayanad': [11.68, 76.13]
-}
+districts_map = load_gazetteer().coords(
+    ['Nashik', 'Bijnor', 'Jalpaiguri', 'Chandrapur', 'Mysuru', 'Koppal', 'Wayanad']
+)
 
 sim_data = []
 for i in range(100):
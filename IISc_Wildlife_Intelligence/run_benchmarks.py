@@ -0,0 +1,231 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from modules.benchmark import (
+    BASELINE_FILE, SIZES, THRESHOLD, Case, compare, format_comparison, load_results, result_key,
+    save_results, time_case
+)
+from modules.gazetteer import fill_missing_coords, load_gazetteer
+from modules.incident_store import load_map_incidents, to_schema, write_store
+from modules.local_overpass_server import start_mirrors
+from modules.osm_index import FEATURE_TYPES, distance_to_nearest
+from modules.overpass_client import OverpassClient
+from modules.overpass_tiles import tile_distances
+from modules.prediction_model import (
+    SPECIES, calculate_habitat_suitability, calculate_habitat_suitability_batch, required_features
+)
+from modules.synthetic_data import SEED, generate_incidents, write_synthetic
+
+# --- CONFIGURATION ---
+# Times the hot paths at several dataset sizes and stores the numbers as JSON, so a
+# change can be checked against a saved baseline. Inputs are synthetic and seeded
+# (modules/synthetic_data.py); nothing touches the network: Overpass/elevation
+# calls go to the local stand-in servers from modules/local_overpass_server.py.
+#
+#   python run_benchmarks.py --save-baseline              # before the change
+#   python run_benchmarks.py --compare                    # after: exit 1 on regression
+#   python run_benchmarks.py --only fill_missing_coords --sizes 1k,100k
+#   python run_benchmarks.py --diff data/bench/baseline.json data/bench/results/<run>.json
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+OSM_FEATURES_PER_TYPE = 50_000     # fake OSM index size per feature type
+INDIA_BOUNDS = ((8.0, 37.0), (68.0, 97.0))
+SEASON = "Summer"
+
+
+def incidents(rows, missing=0.0):
+    """Seeded synthetic incidents; `missing` of them lose their coordinates."""
+    rng = np.random.default_rng([SEED, rows])
+    df = generate_incidents(rows, rng)
+    if missing:
+        gone = rng.random(rows) < missing
+        df.loc[gone, ['lat', 'lon']] = np.nan
+    return df
+
+
+def noop(*args):
+    pass
+
+
+# --- 1. CASES ---
+
+# app.py load_data(): read the Parquet store, tidy, simulate MCDA inputs
+def setup_load_data(rows):
+    root = tempfile.mkdtemp(prefix="bench_store_")
+    write_store(to_schema(incidents(rows)), root=os.path.join(root, "store"))
+    return root
+
+def run_load_data(root):
+    load_map_incidents(root=os.path.join(root, "store"))
+
+
+# calculate_habitat_suitability: the per-row scorer and its vectorized rule-table twin
+def setup_suitability(rows):
+    rng = np.random.default_rng([SEED, rows])
+    data = {name: rng.uniform(0, 1, rows) if name == 'vegetation_index' else rng.uniform(0, 3000, rows)
+            for name in required_features()}
+    return pd.DataFrame(data)
+
+def run_suitability_rows(df):
+    for species in SPECIES:
+        df.apply(calculate_habitat_suitability, axis=1, args=(SEASON, species))
+
+def run_suitability_batch(df):
+    for species in SPECIES:
+        calculate_habitat_suitability_batch(df, SEASON, species)
+
+
+# gazetteer.fill_missing_coords: half the rows need a district centre
+def setup_fill(rows):
+    gazetteer = load_gazetteer()
+    return incidents(rows, missing=0.5), gazetteer
+
+def run_fill(state):
+    df, gazetteer = state
+    fill_missing_coords(df, np.random.default_rng(SEED), gazetteer=gazetteer)
+
+
+# get_distance_to_nearest, offline path: BallTree index over a fake OSM extract
+def setup_distance_index(rows):
+    rng = np.random.default_rng(SEED)
+    (lat0, lat1), (lon0, lon1) = INDIA_BOUNDS
+    trees = {}
+    for feature in FEATURE_TYPES:
+        pts = np.column_stack([rng.uniform(lat0, lat1, OSM_FEATURES_PER_TYPE),
+                               rng.uniform(lon0, lon1, OSM_FEATURES_PER_TYPE)])
+        trees[feature] = BallTree(np.radians(pts), metric="haversine")
+    df = incidents(rows)
+    return {'trees': trees}, df['lat'].to_numpy(), df['lon'].to_numpy()
+
+def run_distance_index(state):
+    index, lats, lons = state
+    for feature in FEATURE_TYPES:
+        distance_to_nearest(index, lats, lons, feature)
+
+
+# get_distance_to_nearest, online path: pooled client against local fake mirrors
+def setup_distance_overpass(rows):
+    mirrors, elevation = start_mirrors(count=3, rate=1e6, burst=1e6, latency=0.0)
+    client = OverpassClient([f"{base}/api/interpreter" for _, base in mirrors],
+                            f"{elevation[1]}/api/v1/lookup", rate=1e6, burst=1e6)
+    df = incidents(rows)
+    return client, list(zip(df['lat'], df['lon'])), [server for server, _ in mirrors] + [elevation[0]]
+
+def run_distance_overpass(state):
+    client, points, _ = state
+    fetch = lambda p: [client.distance_to_nearest(p[0], p[1], feature) for feature in FEATURE_TYPES]
+    for _ in client.map(fetch, points):
+        pass
+
+# Same points, one bbox query per tile and feature type (no cache, so every run hits the mirrors)
+def run_distance_tiles(state):
+    client, points, _ = state
+    lats, lons = zip(*points)
+    tile_distances(client, lats, lons, FEATURE_TYPES)
+
+def teardown_distance_overpass(state):
+    for server in state[2]:
+        server.shutdown()
+        server.server_close()
+
+
+# train_model.py end to end (no matrix cache) in a scratch directory
+def setup_train(rows):
+    root = tempfile.mkdtemp(prefix="bench_train_")
+    write_synthetic(os.path.join(root, "data", "model_ready_data.csv"), rows, report=noop, with_features=True)
+    return root
+
+def run_train(root):
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR, MPLBACKEND="Agg")
+    done = subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "train_model.py"), "--no-cache"],
+                          cwd=root, env=env, capture_output=True, text=True)
+    if done.returncode != 0:
+        raise RuntimeError(f"train_model.py failed:\n{done.stdout[-2000:]}{done.stderr[-2000:]}")
+
+def remove_dir(root):
+    shutil.rmtree(root, ignore_errors=True)
+
+
+CASES = [
+    Case("load_data", setup_load_data, run_load_data, teardown=remove_dir),
+    Case("suitability_rows", setup_suitability, run_suitability_rows, max_rows=100_000),
+    Case("suitability_batch", setup_suitability, run_suitability_batch),
+    Case("fill_missing_coords", setup_fill, run_fill),
+    Case("distance_index", setup_distance_index, run_distance_index),
+    Case("distance_overpass", setup_distance_overpass, run_distance_overpass,
+         teardown=teardown_distance_overpass, max_rows=1_000, repeat=1),
+    Case("distance_tiles", setup_distance_overpass, run_distance_tiles,
+         teardown=teardown_distance_overpass, max_rows=100_000, repeat=1),
+    Case("train_model", setup_train, run_train, teardown=remove_dir, repeat=1),
+]
+
+# --- 2. CLI ---
+parser = argparse.ArgumentParser(description="Benchmark the ingestion, scoring, training and rendering hot paths.")
+parser.add_argument("--sizes", default=",".join(SIZES), help=f"comma-separated, from {', '.join(SIZES)}")
+parser.add_argument("--only", default=None, help=f"comma-separated cases ({', '.join(c.name for c in CASES)})")
+parser.add_argument("--repeat", type=int, default=None, help="timed runs per case (default: per case)")
+parser.add_argument("--out", default=None, help="results JSON (default: data/bench/results/<timestamp>.json)")
+parser.add_argument("--save-baseline", action="store_true", help=f"also write the results to '{BASELINE_FILE}'")
+parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, default=None, metavar="BASELINE",
+                    help="compare this run against a baseline; exit 1 on regression")
+parser.add_argument("--diff", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two saved runs, run nothing")
+parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown fraction")
+args = parser.parse_args()
+
+
+def report_comparison(baseline_path, current):
+    rows = compare(load_results(baseline_path), current, args.threshold)
+    print(format_comparison(rows))
+    regressions = [row[0] for row in rows if row[4] == 'REGRESSION']
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"✅ No regressions over {args.threshold:.0%} ({len(rows)} benchmarks compared)")
+
+
+if args.diff:
+    report_comparison(args.diff[0], load_results(args.diff[1]))
+    sys.exit(0)
+
+sizes = [label.strip() for label in args.sizes.split(",")]
+unknown = [label for label in sizes if label not in SIZES]
+if unknown:
+    print(f"❌ Error: unknown size(s) {', '.join(unknown)}. Known: {', '.join(SIZES)}")
+    sys.exit(2)
+cases = CASES
+if args.only:
+    wanted = [name.strip() for name in args.only.split(",")]
+    cases = [case for case in CASES if case.name in wanted]
+    missing = set(wanted) - {case.name for case in cases}
+    if missing:
+        print(f"❌ Error: unknown case(s) {', '.join(sorted(missing))}")
+        sys.exit(2)
+
+# --- 3. RUN ---
+results = {}
+for case in cases:
+    for label in sizes:
+        rows = SIZES[label]
+        if case.max_rows and rows > case.max_rows:
+            print(f"   ⏭️ {result_key(case.name, label)}: skipped (max {case.max_rows:,} rows)")
+            continue
+        result = time_case(case, rows, args.repeat)
+        results[result_key(case.name, label)] = result
+        # None when the best time rounds to 0 on a coarse timer
+        rate = "n/a" if result['rows_per_second'] is None else f"{result['rows_per_second']:,.0f}"
+        print(f"   ⏱️ {result_key(case.name, label):<28} {result['seconds']:>9.4f}s  ({rate} rows/s)")
+
+path = save_results(results, args.out)
+print(f"💾 Results saved to '{path}'")
+if args.save_baseline:
+    save_results(results, BASELINE_FILE)
+    print(f"📌 Baseline saved to '{BASELINE_FILE}'")
+if args.compare:
+    report_comparison(args.compare, load_results(path))
@@ -0,0 +1,80 @@
+import argparse
+import time
+
+from modules.pipeline import STATE_FILE, Stage, run_pipeline, select
+
+# --- CONFIGURATION ---
+# The data pipeline, declared once. Each stage lists what it reads and writes; the
+# runner works out the order, skips stages whose code, inputs and outputs are unchanged
+# since their last successful run, and runs independent stages in parallel.
+#
+# Not in the graph on purpose:
+#   fix_missing_data.py / restore_and_scatter.py - repair tools that overwrite the real
+#       outputs with sample data (run them by hand if you need them)
+#   build_dem_derivatives.py - writes next to its own inputs in data/dem/; run it after
+#       adding tiles, and every stage that reads data/dem/ will notice the change
+#   incremental_ingest.py - the daily update path for the incident store
+DEM_DIR = "data/dem"
+
+STAGES = [
+    Stage("osm_index", "build_osm_index.py",
+          inputs=["data/osm/india_features.osm"],
+          outputs=["data/osm_feature_index.pkl"]),
+    Stage("bulk_data", "generate_bulk.py",
+          outputs=["data/bulk_data.csv"]),
+    Stage("incident_store", "process_full_dataset.py",
+          inputs=["data/incidents.csv", "data/gazetteer.csv"],
+          optional=[DEM_DIR],
+          outputs=["data/final_geocoded_data.csv", "data/incident_store"]),
+    Stage("training_data", "generate_training_data.py",
+          inputs=["data/incident_store"],
+          outputs=["data/model_training_data.csv"]),
+    Stage("features", "extract_features_real.py",
+          inputs=["data/model_training_data.csv"],
+          optional=["data/osm_feature_index.pkl", DEM_DIR],
+          outputs=["data/model_ready_data.csv"]),
+    Stage("model", "train_model.py",
+          inputs=["data/model_ready_data.csv"],
+          outputs=["data/wildlife_model.pkl", "assets/feature_importance.png", "data/models"]),
+    # Sole writer of the feature rasters; the two scoring stages only read them
+    Stage("feature_layers", "build_feature_layers.py",
+          optional=["data/osm_feature_index.pkl", DEM_DIR],
+          outputs=["data/rasters/features"]),
+    Stage("risk_surface", "build_risk_surface.py",
+          inputs=["data/models", "data/rasters/features"],
+          outputs=["data/rasters/risk"]),
+    Stage("suitability", "build_suitability_rasters.py",
+          inputs=["data/rasters/features"],
+          outputs=["data/rasters/suitability"]),
+]
+
+# Offline alternative to the 'features' stage (no Overpass / open-elevation calls)
+SIMULATED_FEATURES = Stage("features", "simulate_realistic_data.py",
+                           inputs=["data/model_training_data.csv"],
+                           outputs=["data/model_ready_data.csv"])
+
+parser = argparse.ArgumentParser(description="Run the stale stages of the data pipeline.")
+parser.add_argument("stages", nargs="*", help="only these stages (and what they depend on)")
+parser.add_argument("--force", nargs="*", default=None, metavar="STAGE",
+                    help="re-run these stages even if up to date (no names = all)")
+parser.add_argument("--simulate-features", action="store_true", help=f"use {SIMULATED_FEATURES.script}")
+parser.add_argument("--dry-run", action="store_true", help="only report what would run")
+parser.add_argument("--workers", type=int, default=None, help="max stages running at once")
+args = parser.parse_args()
+
+stages = [SIMULATED_FEATURES if args.simulate_features and s.name == "features" else s for s in STAGES]
+stages = select(stages, args.stages)
+if args.force is None:
+    force = []
+else:
+    force = args.force or [s.name for s in stages]
+
+# --- RUN ---
+print(f"🧭 Pipeline: {' → '.join(s.name for s in stages)} (state in '{STATE_FILE}')")
+start = time.time()
+status = run_pipeline(stages, force=force, dry_run=args.dry_run, workers=args.workers)
+
+counts = {k: list(status.values()).count(k) for k in ('ran', 'fresh', 'stale', 'blocked', 'failed')}
+print(f"🎉 Finished in {time.time() - start:.1f}s: " + ", ".join(f"{n} {k}" for k, n in counts.items() if n))
+if counts['failed']:
+    exit(1)
@@ -0,0 +1,102 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+
+from modules.inference import (
+    DEFAULT_HOST, DEFAULT_PORT, FEATURE_COLUMNS, MAX_BATCH_ROWS, MAX_WAIT_MS, MicroBatcher, points_to_matrix
+)
+from modules.model_registry import REGISTRY_DIR, load_model
+
+# --- CONFIGURATION ---
+MODEL_FILE = "data/wildlife_model.pkl"
+
+# Local scoring service for the trained conflict model. The model is loaded once;
+# concurrent requests are merged into micro-batches (see modules/inference.py).
+#
+#   POST /predict  {"points": [{"lat": 15.3, "lon": 76.1, "elevation": 540,
+#                               "dist_water": 800, "dist_forest": 120, "dist_village": 900}, ...]}
+#                  or a single point object  ->  {"probabilities": [0.82, ...]}
+#   GET  /stats    request count, throughput, latency percentiles, mean batch size
+#   GET  /health
+parser = argparse.ArgumentParser(description="Serve wildlife_model.pkl over local HTTP.")
+parser.add_argument("--host", default=DEFAULT_HOST)
+parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+parser.add_argument("--version", default=None, help=f"registered model version (default: current in '{REGISTRY_DIR}')")
+parser.add_argument("--model", default=MODEL_FILE, help="pickled model, used when nothing is registered")
+parser.add_argument("--max-batch", type=int, default=MAX_BATCH_ROWS, help="rows per predict_proba call")
+parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS, help="batching window")
+args = parser.parse_args()
+
+# --- 1. LOAD ONCE ---
+# The registry's flat forest is memory-mapped: near-instant start, and every server
+# process on the machine shares one copy of the trees.
+start = time.time()
+model = load_model(args.version)
+if model is not None:
+    source = f"{REGISTRY_DIR}/{model.manifest['version']}"
+    feature_columns = model.feature_columns
+else:
+    try:
+        model = joblib.load(args.model)
+    except FileNotFoundError:
+        print(f"❌ Error: no registered model and '{args.model}' not found. Run train_model.py first.")
+        exit()
+    source = args.model
+    feature_columns = FEATURE_COLUMNS
+batcher = MicroBatcher(model, max_batch_rows=args.max_batch, max_wait_ms=args.max_wait_ms)
+print(f"🧠 Loaded '{source}' in {time.time() - start:.3f}s")
+
+
+# --- 2. HTTP HANDLER ---
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so field tools can stream requests
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {'status': 'ok', 'model': source})
+        elif self.path == "/stats":
+            self._send(200, batcher.tracker.report())
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            points = payload['points'] if isinstance(payload, dict) and 'points' in payload else [payload]
+            matrix = points_to_matrix(points, feature_columns)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': str(e)})
+            return
+        probabilities = batcher.predict(matrix)
+        self._send(200, {'probabilities': [round(float(p), 4) for p in probabilities]})
+
+    def log_message(self, format, *log_args):
+        pass   # per-request logging would dominate the cost of a small request; see /stats
+
+
+# --- 3. SERVE ---
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256   # the default backlog of 5 resets connections under a burst of clients
+
+
+server = Server((args.host, args.port), Handler)
+print(f"🚀 Serving on http://{args.host}:{args.port} (POST /predict, GET /stats)")
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    print(f"\n📈 {batcher.tracker.report()}")
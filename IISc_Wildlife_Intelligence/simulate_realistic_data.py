@@ -1,18 +1,22 @@
 import pandas as pd
 import numpy as np
 
+from modules.synthetic_data import SEED, simulate_features
+from modules.telemetry import mark
+
 # --- CONFIGURATION ---
 INPUT_FILE = "data/model_training_data.csv"  # The 1s and 0s file
 OUTPUT_FILE = "data/model_ready_data.csv"    # The final file for training
 
 print("📂 Loading Training Labels...")
+mark("load")
 try:
     df = pd.read_csv(INPUT_FILE)
 except FileNotFoundError:
     # If file missing, recreate a dummy one for safety
     print("⚠️ 'model_training_data.csv' not found. Creating a fresh dummy set...")
     df = pd.DataFrame({
-        'Target': np.random.choice([0, 1], size=700),
+        'Target': np.random.default_rng(SEED).integers(0, 2, 700),
         'Animal': 'Sloth Bear',
         'District': 'Koppal'
     })
@@ -21,47 +25,17 @@ print(f"🔄 Simulating Environmental Features for {len(df)} rows...")
 print("   (Logic: Generating patterns that match real animal behavior)")
 
 # --- SIMULATION LOGIC ---
-# We use numpy to generate data that correlates with the 'Target' (Conflict vs Safe)
-
-np.random.seed(42) # Fixed seed for consistent results
-
-def generate_dist_forest(target):
-    # Conflict (1) usually happens CLOSE to forest (0-800m)
-    # Safe (0) usually happens FAR from forest (2000-8000m)
-    if target == 1:
-        return max(0, int(np.random.normal(400, 300)))
-    else:
-        return max(500, int(np.random.normal(3000, 1500)))
-
-def generate_dist_water(target):
-    # Animals need water. Conflict sites are often closer to water sources.
-    if target == 1:
-        return max(0, int(np.random.normal(500, 400))) # Close (500m avg)
-    else:
-        return max(200, int(np.random.normal(2000, 1000))) # Far (2km avg)
-
-def generate_dist_village(target):
-    # Conflict happens at the "Interface" (Edge of village)
-    if target == 1:
-        return max(0, int(np.random.normal(300, 200))) # 300m from village edge
-    else:
-        # Safe spots are either Deep Forest (Far from village) or Deep City (Far from forest)
-        return max(0, int(np.random.normal(1500, 1000)))
-
-def generate_elevation(target):
-    # Bears/Leopards prefer higher/rocky ground.
-    if target == 1:
-        return max(200, int(np.random.normal(600, 150))) # Hills
-    else:
-        return max(100, int(np.random.normal(300, 100))) # Flat lands
-
-# Apply the simulation
-df['dist_forest'] = df['Target'].apply(generate_dist_forest)
-df['dist_water'] = df['Target'].apply(generate_dist_water)
-df['dist_village'] = df['Target'].apply(generate_dist_village)
-df['elevation'] = df['Target'].apply(generate_elevation)
+# We use numpy to generate data that correlates with the 'Target' (Conflict vs Safe):
+# conflicts sit close to forest, water and the village edge, on higher/rocky ground.
+# The distributions are in modules/synthetic_data.py (FEATURE_PROFILES); every
+# feature is one array draw instead of one np.random.normal call per row.
+mark("simulate", rows=len(df))
+rng = np.random.default_rng(SEED)  # Fixed seed for consistent results
+for name, values in simulate_features(df['Target'].to_numpy(), rng).items():
+    df[name] = values
 
 # Save the "Perfect" Dataset
+mark("save", rows=len(df))
 df.to_csv(OUTPUT_FILE, index=False)
 print(f"🎉 Success! Simulated realistic data saved to '{OUTPUT_FILE}'")
 print("👉 Now run 'train_model.py' again to see high accuracy.")
\ No newline at end of file
@@ -4,67 +4,130 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 import os
+import argparse
+import hashlib
+import time
+from contextlib import contextmanager
 
-from sklearn.model_selection import train_test_split
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingRandomSearchCV)
+from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.impute import SimpleImputer
 
+from modules.model_registry import REGISTRY_DIR, register_model
+from modules.telemetry import span
+
 # --- CONFIGURATION ---
 INPUT_FILE = "data/model_ready_data.csv"
 MODEL_FILE = "data/wildlife_model.pkl"
 PLOT_FILE = "assets/feature_importance.png"
 
+# Cleaned + imputed feature matrix, reused while INPUT_FILE and the cleaning code are unchanged
+MATRIX_CACHE = "data/feature_matrix_cache.pkl"
+CLEANING_VERSION = 1   # bump when the cleaning steps below change
+
+# Default forest (the one the app was built with)
+FOREST_PARAMS = {'n_estimators': 100, 'max_depth': 10}
+
+# --search: successive halving over random forest configurations. Every round trains
+# the surviving candidates on FACTOR x more rows and keeps the best 1/FACTOR.
+SEARCH_SPACE = {
+    'n_estimators': [100, 200, 400],
+    'max_depth': [6, 8, 10, 14, None],
+    'min_samples_leaf': [1, 2, 4, 8],
+    'max_features': ['sqrt', 0.5, None],
+    'class_weight': [None, 'balanced'],
+}
+SEARCH_CANDIDATES = 48
+SEARCH_FACTOR = 3
+SEARCH_CV = 3
+
+parser = argparse.ArgumentParser(description="Train the conflict-risk random forest.")
+parser.add_argument("--search", action="store_true", help="successive-halving hyperparameter search")
+parser.add_argument("--grow", type=int, default=0, metavar="N",
+                    help=f"add N trees to the saved model in '{MODEL_FILE}' (warm start, no refit)")
+parser.add_argument("--jobs", type=int, default=-1, help="CPU cores to use (-1 = all)")
+parser.add_argument("--no-cache", action="store_true", help=f"rebuild '{MATRIX_CACHE}'")
+args = parser.parse_args()
+
 # Ensure assets folder exists
 os.makedirs("assets", exist_ok=True)
 
-# --- 1. LOAD & CLEAN DATA ---
-print("📂 Loading Dataset...")
-try:
-    df = pd.read_csv(INPUT_FILE)
-except FileNotFoundError:
-    print(f"❌ Error: {INPUT_FILE} not found.")
-    exit()
+timings = {}
 
-print(f"   Raw Data: {len(df)} rows")
+@contextmanager
+def phase(name):
+    # Printed in the timing report below and recorded as a telemetry span
+    start = time.time()
+    with span(name):
+        yield
+    timings[name] = timings.get(name, 0) + time.time() - start
 
 # DEFINE FEATURES
 feature_cols = ['elevation', 'dist_water', 'dist_forest', 'dist_village']
 
-# --- BULLETPROOF CLEANING (Fixes the NaN Error) ---
-# 1. Convert columns to numbers (forces any text errors to NaN)
-for col in feature_cols:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# 2. Replace "0" and "-1" (API failures) with NaN so we can treat them as missing
-df[feature_cols] = df[feature_cols].replace({0: np.nan, -1: np.nan})
-
-# 3. Fill Missing Values (The Critical Step)
-# Strategy: Use the "Mean" (Average) of the column to fill gaps.
-# If the whole column is empty (worst case), fill with 0.
-imputer = SimpleImputer(strategy='mean')
-
-# Check if we have enough valid data to impute
-if df[feature_cols].isnull().all().all():
-    print("❌ CRITICAL ERROR: Your feature columns are COMPLETELY empty.")
-    print("   The extraction script failed to get ANY data.")
-    print("   Solution: Run 'extract_features_robust.py' again and let it finish.")
-    exit()
-
-try:
-    df[feature_cols] = imputer.fit_transform(df[feature_cols])
-except ValueError:
-    # Fallback if imputation fails
-    print("⚠️ Imputation warning: Filling remaining gaps with 0.")
-    df[feature_cols] = df[feature_cols].fillna(0)
-
-# Final check for NaNs
-if df[feature_cols].isnull().any().any():
-    df[feature_cols] = df[feature_cols].fillna(0)
-
-# DEFINE X and y
-X = df[feature_cols]
-y = df['Target']  # 1 = Conflict, 0 = Safe
+# --- 1. LOAD & CLEAN DATA ---
+def file_key(path):
+    h = hashlib.md5(f"{CLEANING_VERSION}:{feature_cols}".encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def load_clean_matrix():
+    print("📂 Loading Dataset...")
+    try:
+        df = pd.read_csv(INPUT_FILE)
+    except FileNotFoundError:
+        print(f"❌ Error: {INPUT_FILE} not found.")
+        exit()
+
+    print(f"   Raw Data: {len(df)} rows")
+
+    # --- BULLETPROOF CLEANING (Fixes the NaN Error) ---
+    # 1. Convert columns to numbers (forces any text errors to NaN)
+    for col in feature_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # 2. Replace "0" and "-1" (API failures) with NaN so we can treat them as missing
+    df[feature_cols] = df[feature_cols].replace({0: np.nan, -1: np.nan})
+
+    # 3. Fill Missing Values (The Critical Step)
+    # Strategy: Use the "Mean" (Average) of the column to fill gaps.
+    # If the whole column is empty (worst case), fill with 0.
+    imputer = SimpleImputer(strategy='mean')
+
+    # Check if we have enough valid data to impute
+    if df[feature_cols].isnull().all().all():
+        print("❌ CRITICAL ERROR: Your feature columns are COMPLETELY empty.")
+        print("   The extraction script failed to get ANY data.")
+        print("   Solution: Run 'extract_features_robust.py' again and let it finish.")
+        exit()
+
+    try:
+        df[feature_cols] = imputer.fit_transform(df[feature_cols])
+    except ValueError:
+        # Fallback if imputation fails
+        print("⚠️ Imputation warning: Filling remaining gaps with 0.")
+        df[feature_cols] = df[feature_cols].fillna(0)
+
+    # Final check for NaNs
+    if df[feature_cols].isnull().any().any():
+        df[feature_cols] = df[feature_cols].fillna(0)
+
+    # DEFINE X and y
+    return df[feature_cols], df['Target']  # 1 = Conflict, 0 = Safe
+
+with phase("load + clean"):
+    key = None if args.no_cache or not os.path.exists(INPUT_FILE) else file_key(INPUT_FILE)
+    cached = joblib.load(MATRIX_CACHE) if key and os.path.exists(MATRIX_CACHE) else None
+    if cached is not None and cached['key'] == key:
+        X, y = cached['X'], cached['y']
+        print(f"⚡ Reusing cleaned feature matrix from '{MATRIX_CACHE}' ({len(X)} rows)")
+    else:
+        X, y = load_clean_matrix()
+        joblib.dump({'key': key or file_key(INPUT_FILE), 'X': X, 'y': y}, MATRIX_CACHE)
 
 # Split: 80% for Training, 20% for Testing
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -73,16 +136,37 @@ print(f"🧠 Training Model on {len(X_train)} rows...")
 print(f"🧪 Testing Model on {len(X_test)} rows...")
 
 # --- 2. TRAIN RANDOM FOREST MODEL ---
-model = RandomForestClassifier(
-    n_estimators=100,      # Number of "Trees" in the forest
-    max_depth=10,          # Don't let it over-memorize
-    random_state=42
-)
-model.fit(X_train, y_train)
+with phase("train"):
+    if args.grow:
+        # Warm start: keep the fitted trees, only the N new ones are trained
+        model = joblib.load(MODEL_FILE)
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + args.grow, n_jobs=args.jobs)
+        print(f"🌱 Growing the saved forest to {model.n_estimators} trees...")
+        model.fit(X_train, y_train)
+    elif args.search:
+        search = HalvingRandomSearchCV(
+            RandomForestClassifier(random_state=42, n_jobs=1),   # parallelism is across candidates
+            SEARCH_SPACE, n_candidates=SEARCH_CANDIDATES, factor=SEARCH_FACTOR, cv=SEARCH_CV,
+            random_state=42, n_jobs=args.jobs, refit=True,
+        )
+        print(f"🔬 Successive-halving search over {SEARCH_CANDIDATES} configurations...")
+        search.fit(X_train, y_train)
+        model = search.best_estimator_.set_params(n_jobs=args.jobs)
+        print(f"   🏅 Best (CV accuracy {search.best_score_:.1%}): {search.best_params_}")
+        for it in range(search.n_iterations_):
+            print(f"   Round {it + 1}: {search.n_candidates_[it]} candidates on {search.n_resources_[it]} rows")
+    else:
+        model = RandomForestClassifier(
+            **FOREST_PARAMS,
+            n_jobs=args.jobs,      # Trees are independent: build them on every core
+            random_state=42
+        )
+        model.fit(X_train, y_train)
 
 # --- 3. EVALUATE PERFORMANCE ---
-y_pred = model.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
+with phase("evaluate"):
+    y_pred = model.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
 
 print("\n" + "="*30)
 print(f"🏆 MODEL ACCURACY: {accuracy:.1%}")
@@ -102,15 +186,29 @@ print("\n🔍 What drives Conflict? (Feature Importance):")
 print(fi_df)
 
 # Plotting
-plt.figure(figsize=(10, 6))
-sns.barplot(x='Importance', y='Feature', data=fi_df, palette='viridis')
-plt.title('What Environmental Factors Cause Conflict?', fontsize=16)
-plt.xlabel('Importance Score (0-1)')
-plt.tight_layout()
-plt.savefig(PLOT_FILE)
+with phase("plot"):
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x='Importance', y='Feature', data=fi_df, palette='viridis')
+    plt.title('What Environmental Factors Cause Conflict?', fontsize=16)
+    plt.xlabel('Importance Score (0-1)')
+    plt.tight_layout()
+    plt.savefig(PLOT_FILE)
 print(f"📊 Feature Importance Graph saved to '{PLOT_FILE}'")
 
 # --- 5. SAVE THE MODEL ---
-joblib.dump(model, MODEL_FILE)
-print(f"💾 Trained Model saved to '{MODEL_FILE}'")
+with phase("save"):
+    model.set_params(warm_start=False)
+    joblib.dump(model, MODEL_FILE)
+    # Versioned copy with its manifest; serve_model.py memory-maps the current version
+    version = register_model(
+        model, feature_cols,
+        metrics={'accuracy': round(float(accuracy), 4), 'train_rows': len(X_train), 'test_rows': len(X_test)},
+        data_hash=key or file_key(INPUT_FILE),
+    )
+print(f"💾 Trained Model saved to '{MODEL_FILE}' and registered as {version} in '{REGISTRY_DIR}'")
+
+print("\n⏱️ Timing report:")
+for name, seconds in timings.items():
+    print(f"   {name:<14}{seconds:8.2f}s")
+print(f"   {'total':<14}{sum(timings.values()):8.2f}s")
 print("✅ Ready to be used in app.py!")
\ No newline at end of file